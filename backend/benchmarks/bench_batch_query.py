@@ -0,0 +1,76 @@
+"""Compare sequential single queries with one batched vector search.
+
+Uses synthetic normalized vectors (no embedding model required) and times
+``VectorDB.query`` called once per query against one call with every query
+embedding, which is what ``/api/rag/query-batch`` issues.
+
+Usage:
+    python benchmarks/bench_batch_query.py --size 50000 --batch 100
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ["CHROMA_PERSIST_DIR"] = tempfile.mkdtemp(prefix="bench_chroma_")
+os.environ["CHROMA_COLLECTION_NAME"] = "bench_batch"
+os.environ["VECTOR_BACKEND"] = "chroma"
+
+import numpy as np
+
+from vectordb import vector_db
+from benchmarks.bench_vector_backends import make_vectors
+
+ADD_BATCH = 5000
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = make_vectors(args.size + args.batch, args.dim, max(10, args.size // 100), rng)
+    vectors, queries = vectors[:args.size], vectors[args.size:]
+
+    vector_db.reset()
+    for offset in range(0, args.size, ADD_BATCH):
+        batch = vectors[offset:offset + ADD_BATCH]
+        vector_db.add_documents(
+            ids=[str(i) for i in range(offset, offset + len(batch))],
+            documents=[""] * len(batch),
+            embeddings=batch,
+            metadatas=[{"filename": "bench"}] * len(batch),
+        )
+
+    print("=" * 60)
+    print(f"🧪 Batched query (n={args.size}, batch={args.batch}, k={args.k})")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    single = [vector_db.query(query_embeddings=q[np.newaxis, :], n_results=args.k) for q in queries]
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched_result = vector_db.query(query_embeddings=queries, n_results=args.k)
+    batched = time.perf_counter() - start
+
+    assert [r["ids"][0] for r in single] == batched_result["ids"]
+
+    print(f"  sequential: {sequential * 1000:8.1f} ms  ({sequential * 1000 / args.batch:.3f} ms/query)")
+    print(f"  batched:    {batched * 1000:8.1f} ms  ({batched * 1000 / args.batch:.3f} ms/query)")
+    print(f"  speedup:    {sequential / batched:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Benchmark length-bucketed, token-budget batching for document encoding.
+
+Reports padding efficiency (real tokens / padded tokens) of fixed-size
+batches in input order and of token-budget batches on a mixed-length
+corpus, then times:
+
+- one ``model.encode`` call over the corpus (the in-process path;
+  SentenceTransformer sorts the texts by length itself)
+- one ``model.encode`` call per task, as the embedding worker pool runs
+  them: fixed-size tasks in input order vs token-budget tasks (including
+  the token counting)
+
+Usage:
+    python benchmarks/bench_batching.py --chunks 2000
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import numpy as np
+
+from config import settings
+from embeddings import embedding_model, build_token_batches
+
+SENTENCES = [
+    "EdgeAI Talkは音声で対話できるアシスタントです。",
+    "The backend retrieves context from ChromaDB before calling the LLM.",
+    "展示会では来場者からの質問にリアルタイムで回答します。",
+    "Chunks range from a few characters to the full chunk size.",
+]
+
+
+def make_corpus(count: int, seed: int = 0):
+    """Generate chunks from a few characters up to ~chunk_size characters."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        target = rng.choice([10, 50, 200, 500, settings.chunk_size])
+        text = ""
+        while len(text) < target:
+            text += rng.choice(SENTENCES)
+        corpus.append(text[:target])
+    return corpus
+
+
+def padding_efficiency(lengths, batches):
+    """Ratio of real tokens to padded tokens for a batch layout."""
+    real = sum(lengths)
+    padded = sum(max(lengths[i] for i in batch) * len(batch) for batch in batches)
+    return real / padded
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.chunks)
+    prefixed = [f"passage: {doc}" for doc in corpus]
+    start = time.perf_counter()
+    lengths = embedding_model.token_lengths(prefixed)
+    tokenize_time = time.perf_counter() - start
+
+    fixed_batches = [
+        list(range(i, min(i + args.batch_size, len(corpus))))
+        for i in range(0, len(corpus), args.batch_size)
+    ]
+    budget_batches = build_token_batches(
+        lengths,
+        token_budget=settings.embedding_batch_token_budget,
+        max_batch_size=settings.embedding_max_batch_size,
+    )
+
+    print("=" * 60)
+    print(f"🧪 Batching benchmark ({args.chunks} mixed-length chunks)")
+    print("=" * 60)
+    print(f"  Token lengths: min {min(lengths)}, median {int(np.median(lengths))}, max {max(lengths)}")
+    print(f"  Counting tokens: {tokenize_time * 1000:.0f} ms (included in the token budget time)")
+    print(
+        f"  Padding efficiency: fixed (original order) "
+        f"{padding_efficiency(lengths, fixed_batches):.1%}, "
+        f"token budget {padding_efficiency(lengths, budget_batches):.1%}"
+    )
+
+    # Warm up
+    embedding_model.model.encode(prefixed[:8], show_progress_bar=False)
+
+    def encode_tasks(batches):
+        """Encode each batch in its own call, as a pool worker does."""
+        embeddings = np.empty((len(prefixed), embedding_model.native_dim), dtype=np.float32)
+        for indices in batches:
+            embeddings[indices] = embedding_model.model.encode(
+                [prefixed[i] for i in indices],
+                batch_size=len(indices),
+                convert_to_numpy=True,
+                show_progress_bar=False,
+                normalize_embeddings=True,
+            )
+        return embeddings
+
+    start = time.perf_counter()
+    baseline = embedding_model.model.encode(
+        prefixed,
+        batch_size=args.batch_size,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+        normalize_embeddings=True,
+    )
+    single_call_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fixed = encode_tasks(fixed_batches)
+    fixed_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bucketed = encode_tasks(budget_batches)
+    bucketed_time = time.perf_counter() - start + tokenize_time
+
+    max_diff = max(
+        float(np.max(np.abs(baseline - fixed))), float(np.max(np.abs(baseline - bucketed)))
+    )
+
+    print(f"  In process, one call (batch_size={args.batch_size}): {single_call_time:.2f}s")
+    print(f"  Pool tasks, fixed {args.batch_size} in input order: {fixed_time:.2f}s")
+    print(
+        f"  Pool tasks, token budget={settings.embedding_batch_token_budget} "
+        f"({len(budget_batches)} tasks): {bucketed_time:.2f}s"
+    )
+    print(f"  Pool task speedup: {fixed_time / bucketed_time:.2f}x (max abs diff {max_diff:.2e})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Benchmark and golden-check the character chunker.
+
+Verifies that ``split_text_into_chunks`` produces exactly the same chunks as
+the original list-building implementation on the sample data, templates and
+generated documents, then times both on a large (default 50 MB) input and
+times the streaming generator alone on a high-overlap setting.
+
+Usage:
+    python benchmarks/bench_chunker.py --size-mb 50
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from text_processing import split_text_into_chunks, iter_text_chunks
+
+
+def legacy_split_text_into_chunks(text, chunk_size=1000, chunk_overlap=200):
+    """Original implementation."""
+    if len(text) <= chunk_size:
+        return [text]
+
+    chunks = []
+    start = 0
+
+    while start < len(text):
+        end = start + chunk_size
+
+        if end < len(text):
+            search_start = int(end - chunk_size * 0.2)
+            sentence_end = max(
+                text.rfind("。", search_start, end),
+                text.rfind(".", search_start, end),
+                text.rfind("!", search_start, end),
+                text.rfind("?", search_start, end),
+                text.rfind("\n", search_start, end),
+            )
+
+            if sentence_end > start:
+                end = sentence_end + 1
+
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+
+        start = end - chunk_overlap if end < len(text) else end
+
+    return chunks
+
+
+def golden_documents():
+    """Sample data, templates and generated documents."""
+    for directory in ("sample_data", "templates"):
+        for path in sorted((BACKEND_DIR / directory).glob("*")):
+            yield path.name, path.read_text(encoding="utf-8")
+
+    rng = random.Random(0)
+    pieces = ["EdgeAI Talk", "音声認識", "。", ". ", "!", "?", "\n", "  ", "a" * 50, "{\"k\": 1}"]
+    for i in range(200):
+        size = rng.choice([10, 999, 1000, 1001, 5000, 20000])
+        text = "".join(rng.choice(pieces) for _ in range(size // 5))
+        yield f"generated_{i}", text
+
+
+def make_large_text(size_mb: int, minified: bool) -> str:
+    """Build a large document: minified JSON-like or regular prose."""
+    if minified:
+        unit = '{"id":123,"name":"edgeai","tags":["voice","rag"],"score":0,"ok":true},'
+    else:
+        unit = "EdgeAI Talkは音声で対話できるアシスタントです。展示会で利用されます。\n"
+    target = size_mb * 1024 * 1024
+    return unit * (target // len(unit.encode("utf-8")) + 1)
+
+
+def main():
+    """Run golden checks and timings."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=50)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🧪 Chunker golden check")
+    print("=" * 60)
+
+    checked = 0
+    for name, text in golden_documents():
+        for chunk_size, chunk_overlap in [(1000, 200), (300, 50), (100, 0)]:
+            expected = legacy_split_text_into_chunks(text, chunk_size, chunk_overlap)
+            actual = split_text_into_chunks(text, chunk_size, chunk_overlap)
+            if expected != actual:
+                print(f"❌ Mismatch: {name} (size={chunk_size}, overlap={chunk_overlap})")
+                sys.exit(1)
+            checked += 1
+    print(f"✅ {checked} document/setting combinations identical")
+
+    print("\n" + "=" * 60)
+    print(f"🧪 Chunker timing ({args.size_mb} MB)")
+    print("=" * 60)
+
+    for label, minified in [("prose", False), ("minified JSON", True)]:
+        text = make_large_text(args.size_mb, minified)
+
+        start = time.perf_counter()
+        legacy_count = len(legacy_split_text_into_chunks(text))
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        new_count = sum(1 for _ in iter_text_chunks(text, 1000, 200))
+        new_time = time.perf_counter() - start
+
+        assert legacy_count == new_count
+        print(
+            f"  {label:14s} chunks: {new_count:8d}  "
+            f"legacy: {legacy_time:6.2f}s  generator: {new_time:6.2f}s"
+        )
+
+    # Overlap >= 80% of the chunk size can make the legacy loop step backwards
+    # forever; the generator always advances
+    text = make_large_text(args.size_mb, minified=False)
+    start = time.perf_counter()
+    count = sum(1 for _ in iter_text_chunks(text, 100, 85))
+    print(
+        f"  {'overlap 85/100':14s} chunks: {count:8d}  "
+        f"generator: {time.perf_counter() - start:6.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark clean_text and its effect on chunk boundaries.
+
+Times the original two-regex normalizer against the single-pass
+``clean_text`` and the streaming ``iter_clean_text`` on multi-MB inputs,
+then compares how many Markdown chunks end on a sentence or line boundary.
+
+Usage:
+    python benchmarks/bench_clean_text.py --size-mb 8
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from text_processing import (
+    clean_text,
+    iter_clean_text,
+    split_text_into_chunks,
+    SENTENCE_BOUNDARIES,
+)
+
+
+def legacy_clean_text(text: str) -> str:
+    """Original normalizer (drops every newline)."""
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+def markdown_files():
+    """Markdown documents shipped with the backend."""
+    for directory in ("sample_data", "templates"):
+        yield from sorted((BACKEND_DIR / directory).glob("*.md"))
+
+
+def boundary_ratio(text, chunks):
+    """Fraction of non-final chunks that end on a sentence or line boundary."""
+    inner = chunks[:-1]
+    if not inner:
+        return 1.0
+
+    on_boundary = 0
+    cursor = 0
+    for chunk in inner:
+        pos = text.find(chunk, cursor)
+        end = pos + len(chunk)
+        if chunk.endswith(SENTENCE_BOUNDARIES) or text.startswith("\n", end):
+            on_boundary += 1
+        cursor = pos + 1
+
+    return on_boundary / len(inner)
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=8)
+    args = parser.parse_args()
+
+    corpus = "\n\n".join(path.read_text(encoding="utf-8") for path in markdown_files())
+    repeat = args.size_mb * 1024 * 1024 // len(corpus.encode("utf-8")) + 1
+    text = corpus * repeat
+    pages = [text[i:i + 4000] for i in range(0, len(text), 4000)]
+
+    print("=" * 60)
+    print(f"🧪 clean_text timing ({len(text.encode('utf-8')) / 1e6:.1f} MB)")
+    print("=" * 60)
+
+    for label, func in [
+        ("legacy (2 regex)", lambda: legacy_clean_text(text)),
+        ("single pass", lambda: clean_text(text)),
+        ("stream (4k pages)", lambda: "".join(iter_clean_text(pages))),
+    ]:
+        start = time.perf_counter()
+        func()
+        print(f"  {label:18s} {time.perf_counter() - start:6.3f}s")
+
+    assert "".join(iter_clean_text(pages)) == clean_text(text)
+
+    print("\n" + "=" * 60)
+    print("🧪 Chunk boundaries on Markdown files")
+    print("=" * 60)
+
+    for path in markdown_files():
+        raw = path.read_text(encoding="utf-8")
+        old_text = legacy_clean_text(raw)
+        new_text = clean_text(raw)
+        old_chunks = split_text_into_chunks(old_text, 300, 50)
+        new_chunks = split_text_into_chunks(new_text, 300, 50)
+        print(
+            f"  {path.name:24s} on boundary: "
+            f"legacy {boundary_ratio(old_text, old_chunks):5.0%} ({len(old_chunks)} chunks)  "
+            f"new {boundary_ratio(new_text, new_chunks):5.0%} ({len(new_chunks)} chunks)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Compare exact NumPy search with Chroma's HNSW on small collections.
+
+Reports recall@k (against brute-force ground truth), single-query p50/p99
+latency and batched-query throughput for both query paths of ``VectorDB``.
+
+Usage:
+    python benchmarks/bench_exact_search.py --sizes 1000,5000,20000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ["CHROMA_PERSIST_DIR"] = tempfile.mkdtemp(prefix="bench_chroma_")
+os.environ["CHROMA_COLLECTION_NAME"] = "bench_exact"
+os.environ["VECTOR_BACKEND"] = "chroma"
+
+import numpy as np
+
+from vectordb import vector_db
+from benchmarks.bench_vector_backends import make_vectors, exact_top_k
+
+ADD_BATCH = 5000
+BATCH_QUERIES = 64
+
+
+def measure(queries: np.ndarray, k: int, truth: np.ndarray):
+    """Return (recall@k, p50 ms, p99 ms, batched ms per query)."""
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = vector_db.query(query_embeddings=query[np.newaxis, :], n_results=k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len({int(i) for i in result["ids"][0]} & set(expected.tolist()))
+
+    batch = queries[:BATCH_QUERIES]
+    start = time.perf_counter()
+    vector_db.query(query_embeddings=batch, n_results=k)
+    batched = (time.perf_counter() - start) * 1000 / len(batch)
+
+    return hits / truth.size, np.percentile(latencies, 50), np.percentile(latencies, 99), batched
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,5000,20000")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+
+    print("=" * 72)
+    print(f"🧪 Exact vs HNSW search (dim={args.dim}, k={args.k})")
+    print("=" * 72)
+
+    for size in [int(s) for s in args.sizes.split(",")]:
+        vectors = make_vectors(size + args.queries, args.dim, max(10, size // 100), rng)
+        vectors, queries = vectors[:size], vectors[size:]
+        truth = exact_top_k(vectors, queries, args.k)
+
+        vector_db.reset()
+        for offset in range(0, size, ADD_BATCH):
+            batch = vectors[offset:offset + ADD_BATCH]
+            vector_db.add_documents(
+                ids=[str(i) for i in range(offset, offset + len(batch))],
+                documents=[""] * len(batch),
+                embeddings=batch,
+                metadatas=[{"filename": "bench"}] * len(batch),
+            )
+
+        exact_index = vector_db.exact_index
+        for name, index in [("hnsw", None), ("exact", exact_index)]:
+            vector_db.exact_index = index
+            recall, p50, p99, batched = measure(queries, args.k, truth)
+            print(
+                f"  {size:>6d} {name:6s} recall@{args.k}: {recall:.3f}  "
+                f"p50: {p50:6.2f} ms  p99: {p99:6.2f} ms  "
+                f"batched({BATCH_QUERIES}): {batched:6.3f} ms/query"
+            )
+
+
+if __name__ == "__main__":
+    main()
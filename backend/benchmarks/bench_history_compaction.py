@@ -0,0 +1,82 @@
+"""Prompt size per turn with and without history compaction.
+
+Simulates a long conversation against a stub LLM whose summaries take a
+configurable time to produce, and reports prompt tokens per turn (a proxy
+for prefill time / time-to-first-token) for the verbatim history and for
+the compacted one.
+
+Usage:
+    python benchmarks/bench_history_compaction.py --turns 30 --keep-turns 3
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from config import settings
+from models import Message
+from context_packer import approximate_tokens, MESSAGE_OVERHEAD_TOKENS
+from history import HistoryManager
+
+QUESTION = "EdgeAI Talkの音声認識はオフラインでも動作しますか？展示会場での利用を想定しています。"
+ANSWER = "はい、EdgeAI Talkはローカルで音声認識と応答生成を行うため、ネットワークがなくても動作します。" * 3
+
+
+class StubLLM:
+    """Returns a fixed-size summary after a delay."""
+
+    def __init__(self, delay: float, summary_chars: int):
+        self.delay = delay
+        self.summary_chars = summary_chars
+        self.calls = 0
+
+    async def complete(self, messages, temperature=0.2, max_tokens=512):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return "要約" * (self.summary_chars // 2)
+
+
+def prompt_tokens(messages):
+    return sum(approximate_tokens(msg.content) + MESSAGE_OVERHEAD_TOKENS for msg in messages)
+
+
+async def run(args):
+    settings.history_keep_turns = args.keep_turns
+    llm = StubLLM(args.summary_delay, args.summary_chars)
+    manager = HistoryManager(llm=llm)
+
+    messages = [Message(role="system", content="You are a helpful assistant.")]
+    print(f"{'turn':>5} {'verbatim':>10} {'compacted':>10}")
+    for turn in range(1, args.turns + 1):
+        messages.append(Message(role="user", content=QUESTION))
+
+        compacted = manager.compact("bench", messages)
+        if turn % args.report_every == 0 or turn == 1:
+            print(f"{turn:5d} {prompt_tokens(messages):10d} {prompt_tokens(compacted):10d}")
+
+        # Answer streams, then the summary runs while the user reads it
+        manager.schedule_summary("bench", messages)
+        await asyncio.sleep(args.think_time)
+        messages.append(Message(role="assistant", content=ANSWER))
+
+    print(f"\n  summaries requested from the LLM: {llm.calls}")
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--keep-turns", type=int, default=3)
+    parser.add_argument("--summary-chars", type=int, default=400)
+    parser.add_argument("--summary-delay", type=float, default=0.05, help="seconds per summary")
+    parser.add_argument("--think-time", type=float, default=0.1, help="seconds between turns")
+    parser.add_argument("--report-every", type=int, default=5)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Benchmark peak RSS and wall time of the embedding → vector store path.
+
+Compares the old path (embeddings converted to Python lists) with the
+NumPy path (contiguous float32 / float16 arrays). Each mode runs in its own
+subprocess so that peak RSS is measured independently.
+
+Usage:
+    python benchmarks/bench_ingest_memory.py --chunks 50000
+    python benchmarks/bench_ingest_memory.py --chunks 50000 --synthetic
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+MODES = ["list", "float32", "float16"]
+ENCODE_BATCH = 1024
+
+
+def make_chunks(count: int):
+    """Generate mixed-length Japanese/English chunks."""
+    base = "EdgeAI Talkは音声で対話できるアシスタントです。"
+    return [
+        f"{i}: " + base * (1 + (i * 7) % 20)
+        for i in range(count)
+    ]
+
+
+def run_child(mode: str, chunks: int, synthetic: bool) -> None:
+    """Run one ingest in this process and print a JSON result line."""
+    os.environ["CHROMA_PERSIST_DIR"] = tempfile.mkdtemp(prefix="bench_chroma_")
+    os.environ["CHROMA_COLLECTION_NAME"] = "bench_ingest"
+    os.environ["EMBEDDING_DTYPE"] = "float16" if mode == "float16" else "float32"
+
+    import numpy as np
+    from vectordb import vector_db
+
+    texts = make_chunks(chunks)
+    ids = [f"chunk-{i}" for i in range(chunks)]
+    metadatas = [{"filename": "bench.txt", "chunk_index": i} for i in range(chunks)]
+
+    if synthetic:
+        dim = 768
+        rng = np.random.default_rng(0)
+        dtype = np.float16 if mode == "float16" else np.float32
+
+        def encode(batch):
+            vectors = rng.standard_normal((len(batch), dim), dtype=np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            return vectors.astype(dtype)
+    else:
+        from embeddings import embedding_model
+
+        encode = embedding_model.encode_documents
+
+    start = time.perf_counter()
+
+    parts = [
+        encode(texts[i:i + ENCODE_BATCH])
+        for i in range(0, chunks, ENCODE_BATCH)
+    ]
+    if mode == "list":
+        embeddings = [row for part in parts for row in part.tolist()]
+    else:
+        embeddings = np.concatenate(parts)
+    del parts
+
+    vector_db.add_documents(
+        ids=ids,
+        documents=texts,
+        embeddings=embeddings,
+        metadatas=metadatas,
+    )
+
+    elapsed = time.perf_counter() - start
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print(json.dumps({
+        "mode": mode,
+        "chunks": chunks,
+        "wall_time_s": round(elapsed, 2),
+        "peak_rss_mb": round(peak_rss_mb, 1),
+    }))
+
+
+def main():
+    """Run every mode in a subprocess and print a comparison table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=50000)
+    parser.add_argument(
+        "--synthetic",
+        action="store_true",
+        help="Use random vectors instead of the embedding model",
+    )
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_child(args.mode, args.chunks, args.synthetic)
+        return
+
+    print("=" * 60)
+    print(f"🧪 Ingest benchmark ({args.chunks} chunks, synthetic={args.synthetic})")
+    print("=" * 60)
+
+    for mode in MODES:
+        cmd = [sys.executable, __file__, "--mode", mode, "--chunks", str(args.chunks)]
+        if args.synthetic:
+            cmd.append("--synthetic")
+
+        output = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"  {result['mode']:8s} wall: {result['wall_time_s']:7.2f}s  "
+            f"peak RSS: {result['peak_rss_mb']:8.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
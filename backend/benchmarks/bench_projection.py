@@ -0,0 +1,118 @@
+"""Measure the recall trade-off of PCA-projected embeddings.
+
+Fits a ``Projection`` for several output dimensions on a set of normalized
+embeddings and uses held-out ones (10%, at most 1000) as queries. Recall@k
+is the overlap of the top-k found with projected vectors and the exact
+top-k with the original vectors; the size of each chunk's vector and the latency of an
+exact single-query scan are reported alongside.
+
+The embeddings come from the current collection (``--source store``, if it
+is not projected yet) or from synthetic clustered vectors with a decaying
+variance spectrum like real sentence embeddings (``--source synthetic``).
+
+Usage:
+    python benchmarks/bench_projection.py --source store
+    python benchmarks/bench_projection.py --source synthetic --size 50000 --dim 1024
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import numpy as np
+
+from projection import Projection
+
+
+def make_vectors(n: int, dim: int, clusters: int, rng) -> np.ndarray:
+    """Normalized clustered vectors whose variance decays across dimensions."""
+    spectrum = 1.0 / np.sqrt(np.arange(1, dim + 1, dtype=np.float32))
+    rotation, _ = np.linalg.qr(rng.standard_normal((dim, dim)).astype(np.float32))
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32) * spectrum
+    vectors = centers[rng.integers(0, clusters, n)]
+    vectors += 0.5 * rng.standard_normal((n, dim), dtype=np.float32) * spectrum
+    vectors = vectors @ rotation
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Exact top-k row indices."""
+    scores = queries @ corpus.T
+    return np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+
+def scan_latency(corpus: np.ndarray, queries: np.ndarray, k: int) -> float:
+    """Median single-query exact scan time in ms."""
+    latencies = []
+    for query in queries[:50]:
+        start = time.perf_counter()
+        scores = corpus @ query
+        np.argpartition(-scores, k - 1)[:k]
+        latencies.append((time.perf_counter() - start) * 1000)
+    return float(np.median(latencies))
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", choices=["store", "synthetic"], default="synthetic")
+    parser.add_argument("--size", type=int, default=50000, help="synthetic vectors")
+    parser.add_argument("--dim", type=int, default=768, help="synthetic dimension")
+    parser.add_argument("--dims", default="64,128,192,256,384", help="projected dimensions")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--whiten", action="store_true")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.source == "store":
+        from embeddings import embedding_model
+        from vectordb import vector_db
+
+        if embedding_model.projection is not None:
+            raise SystemExit("❌ The collection is already projected; run with --source synthetic")
+        _, vectors = vector_db.sample_embeddings(vector_db.count())
+        embedding_model.close()
+        source = f"collection ({len(vectors)} chunks)"
+    else:
+        vectors = make_vectors(args.size, args.dim, max(10, args.size // 100), rng)
+        source = f"synthetic ({args.size} vectors)"
+
+    vectors = vectors[rng.permutation(len(vectors))]
+    held_out = min(len(vectors) // 10, 1000)
+    corpus, queries = vectors[held_out:], vectors[:held_out]
+    truth = top_k(corpus, queries, args.k)
+    input_dim = corpus.shape[1]
+
+    print("=" * 78)
+    print(f"🧪 PCA projection: {source}, {input_dim} dims, recall@{args.k} on {len(queries)} queries")
+    print("=" * 78)
+    print(
+        f"  {'dims':>5s}  {'variance':>8s}  {'recall':>6s}  {'bytes/chunk':>11s}  "
+        f"{'scan p50':>9s}"
+    )
+    print(
+        f"  {input_dim:5d}  {1:8.1%}  {1:6.3f}  {input_dim * 4:11d}  "
+        f"{scan_latency(corpus, queries, args.k):7.2f}ms"
+    )
+
+    for dim in [int(d) for d in args.dims.split(",")]:
+        if dim >= input_dim or dim > len(corpus):
+            continue
+        projection = Projection.fit(corpus, dim, "benchmark", whiten=args.whiten)
+        projected_corpus = projection.apply(corpus)
+        projected_queries = projection.apply(queries)
+        found = top_k(projected_corpus, projected_queries, args.k)
+        recall = np.mean([len(set(f) & set(t)) / args.k for f, t in zip(found, truth)])
+        print(
+            f"  {dim:5d}  {projection.explained_variance:8.1%}  {recall:6.3f}  {dim * 4:11d}  "
+            f"{scan_latency(projected_corpus, projected_queries, args.k):7.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
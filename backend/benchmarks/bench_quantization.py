@@ -0,0 +1,129 @@
+"""Compare memory per chunk and recall@k of quantized local vector stores.
+
+Builds one local store per LOCAL_VECTOR_QUANTIZATION mode (none, int8,
+binary) from the same synthetic clustered, normalized vectors and measures
+recall@k against exact NumPy ground truth on the unquantized vectors, with
+the default shortlist rescoring and with the first pass alone (shortlist of
+k). The first-pass index is what a search keeps hot in RAM; full-precision
+vectors are only read for the rescored shortlist.
+
+Usage:
+    python benchmarks/bench_quantization.py --size 100000 --dim 1024
+    python benchmarks/bench_quantization.py --size 100000 --exact
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ["CHROMA_PERSIST_DIR"] = tempfile.mkdtemp(prefix="bench_chroma_")
+os.environ["VECTOR_BACKEND"] = "chroma"
+
+import numpy as np
+
+from config import settings
+from local_vectordb import LocalVectorDB, RESCORE_FACTORS
+
+MODES = ["none", "int8", "binary"]
+ADD_BATCH = 5000
+
+
+def make_vectors(n: int, dim: int, clusters: int, rng) -> np.ndarray:
+    """Normalized vectors drawn around random cluster centers."""
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    vectors = centers[rng.integers(0, clusters, n)]
+    vectors += 0.6 * rng.standard_normal((n, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def measure(db, queries: np.ndarray, k: int, truth: np.ndarray):
+    """Return (recall@k, p50 ms, p99 ms) for single-query search."""
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = db.query(query_embeddings=query[np.newaxis, :], n_results=k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len({int(i) for i in result["ids"][0]} & set(expected.tolist()))
+
+    return hits / truth.size, np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--exact", action="store_true", help="scan every row instead of IVF")
+    args = parser.parse_args()
+
+    if args.exact:
+        settings.local_ivf_min_vectors = args.size + 1
+
+    rng = np.random.default_rng(0)
+    vectors = make_vectors(args.size + args.queries, args.dim, max(10, args.size // 100), rng)
+    vectors, queries = vectors[:args.size], vectors[args.size:]
+    scores = queries @ vectors.T
+    truth = np.argpartition(-scores, args.k - 1, axis=1)[:, :args.k]
+    row_bytes = args.dim * np.dtype(settings.local_vector_dtype).itemsize
+
+    print("=" * 78)
+    print(
+        f"🧪 Quantized local store ({args.size} chunks, dim={args.dim}, k={args.k}, "
+        f"{'exact scan' if args.exact else 'IVF'})"
+    )
+    print("=" * 78)
+
+    for mode in MODES:
+        settings.local_vector_dir = tempfile.mkdtemp(prefix=f"bench_quant_{mode}_")
+        settings.local_vector_quantization = mode
+        db = LocalVectorDB()
+        for offset in range(0, args.size, ADD_BATCH):
+            batch = vectors[offset:offset + ADD_BATCH]
+            db.add_documents(
+                ids=[str(i) for i in range(offset, offset + len(batch))],
+                documents=[""] * len(batch),
+                embeddings=batch,
+            )
+
+        if mode == "none":
+            index_bytes = os.path.getsize(os.path.join(db.path, "vectors.bin"))
+        else:
+            index_bytes = sum(
+                os.path.getsize(os.path.join(db.path, name))
+                for name in ["codes.bin", "code_scales.bin"]
+                if os.path.exists(os.path.join(db.path, name))
+            )
+        print(
+            f"  {mode:7s} first-pass index: {index_bytes / args.size:6.1f} B/chunk "
+            f"(full precision: {row_bytes} B/chunk on disk)"
+        )
+
+        factors = [0] if mode == "none" else [0, 1]
+        for factor in factors:
+            settings.local_rescore_factor = factor
+            recall, p50, p99 = measure(db, queries, args.k, truth)
+            shortlist = args.k * (factor or RESCORE_FACTORS.get(mode, 1))
+            label = "first pass only" if factor == 1 else (
+                "exact" if mode == "none" else f"rescore {shortlist:3d}"
+            )
+            read = 0 if mode == "none" else shortlist * row_bytes / 1024
+            print(
+                f"          {label:15s} recall@{args.k}: {recall:.3f}  "
+                f"p50: {p50:6.2f} ms  p99: {p99:6.2f} ms  "
+                f"full-precision reads: {read:5.0f} KB/query"
+            )
+        settings.local_rescore_factor = 0
+
+
+if __name__ == "__main__":
+    main()
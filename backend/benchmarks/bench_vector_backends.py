@@ -0,0 +1,113 @@
+"""Compare recall@k and query latency of the Chroma and local vector backends.
+
+Builds both stores from the same synthetic clustered, normalized vectors,
+computes exact ground truth with NumPy, and reports recall@k plus p50/p99
+single-query latency for each collection size.
+
+Usage:
+    python benchmarks/bench_vector_backends.py --sizes 10000,100000
+    python benchmarks/bench_vector_backends.py --sizes 1000000 --skip-chroma
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ["CHROMA_PERSIST_DIR"] = tempfile.mkdtemp(prefix="bench_chroma_")
+os.environ["CHROMA_COLLECTION_NAME"] = "bench_backends"
+os.environ["LOCAL_VECTOR_DIR"] = tempfile.mkdtemp(prefix="bench_local_")
+os.environ["VECTOR_BACKEND"] = "chroma"
+
+import numpy as np
+
+from vectordb import vector_db as chroma_db
+from local_vectordb import LocalVectorDB
+
+ADD_BATCH = 5000
+
+
+def make_vectors(n: int, dim: int, clusters: int, rng) -> np.ndarray:
+    """Normalized vectors drawn around random cluster centers."""
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    vectors = centers[rng.integers(0, clusters, n)]
+    vectors += 0.6 * rng.standard_normal((n, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Ground-truth top-k row indices."""
+    scores = queries @ vectors.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return top
+
+
+def measure(db, queries: np.ndarray, k: int, truth: np.ndarray):
+    """Return (recall@k, p50 ms, p99 ms) for single-query search."""
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = db.query(query_embeddings=query[np.newaxis, :], n_results=k)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        found = {int(doc_id) for doc_id in result["ids"][0]}
+        hits += len(found & set(expected.tolist()))
+
+    return hits / truth.size, np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--skip-chroma", action="store_true")
+    args = parser.parse_args()
+
+    local_db = LocalVectorDB()
+    rng = np.random.default_rng(0)
+
+    print("=" * 72)
+    print(f"🧪 Vector backend benchmark (dim={args.dim}, k={args.k})")
+    print("=" * 72)
+
+    for size in [int(s) for s in args.sizes.split(",")]:
+        vectors = make_vectors(size + args.queries, args.dim, max(10, size // 100), rng)
+        vectors, queries = vectors[:size], vectors[size:]
+        truth = exact_top_k(vectors, queries, args.k)
+
+        backends = [("local", local_db)]
+        if not args.skip_chroma:
+            backends.insert(0, ("chroma", chroma_db))
+
+        for name, db in backends:
+            db.reset()
+            start = time.perf_counter()
+            for offset in range(0, size, ADD_BATCH):
+                batch = vectors[offset:offset + ADD_BATCH]
+                db.add_documents(
+                    ids=[str(i) for i in range(offset, offset + len(batch))],
+                    documents=[""] * len(batch),
+                    embeddings=batch,
+                    metadatas=[{"filename": "bench"}] * len(batch),
+                )
+            build_time = time.perf_counter() - start
+
+            recall, p50, p99 = measure(db, queries, args.k, truth)
+            print(
+                f"  {size:>8d} {name:7s} recall@{args.k}: {recall:.3f}  "
+                f"p50: {p50:6.2f} ms  p99: {p99:6.2f} ms  build: {build_time:7.1f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
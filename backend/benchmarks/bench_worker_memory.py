@@ -0,0 +1,106 @@
+"""Measure memory of embedding worker processes, spawned vs forked.
+
+Loads the embedding model through ``EmbeddingModel`` with an ingestion
+worker pool of N processes, encodes enough documents to keep every worker
+busy, then reads RSS, PSS and USS from ``/proc/<pid>/smaps_rollup`` for the
+parent and each worker. PSS splits shared pages between the processes
+mapping them, so the PSS total is what the processes really cost; a
+worker's USS (private pages) is what one more worker adds. Linux only.
+
+Usage:
+    python benchmarks/bench_worker_memory.py --workers 4
+    python benchmarks/bench_worker_memory.py --workers 4 --model intfloat/multilingual-e5-large
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+MODES = ["spawn", "fork"]
+
+
+def read_memory(pid: int) -> dict:
+    """RSS, PSS and USS of a process in MB."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if value.strip().endswith("kB"):
+                fields[key] = int(value.split()[0]) / 1024
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "uss": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def run_child(method: str, workers: int, documents: int) -> None:
+    """Measure one start method in this process and print a JSON result line."""
+    os.environ["EMBEDDING_POOL_WORKERS"] = str(workers)
+    os.environ["EMBEDDING_POOL_START_METHOD"] = method
+    os.environ["EMBEDDING_POOL_MIN_DOCUMENTS"] = "1"
+
+    from embeddings import embedding_model
+
+    base = "EdgeAI Talkは音声で対話できるアシスタントです。"
+    embedding_model.encode_documents([f"{i}: " + base * (1 + i % 8) for i in range(documents)])
+
+    print(json.dumps({
+        "parent": read_memory(os.getpid()),
+        "workers": [read_memory(p.pid) for p in embedding_model.worker_pool._processes],
+    }))
+    embedding_model.close()
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--documents", type=int, default=512)
+    parser.add_argument("--model", default=None, help="defaults to EMBEDDING_MODEL")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.workers, args.documents)
+        return
+
+    from config import settings
+
+    model = args.model or settings.embedding_model
+
+    print("=" * 60)
+    print(f"🧪 Embedding worker memory ({args.workers} workers, model: {model})")
+    print("=" * 60)
+
+    for method in MODES:
+        output = subprocess.run(
+            [
+                sys.executable, __file__, "--child", method,
+                "--workers", str(args.workers), "--documents", str(args.documents),
+            ],
+            env=dict(os.environ, EMBEDDING_MODEL=model, EMBEDDING_DEVICE="cpu"),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        parent, workers = result["parent"], result["workers"]
+        total_pss = parent["pss"] + sum(w["pss"] for w in workers)
+
+        print(f"\n{method}:")
+        print(f"  parent:     RSS {parent['rss']:.0f} MB, USS {parent['uss']:.0f} MB")
+        for i, w in enumerate(workers):
+            print(f"  worker {i}:   RSS {w['rss']:.0f} MB, USS {w['uss']:.0f} MB")
+        print(f"  PSS total:  {total_pss:.0f} MB")
+        print(f"  per worker: {sum(w['uss'] for w in workers) / len(workers):.0f} MB (mean USS)")
+
+
+if __name__ == "__main__":
+    main()
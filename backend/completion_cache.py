@@ -0,0 +1,213 @@
+"""Exact-match completion cache with an on-disk backing store."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, AsyncGenerator
+
+from config import settings
+from models import Message
+
+logger = logging.getLogger(__name__)
+
+
+def completion_key(
+    messages: List[Message],
+    model: str,
+    temperature: float,
+    stream: bool,
+    generation: int,
+) -> str:
+    """
+    Cache key for a completion request.
+
+    The vector store generation is part of the key, so any document upload
+    or deletion makes earlier answers unreachable. Streamed and non-streamed
+    responses have different chunks and are cached apart.
+    """
+    payload = json.dumps(
+        {
+            "messages": [[msg.role, msg.content] for msg in messages],
+            "model": model,
+            "temperature": temperature,
+            "stream": stream,
+            "generation": generation,
+        },
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """
+    LRU of streamed completions, backed by SQLite.
+
+    Entries are the raw SSE data chunks of a completed answer, so a hit can
+    be replayed as the same stream. Memory holds the most recent entries;
+    the disk store keeps more and survives restarts. Entries from older
+    vector store generations are purged when a newer generation is seen;
+    requests still running at an older generation neither read nor store.
+    """
+
+    def __init__(self, path: str = settings.completion_cache_path):
+        """Open (or create) the disk store."""
+        self.path = os.path.abspath(path)
+        self._memory: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self._initialize()
+
+    def _initialize(self):
+        """Create the SQLite store."""
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(
+                """
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS completions (
+                    key TEXT PRIMARY KEY,
+                    generation INTEGER NOT NULL,
+                    chunks TEXT NOT NULL,
+                    last_used REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS completions_last_used ON completions(last_used);
+                """
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+            logger.info(f"✅ Completion cache ready at {self.path} ({count} entries)")
+
+        except Exception as e:
+            logger.error(f"❌ Failed to initialize completion cache: {e}")
+            raise
+
+    def _purge_stale(self, generation: int) -> bool:
+        """
+        Drop entries from older vector store generations.
+
+        Returns:
+            False if ``generation`` itself is older than the newest seen
+        """
+        if self._generation is not None and generation <= self._generation:
+            return generation == self._generation
+        self._memory.clear()
+        removed = self._conn.execute(
+            "DELETE FROM completions WHERE generation < ?", (generation,)
+        ).rowcount
+        self._conn.commit()
+        self._generation = generation
+        if removed:
+            logger.info(f"🧹 Completion cache: dropped {removed} entries from older generations")
+        return True
+
+    def get(self, key: str, generation: int) -> Optional[List[str]]:
+        """
+        Look up a completion.
+
+        Args:
+            key: Key from ``completion_key``
+            generation: Current vector store generation
+
+        Returns:
+            Cached SSE data chunks, or None
+        """
+        try:
+            with self._lock:
+                if not self._purge_stale(generation):
+                    self.misses += 1
+                    return None
+
+                chunks = self._memory.get(key)
+                if chunks is None:
+                    row = self._conn.execute(
+                        "SELECT chunks FROM completions WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None:
+                        chunks = json.loads(row[0])
+                        self._remember(key, chunks)
+                else:
+                    self._memory.move_to_end(key)
+
+                if chunks is None:
+                    self.misses += 1
+                    return None
+
+                self.hits += 1
+                self._conn.execute(
+                    "UPDATE completions SET last_used = ? WHERE key = ?", (time.time(), key)
+                )
+                self._conn.commit()
+                return chunks
+
+        except Exception as e:
+            logger.error(f"❌ Completion cache lookup failed: {e}")
+            raise
+
+    def put(self, key: str, generation: int, chunks: List[str]) -> None:
+        """
+        Store a completed answer.
+
+        Args:
+            key: Key from ``completion_key``
+            generation: Vector store generation the answer was produced at
+            chunks: SSE data chunks of the answer
+        """
+        try:
+            with self._lock:
+                if not self._purge_stale(generation):
+                    # Answered from a store that has changed since
+                    return
+                self._remember(key, chunks)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO completions (key, generation, chunks, last_used) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, generation, json.dumps(chunks, ensure_ascii=False), time.time()),
+                )
+                self._conn.execute(
+                    "DELETE FROM completions WHERE key IN ("
+                    "SELECT key FROM completions ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (settings.completion_cache_disk_entries,),
+                )
+                self._conn.commit()
+
+        except Exception as e:
+            logger.error(f"❌ Failed to store completion: {e}")
+            raise
+
+    def _remember(self, key: str, chunks: List[str]) -> None:
+        """Add an entry to the in-memory LRU."""
+        self._memory[key] = chunks
+        self._memory.move_to_end(key)
+        while len(self._memory) > settings.completion_cache_memory_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and entry counts (blocking: counts the disk store)."""
+        with self._lock:
+            disk_entries = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_entries": len(self._memory),
+            "disk_entries": disk_entries,
+        }
+
+
+async def replay(chunks: List[str], paced: bool = True) -> AsyncGenerator[str, None]:
+    """Yield cached chunks at a steady pace, like a live stream (or at once)."""
+    interval = settings.completion_cache_replay_interval_ms / 1000 if paced else 0
+    for chunk in chunks:
+        yield chunk
+        await asyncio.sleep(interval)
+
+
+# Global completion cache instance (None unless enabled)
+completion_cache = CompletionCache() if settings.completion_cache_enabled else None
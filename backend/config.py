@@ -15,19 +15,105 @@ class Settings(BaseSettings):
     lm_studio_base_url: str = "http://localhost:1234/v1"
     lm_studio_model: str = "google/gemma-3n-e4b"
 
+    # Vector store backend: chroma or local (memory-mapped IVF + SQLite)
+    vector_backend: str = "chroma"
+
     # ChromaDB
     chroma_persist_dir: str = "../chroma_data"
     chroma_collection_name: str = "edgeai_documents"
 
+    # Exact NumPy search for small Chroma collections (0 = always use HNSW)
+    exact_search_max_chunks: int = 20000
+
+    # Local vector store
+    local_vector_dir: str = "../vector_data"
+    local_vector_dtype: str = "float32"  # float32 or float16
+    local_ivf_min_vectors: int = 20000  # exact scan below this size
+    local_ivf_nprobe: int = 16
+    # First-pass search on quantized codes (none, int8 or binary), then exact
+    # rescoring of a shortlist from the memory-mapped full-precision vectors
+    local_vector_quantization: str = "none"
+    local_rescore_factor: int = 0  # shortlist = factor * k (0 = 4 for int8, 16 for binary)
+
+    # Snapshots written by POST /api/documents/compact?snapshot=true and tools/compact_store.py
+    snapshot_dir: str = "../snapshots"
+
+    # Knowledge packs POST /api/documents/import-pack may read (packs outside
+    # it can only be imported by tools/knowledge_pack.py with the server stopped)
+    knowledge_pack_dir: str = "../packs"
+
+    # Store service (multi-worker mode): one process owns the vector store and
+    # embedding model, API workers call it over HTTP; empty URL = in-process
+    store_service_url: str = ""
+    store_service_host: str = "127.0.0.1"
+    store_service_port: int = 8100
+    store_service_timeout: float = 300.0  # seconds (large ingests)
+    store_info_ttl: float = 1.0  # seconds a worker reuses the store state (count, generation)
+
     # Embeddings
     embedding_model: str = "intfloat/multilingual-e5-base"
     embedding_device: str = "cpu"
+    embedding_dtype: str = "float32"  # float32 or float16
+    embedding_batch_token_budget: int = 16384  # padded tokens per ingestion batch
+    embedding_max_batch_size: int = 128
+    # PCA projection to fewer dimensions, fitted by tools/reproject_collection.py
+    # and applied whenever the projection file exists (empty path = next to the store)
+    embedding_projection_dim: int = 256  # target dimension for the tool
+    embedding_projection_path: str = ""
+
+    # Embedding worker pool (bulk ingestion only, 0 = disabled)
+    embedding_pool_workers: int = 0
+    embedding_pool_threads: int = 0
+    embedding_pool_min_documents: int = 256
+    # fork: workers share the loaded model copy-on-write (CPU only, started
+    # with the server); spawn: each worker loads its own replica on first use
+    embedding_pool_start_method: str = "fork"
 
     # RAG
     rag_top_k: int = 3
     rag_similarity_threshold: float = 0.5
+    chunk_mode: str = "chars"  # chars or tokens (embedding tokenizer)
     chunk_size: int = 1000
     chunk_overlap: int = 200
+    chunk_size_tokens: int = 480
+    chunk_overlap_tokens: int = 64
+    structured_chunking: bool = True  # split Markdown by headings, JSON by paths
+
+    # Prompt packing (token budgets for the LLM prompt)
+    prompt_tokenizer: str = ""  # Hugging Face tokenizer of the LLM; empty = approximate
+    prompt_token_budget: int = 6144  # history + context + question
+    rag_context_token_budget: int = 3072  # retrieved context + question
+
+    # Conversation history compaction (older turns replaced by an LLM summary)
+    history_keep_turns: int = 3  # user/assistant turns kept verbatim (0 = disabled)
+    history_summary_max_tokens: int = 400
+    history_summary_cache_size: int = 256  # conversations
+
+    # Prompt layout: default (context in the rewritten last message) or
+    # stable (earlier turns resent byte for byte so the LLM can reuse its KV cache)
+    prompt_layout: str = "default"
+    prompt_layout_cache_size: int = 256  # conversations
+
+    # Completion cache (opt-in): replays answers to identical final prompts
+    completion_cache_enabled: bool = False
+    completion_cache_path: str = "../cache_data/completions.sqlite3"
+    completion_cache_memory_entries: int = 128
+    completion_cache_disk_entries: int = 2000
+    completion_cache_replay_interval_ms: float = 20.0  # delay between replayed chunks
+
+    # VOICEVOX (sentence-pipelined TTS)
+    voicevox_base_url: str = "http://localhost:50021"
+    voicevox_speaker_id: int = 1
+    tts_max_concurrency: int = 2  # sentences synthesized at once
+    tts_cache_dir: str = "../cache_data/tts"
+
+    # Warm answer cache (opt-in): canonical prompts answered ahead of time and
+    # served to first-turn questions whose embedding is close enough
+    warm_cache_enabled: bool = False
+    warm_cache_path: str = "../cache_data/warm_answers.sqlite3"
+    warm_prompts_path: str = "warm_prompts.txt"  # .txt (one per line), .json or .md (fenced blocks)
+    warm_cache_similarity: float = 0.95  # minimum cosine similarity to a canonical prompt
+    warm_cache_audio: bool = True  # also synthesize the answers with VOICEVOX during warm-up
 
     # CORS
     cors_origins: str = "http://localhost:3000,https://localhost:3000"
@@ -0,0 +1,284 @@
+"""Token-budgeted packing of RAG context and chat history into the prompt."""
+
+import logging
+import math
+import re
+from typing import List, Dict, Any, Optional, Tuple
+
+from config import settings
+from models import Message
+from llm import create_rag_prompt
+
+logger = logging.getLogger(__name__)
+
+# Rough per-message cost of the chat template (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Shortest suffix/prefix match treated as chunk overlap rather than chance
+MIN_OVERLAP_CHARS = 8
+
+# Passages are only truncated to fit if at least this many tokens remain
+MIN_PASSAGE_TOKENS = 64
+
+_ASCII_PATTERN = re.compile(r"[\x00-\x7f]+")
+
+
+def approximate_tokens(text: str) -> int:
+    """
+    Estimate the token count of text without a tokenizer.
+
+    Non-ASCII characters (Japanese) count as one token each and ASCII runs
+    as one token per four characters, which errs on the high side for the
+    SentencePiece vocabularies of local chat models.
+    """
+    ascii_chars = sum(len(run) for run in _ASCII_PATTERN.findall(text))
+    return (len(text) - ascii_chars) + math.ceil(ascii_chars / 4)
+
+
+class TokenCounter:
+    """Count prompt tokens with the LLM's tokenizer or an approximation."""
+
+    def __init__(self, tokenizer_name: str = ""):
+        """
+        Initialize the counter.
+
+        Args:
+            tokenizer_name: Hugging Face tokenizer name or path; empty for
+                the approximation
+        """
+        self.tokenizer = None
+        if tokenizer_name:
+            try:
+                from transformers import AutoTokenizer
+
+                self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+                logger.info(f"✅ Prompt tokenizer loaded: {tokenizer_name}")
+            except Exception as e:
+                logger.warning(
+                    f"⚠️  Could not load prompt tokenizer '{tokenizer_name}' ({e}), "
+                    f"using approximate token counts"
+                )
+
+    def count(self, text: str) -> int:
+        """Count the tokens in text."""
+        if self.tokenizer is None:
+            return approximate_tokens(text)
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+    def count_messages(self, messages: List[Message]) -> int:
+        """Count the tokens of a message list, including template overhead."""
+        return sum(self.count(msg.content) + MESSAGE_OVERHEAD_TOKENS for msg in messages)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut text to the longest prefix within ``max_tokens``."""
+        if self.count(text) <= max_tokens:
+            return text
+        low, high = 0, len(text)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self.count(text[:mid]) <= max_tokens:
+                low = mid
+            else:
+                high = mid - 1
+        return text[:low]
+
+
+def merge_overlapping(first: str, second: str) -> str:
+    """
+    Join two consecutive chunks, dropping the text they share.
+
+    Chunks are cut with ``chunk_overlap``, so the end of one chunk repeats
+    at the start of the next.
+    """
+    for size in range(min(len(first), len(second)), MIN_OVERLAP_CHARS - 1, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+    return f"{first}\n{second}"
+
+
+def merge_context(context: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Deduplicate context items and merge adjacent chunks of the same section.
+
+    Args:
+        context: Context items (content, metadata, score), best first
+
+    Returns:
+        Merged passages ordered by their best score; each keeps the metadata
+        of its first chunk and the best score of its members
+    """
+    seen = set()
+    groups: Dict[Tuple[Any, Any], List[Dict[str, Any]]] = {}
+    for item in context:
+        if item["content"] in seen:
+            continue
+        seen.add(item["content"])
+        metadata = item.get("metadata", {})
+        key = (metadata.get("filename"), metadata.get("section_path"))
+        groups.setdefault(key, []).append(item)
+
+    passages = []
+    for items in groups.values():
+        items.sort(key=lambda item: item.get("metadata", {}).get("chunk_index", -1))
+        run = [items[0]]
+        for item in items[1:]:
+            previous = run[-1].get("metadata", {}).get("chunk_index")
+            current = item.get("metadata", {}).get("chunk_index")
+            if previous is not None and current == previous + 1:
+                run.append(item)
+            else:
+                passages.append(_merge_run(run))
+                run = [item]
+        passages.append(_merge_run(run))
+
+    passages.sort(key=lambda item: item["score"], reverse=True)
+    return passages
+
+
+def _merge_run(run: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge a run of consecutive chunks into one passage."""
+    content = run[0]["content"]
+    for item in run[1:]:
+        content = merge_overlapping(content, item["content"])
+    return {
+        "content": content,
+        "metadata": run[0].get("metadata", {}),
+        "score": max(item["score"] for item in run),
+    }
+
+
+class PackedPrompt:
+    """Messages ready to send to the LLM, with token accounting."""
+
+    def __init__(
+        self,
+        messages: List[Message],
+        context: List[Dict[str, Any]],
+        prompt_tokens: int,
+        tokens_saved: int,
+    ):
+        self.messages = messages
+        self.context = context
+        self.prompt_tokens = prompt_tokens
+        self.tokens_saved = tokens_saved
+
+
+class ContextPacker:
+    """
+    Fit retrieved context and chat history into a prompt token budget.
+
+    Context is merged and deduplicated, then passages are added best first
+    up to ``rag_context_token_budget`` (the last one truncated to fit).
+    History fills what is left of ``prompt_token_budget``, newest turns
+    first; system messages and the latest user message are always kept.
+    """
+
+    def __init__(self, counter: Optional[TokenCounter] = None):
+        """Initialize the packer."""
+        self.counter = counter or TokenCounter(settings.prompt_tokenizer)
+
+    def pack_context(self, context: List[Dict[str, Any]], question: str) -> List[Dict[str, Any]]:
+        """
+        Merge, deduplicate and budget retrieved context.
+
+        Args:
+            context: Retrieved context items, best first
+            question: The user's latest question
+
+        Returns:
+            Passages that fit ``rag_context_token_budget``, best first
+        """
+        count = self.counter.count
+        packed_context = []
+        if not context:
+            return packed_context
+
+        context_budget = settings.rag_context_token_budget
+        # Template and question, with one empty reference
+        used = count(create_rag_prompt([{"content": ""}], question))
+        for passage in merge_context(context):
+            tokens = count(passage["content"]) + MESSAGE_OVERHEAD_TOKENS
+            if used + tokens > context_budget:
+                room = context_budget - used - MESSAGE_OVERHEAD_TOKENS
+                if room < MIN_PASSAGE_TOKENS:
+                    continue
+                content = self.counter.truncate(passage["content"], room)
+                passage = {**passage, "content": content}
+                tokens = count(content) + MESSAGE_OVERHEAD_TOKENS
+            packed_context.append(passage)
+            used += tokens
+
+        return packed_context
+
+    def unpacked_tokens(
+        self,
+        messages: List[Message],
+        context: List[Dict[str, Any]],
+        question: str,
+    ) -> int:
+        """Tokens the prompt would cost with full context and history."""
+        latest = messages[-1]
+        if context:
+            latest = Message(role="user", content=create_rag_prompt(context, question))
+        return self.counter.count_messages(list(messages[:-1]) + [latest])
+
+    def pack(
+        self,
+        messages: List[Message],
+        context: List[Dict[str, Any]],
+        question: str,
+    ) -> PackedPrompt:
+        """
+        Build the message list for a (RAG) chat completion.
+
+        Args:
+            messages: Conversation history ending with the user's message
+            context: Retrieved context items, best first
+            question: The user's latest question
+
+        Returns:
+            Packed prompt with the messages to send and tokens saved
+        """
+        try:
+            packed_context = self.pack_context(context, question)
+
+            latest = messages[-1]
+            if packed_context:
+                latest = Message(role="user", content=create_rag_prompt(packed_context, question))
+
+            system = [msg for msg in messages[:-1] if msg.role == "system"]
+            history = [msg for msg in messages[:-1] if msg.role != "system"]
+
+            remaining = (
+                settings.prompt_token_budget
+                - self.counter.count_messages(system)
+                - self.counter.count_messages([latest])
+            )
+            kept: List[Message] = []
+            for msg in reversed(history):
+                tokens = self.counter.count_messages([msg])
+                if tokens > remaining:
+                    break
+                kept.append(msg)
+                remaining -= tokens
+            kept.reverse()
+
+            packed_messages = system + kept + [latest]
+            prompt_tokens = self.counter.count_messages(packed_messages)
+            tokens_saved = max(self.unpacked_tokens(messages, context, question) - prompt_tokens, 0)
+
+            logger.info(
+                f"📐 Prompt packed: {prompt_tokens} tokens "
+                f"({len(packed_context)}/{len(context)} passages/chunks, "
+                f"{len(kept)}/{len(history)} history messages, saved {tokens_saved})"
+            )
+
+            return PackedPrompt(packed_messages, packed_context, prompt_tokens, tokens_saved)
+
+        except Exception as e:
+            logger.error(f"❌ Failed to pack prompt: {e}")
+            raise
+
+
+# Global context packer instance
+context_packer = ContextPacker()
@@ -0,0 +1,324 @@
+"""Multi-process embedding worker pool for bulk document ingestion."""
+
+import gc
+import itertools
+import logging
+import multiprocessing as mp
+import os
+import queue
+import threading
+from multiprocessing import shared_memory
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _worker_main(
+    model_name: str,
+    device: str,
+    num_threads: int,
+    task_queue,
+    result_queue,
+) -> None:
+    """
+    Worker process entry point (spawn).
+
+    Loads one model replica with a pinned thread count and encodes batches
+    from the task queue, writing vectors straight into shared memory.
+    """
+    # Pin thread pools before torch is imported in this process
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(num_threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(num_threads)
+    torch.set_num_interop_threads(1)
+
+    try:
+        model = SentenceTransformer(model_name, device=device)
+    except Exception as e:
+        result_queue.put(("error", None, repr(e)))
+        return
+
+    _serve(model, task_queue, result_queue)
+
+
+def _forked_worker_main(model, num_threads: int, task_queue, result_queue) -> None:
+    """
+    Worker process entry point (fork).
+
+    Uses the model loaded by the parent: its weights and the interpreter's
+    heap stay shared copy-on-write instead of being loaded again.
+    """
+    import torch
+
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    gc.enable()
+    torch.set_num_threads(num_threads)
+
+    _serve(model, task_queue, result_queue)
+
+
+def _serve(model, task_queue, result_queue) -> None:
+    """Report ready, then encode batches until the stop sentinel."""
+    result_queue.put(("ready", os.getpid(), None))
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        task_id, shm_name, shape, indices, texts = task
+        try:
+            embeddings = model.encode(
+                texts,
+                batch_size=len(texts),
+                convert_to_numpy=True,
+                show_progress_bar=False,
+                normalize_embeddings=True,
+            )
+
+            shm = shared_memory.SharedMemory(name=shm_name)
+            try:
+                out = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+                out[indices] = embeddings
+                del out
+            finally:
+                shm.close()
+
+            result_queue.put(("done", task_id, None))
+
+        except Exception as e:
+            result_queue.put(("error", task_id, repr(e)))
+
+
+class EmbeddingWorkerPool:
+    """
+    Pool of model replicas in separate processes for ingestion throughput.
+
+    Batches (index arrays into the input, typically length-bucketed) are
+    sharded across workers through a shared task queue, and the resulting
+    vectors are written into a shared-memory block instead of being pickled
+    back to the parent process.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        device: str,
+        embedding_dim: int,
+        num_workers: int,
+        threads_per_worker: int = 0,
+        model=None,
+    ):
+        """
+        Initialize the worker pool (processes are started lazily).
+
+        Args:
+            model_name: Sentence Transformers model name
+            device: Device for each replica
+            embedding_dim: Embedding dimension of the model
+            num_workers: Number of worker processes
+            threads_per_worker: Torch threads per worker (0 = split CPUs evenly)
+            model: Loaded model to fork the workers from instead of loading
+                a replica in each; the pool must then be started before the
+                parent runs any inference (torch's OpenMP threads do not
+                survive fork), so a restart after a failure spawns fresh
+                replicas instead
+        """
+        self.model_name = model_name
+        self.model = model
+        self.device = device
+        self.embedding_dim = embedding_dim
+        self.num_workers = num_workers
+        self.threads_per_worker = threads_per_worker or max(
+            1, (os.cpu_count() or 1) // num_workers
+        )
+
+        self._ctx = mp.get_context("spawn" if model is None else "fork")
+        self._task_queue = None
+        self._result_queue = None
+        self._processes: List[mp.Process] = []
+        self._lock = threading.Lock()
+        # Tags the tasks of each encode() call, so late results of a failed
+        # call are never taken for the next call's
+        self._calls = itertools.count()
+
+    @property
+    def started(self) -> bool:
+        """Whether the worker processes are running."""
+        return bool(self._processes)
+
+    def start(self, timeout: float = 600.0) -> None:
+        """Start worker processes and wait until every replica is loaded."""
+        if self.started:
+            return
+
+        if self._ctx.get_start_method() == "fork" and self._task_queue is not None:
+            # The parent has run inference since the first fork
+            logger.warning("⚠️  Restarting the embedding worker pool with spawn instead of fork")
+            self.model = None
+            self._ctx = mp.get_context("spawn")
+
+        logger.info(
+            f"🔄 Starting embedding worker pool "
+            f"({self.num_workers} workers x {self.threads_per_worker} threads)"
+        )
+
+        self._task_queue = self._ctx.Queue()
+        self._result_queue = self._ctx.Queue()
+
+        if self.model is None:
+            target = _worker_main
+            args = (self.model_name, self.device, self.threads_per_worker)
+        else:
+            # Keep the collector from touching (and so copying) shared pages
+            gc.freeze()
+            target = _forked_worker_main
+            args = (self.model, self.threads_per_worker)
+
+        try:
+            for _ in range(self.num_workers):
+                process = self._ctx.Process(
+                    target=target,
+                    args=args + (self._task_queue, self._result_queue),
+                    daemon=True,
+                )
+                process.start()
+                self._processes.append(process)
+        finally:
+            if self.model is not None:
+                gc.unfreeze()
+
+        ready = 0
+        while ready < self.num_workers:
+            try:
+                status, _, error = self._result_queue.get(timeout=timeout)
+            except queue.Empty:
+                self.close()
+                raise RuntimeError("Timed out waiting for embedding workers")
+
+            if status == "error":
+                self.close()
+                raise RuntimeError(f"Embedding worker failed to start: {error}")
+            ready += 1
+
+        logger.info(f"✅ Embedding worker pool ready ({self.num_workers} workers)")
+
+    def encode(self, texts: List[str], batches: List[np.ndarray]) -> np.ndarray:
+        """
+        Encode texts across the worker pool.
+
+        Args:
+            texts: List of already-prefixed texts to encode
+            batches: Index arrays covering every text exactly once
+
+        Returns:
+            Normalized float32 array of shape (len(texts), embedding_dim)
+        """
+        if not texts:
+            return np.empty((0, self.embedding_dim), dtype=np.float32)
+
+        with self._lock:
+            self.start()
+
+            shape = (len(texts), self.embedding_dim)
+            shm = shared_memory.SharedMemory(
+                create=True,
+                size=int(np.prod(shape)) * np.dtype(np.float32).itemsize,
+            )
+            try:
+                call = next(self._calls)
+                pending = set()
+                for task_id, indices in enumerate(batches):
+                    batch = [texts[i] for i in indices]
+                    self._task_queue.put(((call, task_id), shm.name, shape, indices, batch))
+                    pending.add((call, task_id))
+
+                # Wait for every task, even after an error: queued tasks
+                # must not find the shared memory unlinked
+                errors = []
+                while pending:
+                    status, task_id, error = self._get_result()
+                    if task_id not in pending:
+                        continue
+                    if status == "error":
+                        errors.append(error)
+                    pending.discard(task_id)
+                if errors:
+                    raise RuntimeError(f"Embedding worker error: {errors[0]}")
+
+                out = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+                result = out.copy()
+                del out
+                return result
+
+            finally:
+                shm.close()
+                shm.unlink()
+
+    def _get_result(self):
+        """Wait for the next worker result, failing fast if a worker died."""
+        while True:
+            try:
+                return self._result_queue.get(timeout=1.0)
+            except queue.Empty:
+                dead = [p.pid for p in self._processes if not p.is_alive()]
+                if dead:
+                    self.close()
+                    raise RuntimeError(f"Embedding worker(s) exited: {dead}")
+
+    def close(self) -> None:
+        """Stop all worker processes."""
+        if not self._processes:
+            return
+
+        for _ in self._processes:
+            self._task_queue.put(None)
+
+        for process in self._processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+
+        self._processes = []
+        logger.info("👋 Embedding worker pool stopped")
+
+
+def create_worker_pool(
+    model_name: str,
+    device: str,
+    embedding_dim: int,
+    model=None,
+) -> Optional[EmbeddingWorkerPool]:
+    """
+    Create the ingestion worker pool from settings.
+
+    Args:
+        model_name: Sentence Transformers model name
+        device: Device for each replica
+        embedding_dim: Embedding dimension of the model
+        model: The loaded model, forked into the workers when
+            ``embedding_pool_start_method`` is fork (CPU only)
+
+    Returns:
+        Worker pool, or None when the pool is disabled
+    """
+    from config import settings
+
+    if settings.embedding_pool_workers <= 0:
+        return None
+
+    return EmbeddingWorkerPool(
+        model_name=model_name,
+        device=device,
+        embedding_dim=embedding_dim,
+        num_workers=settings.embedding_pool_workers,
+        threads_per_worker=settings.embedding_pool_threads,
+        model=model if settings.embedding_pool_start_method == "fork" and device == "cpu" else None,
+    )
@@ -1,25 +1,66 @@
 """Text embedding generation using Sentence Transformers."""
 
 import logging
-from typing import List
-from sentence_transformers import SentenceTransformer
+from typing import List, Sequence
+import numpy as np
 
 from config import settings
+from embedding_pool import create_worker_pool
+from projection import load_projection
 
 logger = logging.getLogger(__name__)
 
 
+def build_token_batches(
+    lengths: Sequence[int],
+    token_budget: int,
+    max_batch_size: int,
+) -> List[np.ndarray]:
+    """
+    Group texts into length-sorted batches under a padded-token budget.
+
+    Texts are sorted longest first, so each batch is padded to the length of
+    its first member and ``batch_len * max_len`` never exceeds the budget
+    (a single over-budget text still gets its own batch).
+
+    Args:
+        lengths: Token length of each text
+        token_budget: Maximum padded tokens per batch
+        max_batch_size: Maximum number of texts per batch
+
+    Returns:
+        List of index arrays into the original sequence
+    """
+    order = np.argsort(-np.asarray(lengths, dtype=np.int64), kind="stable")
+
+    batches = []
+    start = 0
+    while start < len(order):
+        max_len = max(int(lengths[order[start]]), 1)
+        size = max(1, min(max_batch_size, token_budget // max_len))
+        batches.append(order[start:start + size])
+        start += size
+
+    return batches
+
+
 class EmbeddingModel:
     """Wrapper for Sentence Transformers embedding model."""
 
     def __init__(self):
         """Initialize the embedding model."""
         self.model = None
+        self.worker_pool = None
+        self.projection = None
+        self.dtype = np.dtype(settings.embedding_dtype)
         self._load_model()
 
     def _load_model(self):
         """Load the Sentence Transformers model."""
         try:
+            # Imported here so API workers using the store service skip torch
+            from sentence_transformers import SentenceTransformer
+
             logger.info(f"🔄 Loading embedding model: {settings.embedding_model}")
 
             self.model = SentenceTransformer(
@@ -27,8 +68,23 @@ class EmbeddingModel:
                 device=settings.embedding_device,
             )
 
-            # Get embedding dimension
-            self.embedding_dim = self.model.get_sentence_embedding_dimension()
+            # Get embedding dimension (after the projection, if one is fitted)
+            self.native_dim = self.model.get_sentence_embedding_dimension()
+            self.projection = load_projection(settings.embedding_model, self.native_dim)
+            self.embedding_dim = (
+                self.projection.output_dim if self.projection is not None else self.native_dim
+            )
+
+            # Worker pool for bulk ingestion (spawned workers start on first use)
+            self.worker_pool = create_worker_pool(
+                model_name=settings.embedding_model,
+                device=settings.embedding_device,
+                embedding_dim=self.native_dim,
+                model=self.model,
+            )
+            # Forked workers must start before this process runs inference
+            if self.worker_pool is not None and self.worker_pool.model is not None:
+                self.worker_pool.start()
 
             logger.info(
                 f"✅ Embedding model loaded successfully "
@@ -39,7 +95,7 @@ class EmbeddingModel:
             logger.error(f"❌ Failed to load embedding model: {e}")
             raise
 
-    def encode(self, texts: List[str], show_progress: bool = False) -> List[List[float]]:
+    def encode(self, texts: List[str], show_progress: bool = False) -> np.ndarray:
         """
         Encode texts to embedding vectors.
 
@@ -48,7 +104,7 @@ class EmbeddingModel:
             show_progress: Whether to show progress bar
 
         Returns:
-            List of embedding vectors
+            Contiguous array of shape (len(texts), embedding_dim)
         """
         try:
             logger.debug(f"🔢 Encoding {len(texts)} texts...")
@@ -60,17 +116,20 @@ class EmbeddingModel:
                 normalize_embeddings=True,  # Normalize for cosine similarity
             )
 
-            # Convert to list of lists
-            embeddings_list = embeddings.tolist()
+            if self.projection is not None:
+                embeddings = self.projection.apply(embeddings)
+
+            # Keep a contiguous array instead of per-element Python floats
+            embeddings = np.ascontiguousarray(embeddings, dtype=self.dtype)
 
             logger.debug(f"✅ Encoded {len(texts)} texts to embeddings")
-            return embeddings_list
+            return embeddings
 
         except Exception as e:
             logger.error(f"❌ Failed to encode texts: {e}")
             raise
 
-    def encode_query(self, query: str) -> List[float]:
+    def encode_query(self, query: str) -> np.ndarray:
         """
         Encode a single query text.
 
@@ -78,41 +137,138 @@ class EmbeddingModel:
             query: Query text to encode
 
         Returns:
-            Embedding vector
+            Embedding vector of shape (embedding_dim,)
+        """
+        return self.encode_queries([query])[0]
+
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Encode query texts in one model call.
+
+        Args:
+            queries: Query texts to encode
+
+        Returns:
+            Array of shape (len(queries), embedding_dim)
         """
         try:
             # For E5 models, add "query: " prefix for better retrieval
             if "e5" in settings.embedding_model.lower():
-                query = f"query: {query}"
+                queries = [f"query: {query}" for query in queries]
 
-            embeddings = self.encode([query], show_progress=False)
-            return embeddings[0]
+            return self.encode(queries, show_progress=False)
 
         except Exception as e:
             logger.error(f"❌ Failed to encode query: {e}")
             raise
 
-    def encode_documents(self, documents: List[str]) -> List[List[float]]:
+    def encode_documents(self, documents: List[str], project: bool = True) -> np.ndarray:
         """
         Encode documents for indexing.
 
         Args:
             documents: List of document texts
+            project: Apply the fitted projection (False for native vectors)
 
         Returns:
-            List of embedding vectors
+            Contiguous array of shape (len(documents), embedding_dim), or
+            (len(documents), native_dim) without the projection
         """
+        embeddings = self._encode_documents(documents)
+        if project and self.projection is not None:
+            embeddings = self.projection.apply(embeddings).astype(self.dtype)
+        return embeddings
+
+    def _encode_documents(self, documents: List[str]) -> np.ndarray:
+        """Encode documents to native (unprojected) embeddings."""
         try:
             # For E5 models, add "passage: " prefix for documents
             if "e5" in settings.embedding_model.lower():
                 documents = [f"passage: {doc}" for doc in documents]
 
-            return self.encode(documents, show_progress=True)
+            # Large ingests are sharded across the worker pool. Each task is
+            # padded to its longest text, so tasks are bucketed by token length
+            if (
+                self.worker_pool is not None
+                and len(documents) >= settings.embedding_pool_min_documents
+            ):
+                logger.info(
+                    f"🔢 Encoding {len(documents)} documents on "
+                    f"{self.worker_pool.num_workers} workers..."
+                )
+                batches = build_token_batches(
+                    self.token_lengths(documents),
+                    token_budget=settings.embedding_batch_token_budget,
+                    max_batch_size=settings.embedding_max_batch_size,
+                )
+                return self.worker_pool.encode(documents, batches).astype(
+                    self.dtype, copy=False
+                )
+
+            # In process, SentenceTransformer already sorts one call's texts by length
+            embeddings = self.model.encode(
+                documents,
+                convert_to_numpy=True,
+                show_progress_bar=True,
+                normalize_embeddings=True,
+            )
+            return np.ascontiguousarray(embeddings, dtype=self.dtype)
 
         except Exception as e:
             logger.error(f"❌ Failed to encode documents: {e}")
             raise
 
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        """
+        Count tokens per text as the model will see them.
+
+        Args:
+            texts: List of texts (already prefixed)
+
+        Returns:
+            Token count per text, capped at the model's max sequence length
+        """
+        encoded = self.tokenizer(
+            texts,
+            add_special_tokens=True,
+            truncation=True,
+            max_length=self.model.max_seq_length,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+            return_length=True,
+        )
+        return encoded["length"]
+
+    @property
+    def tokenizer(self):
+        """The model's Hugging Face tokenizer."""
+        return self.model.tokenizer
+
+    def max_document_tokens(self) -> int:
+        """
+        Maximum chunk length in tokens that the model reads without truncation.
+
+        Accounts for special tokens and the "passage: " prefix added for E5.
+        """
+        prefix = "passage: " if "e5" in settings.embedding_model.lower() else ""
+        overhead = len(self.tokenizer(prefix, add_special_tokens=True)["input_ids"])
+        return self.model.max_seq_length - overhead
+
+    def close(self) -> None:
+        """Stop the ingestion worker pool if it is running."""
+        if self.worker_pool is not None:
+            self.worker_pool.close()
+
+
+def create_embedding_model():
+    """Create the local model, or a client for the store service if configured."""
+    if settings.store_service_url:
+        from store_client import RemoteEmbeddingModel
+
+        return RemoteEmbeddingModel(settings.store_service_url)
+
+    return EmbeddingModel()
+
 
 # Global embedding model instance
-embedding_model = EmbeddingModel()
+embedding_model = create_embedding_model()
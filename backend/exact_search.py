@@ -0,0 +1,159 @@
+"""Exact brute-force NumPy search over an in-memory mirror of the collection."""
+
+import logging
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def supports_where(where: Optional[Dict[str, Any]]) -> bool:
+    """Whether a filter only uses the equality checks ``matches_where`` handles."""
+    if not where:
+        return True
+    return all(
+        not key.startswith("$") and (not isinstance(value, dict) or set(value) == {"$eq"})
+        for key, value in where.items()
+    )
+
+
+def matches_where(metadata: Dict[str, Any], where: Dict[str, Any]) -> bool:
+    """Check a metadata dict against a simple equality filter (see ``supports_where``)."""
+    for key, value in where.items():
+        if isinstance(value, dict):
+            if set(value) != {"$eq"}:
+                raise ValueError(f"Unsupported filter operator: {value}")
+            value = value["$eq"]
+        if metadata.get(key) != value:
+            return False
+    return True
+
+
+class _Snapshot:
+    """Immutable view of the mirrored collection."""
+
+    def __init__(
+        self,
+        ids: List[str],
+        matrix: np.ndarray,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+    ):
+        self.ids = ids
+        self.matrix = matrix
+        self.documents = documents
+        self.metadatas = metadatas
+
+
+class ExactSearchIndex:
+    """
+    Normalized float32 matrix mirrored from the vector store.
+
+    Top-k is one matrix product plus ``argpartition``, so results are exact
+    and a batch of queries costs a single BLAS call. Writers replace the
+    snapshot (copy-on-write), so searches never take a lock.
+    """
+
+    def __init__(self, dim: Optional[int] = None):
+        """Initialize an empty index."""
+        self.dim = dim
+        self._snapshot = _Snapshot([], np.empty((0, dim or 0), dtype=np.float32), [], [])
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._snapshot.ids)
+
+    def add(
+        self,
+        ids: List[str],
+        documents: List[str],
+        embeddings: np.ndarray,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """Append rows to the mirror."""
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.maximum(norms, 1e-12)
+
+        with self._lock:
+            current = self._snapshot
+            matrix = vectors if not len(current.ids) else np.vstack([current.matrix, vectors])
+            self.dim = matrix.shape[1]
+            self._snapshot = _Snapshot(
+                current.ids + list(ids),
+                np.ascontiguousarray(matrix),
+                current.documents + list(documents),
+                current.metadatas + list(metadatas or [{} for _ in ids]),
+            )
+
+    def delete(self, ids: List[str]) -> None:
+        """Remove rows by id."""
+        removed = set(ids)
+        with self._lock:
+            current = self._snapshot
+            keep = [i for i, doc_id in enumerate(current.ids) if doc_id not in removed]
+            if len(keep) == len(current.ids):
+                return
+            self._snapshot = _Snapshot(
+                [current.ids[i] for i in keep],
+                current.matrix[keep],
+                [current.documents[i] for i in keep],
+                [current.metadatas[i] for i in keep],
+            )
+
+    def clear(self) -> None:
+        """Remove all rows."""
+        with self._lock:
+            self._snapshot = _Snapshot([], np.empty((0, self.dim or 0), dtype=np.float32), [], [])
+
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int,
+        where: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[_Snapshot, List[Tuple[np.ndarray, np.ndarray]]]:
+        """
+        Exact top-k search for a batch of queries.
+
+        Args:
+            queries: Query matrix of shape (n_queries, dim)
+            k: Number of results per query
+            where: Optional equality metadata filter
+
+        Returns:
+            The snapshot searched and, per query, (row indices, cosine scores)
+            sorted best first
+        """
+        snapshot = self._snapshot
+        matrix = snapshot.matrix
+        rows = None
+
+        if where:
+            rows = np.fromiter(
+                (i for i, meta in enumerate(snapshot.metadatas) if matches_where(meta, where)),
+                dtype=np.int64,
+            )
+            matrix = matrix[rows]
+
+        if not len(matrix):
+            empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+            return snapshot, [empty for _ in queries]
+
+        scores = np.asarray(queries, dtype=np.float32) @ matrix.T
+        k = min(k, scores.shape[1])
+
+        if k < scores.shape[1]:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+
+        results = []
+        for qi in range(len(scores)):
+            candidates = top[qi]
+            order = np.argsort(-scores[qi, candidates], kind="stable")
+            best = candidates[order]
+            results.append((best if rows is None else rows[best], scores[qi, best]))
+
+        return snapshot, results
@@ -0,0 +1,205 @@
+"""Conversation history compaction with background LLM summaries."""
+
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple
+
+from config import settings
+from models import Message
+from llm import llm_client
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_INSTRUCTIONS = (
+    "あなたは会話の要約を作成するアシスタントです。"
+    "以下の会話から、今後の応答に必要な事実・決定事項・ユーザーの要望や関心を残し、"
+    "日本語で簡潔に要約してください。前置きや説明は不要です。"
+)
+SUMMARY_HEADER = "これまでの会話の要約:"
+
+ROLE_LABELS = {"user": "ユーザー", "assistant": "アシスタント"}
+
+# Unsummarized older messages needed before another summary is requested
+SUMMARY_MIN_NEW_MESSAGES = 4
+
+
+def conversation_key(conversation_id: Optional[str], messages: List[Message]) -> str:
+    """
+    Key under which a conversation's summary is cached.
+
+    Clients that do not send a conversation id are keyed by their first
+    user message, which stays the same for the whole conversation.
+    """
+    if conversation_id:
+        return conversation_id
+    first = next((msg.content for msg in messages if msg.role == "user"), "")
+    return "anon:" + hashlib.sha256(first.encode("utf-8")).hexdigest()[:16]
+
+
+def transcript_fingerprint(messages: List[Message]) -> str:
+    """Hash of message roles and contents."""
+    digest = hashlib.sha256()
+    for msg in messages:
+        digest.update(f"{msg.role}\0{msg.content}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class _Summary:
+    """Summary of the first ``covered`` older messages of a conversation."""
+
+    def __init__(self, covered: int, fingerprint: str, text: str):
+        self.covered = covered
+        self.fingerprint = fingerprint
+        self.text = text
+
+
+class HistoryManager:
+    """
+    Keep the last turns verbatim and replace older ones with a summary.
+
+    Summaries are produced by the local LLM in a background task after a
+    response has finished streaming, so no request ever waits on one.
+    Until a summary is ready (or for turns newer than it) the messages are
+    sent verbatim; the prompt then shrinks back on the next turn.
+    """
+
+    def __init__(self, llm=llm_client):
+        """Initialize with the LLM client used for summaries."""
+        self.llm = llm
+        self._summaries: "OrderedDict[str, _Summary]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Task] = {}
+
+    def _split(self, messages: List[Message]) -> Tuple[List[Message], List[Message], List[Message]]:
+        """Split messages into (system, older, recent)."""
+        system = [msg for msg in messages if msg.role == "system"]
+        dialogue = [msg for msg in messages if msg.role != "system"]
+        keep = 2 * settings.history_keep_turns + 1  # turns plus the new question
+        if len(dialogue) <= keep:
+            return system, [], dialogue
+        return system, dialogue[:-keep], dialogue[-keep:]
+
+    def _lookup(self, key: str, older: List[Message]) -> Optional[_Summary]:
+        """Return the cached summary if it still matches the conversation."""
+        summary = self._summaries.get(key)
+        if summary is None or summary.covered > len(older):
+            return None
+        if transcript_fingerprint(older[:summary.covered]) != summary.fingerprint:
+            return None
+        self._summaries.move_to_end(key)
+        return summary
+
+    def compact(self, conversation_id: Optional[str], messages: List[Message]) -> List[Message]:
+        """
+        Replace summarized turns with their cached summary.
+
+        Args:
+            conversation_id: Client conversation ID (optional)
+            messages: Full conversation ending with the user's message
+
+        Returns:
+            System messages, the summary, unsummarized older turns and the
+            recent turns
+        """
+        if settings.history_keep_turns <= 0:
+            return list(messages)
+
+        system, older, recent = self._split(messages)
+        summary = self._lookup(conversation_key(conversation_id, messages), older) if older else None
+        replaced_chars = sum(len(msg.content) for msg in older[:summary.covered]) if summary else 0
+        if summary is None or len(summary.text) >= replaced_chars:
+            return list(messages)
+
+        logger.info(
+            f"🗜️  History compacted: {summary.covered} messages summarized, "
+            f"{len(older) - summary.covered + len(recent)} verbatim"
+        )
+        return (
+            system
+            + [Message(role="system", content=f"{SUMMARY_HEADER}\n{summary.text}")]
+            + older[summary.covered:]
+            + recent
+        )
+
+    def summary_for(
+        self,
+        conversation_id: Optional[str],
+        messages: List[Message],
+    ) -> Optional[Tuple[int, str]]:
+        """
+        Return the cached summary of a conversation, if still valid.
+
+        Returns:
+            The number of leading dialogue (non-system) messages the summary
+            covers, and its text
+        """
+        _, older, _ = self._split(messages)
+        if not older:
+            return None
+        summary = self._lookup(conversation_key(conversation_id, messages), older)
+        return (summary.covered, summary.text) if summary else None
+
+    def schedule_summary(self, conversation_id: Optional[str], messages: List[Message]) -> None:
+        """
+        Summarize older turns in the background if the summary is behind.
+
+        Args:
+            conversation_id: Client conversation ID (optional)
+            messages: Full conversation as sent by the client
+        """
+        if settings.history_keep_turns <= 0:
+            return
+
+        _, older, _ = self._split(messages)
+        if not older:
+            return
+
+        key = conversation_key(conversation_id, messages)
+        previous = self._lookup(key, older)
+        covered = previous.covered if previous else 0
+        if len(older) - covered < SUMMARY_MIN_NEW_MESSAGES or key in self._pending:
+            return
+
+        task = asyncio.create_task(self._summarize(key, older, previous))
+        self._pending[key] = task
+        task.add_done_callback(lambda _: self._pending.pop(key, None))
+
+    async def _summarize(
+        self,
+        key: str,
+        older: List[Message],
+        previous: Optional[_Summary],
+    ) -> None:
+        """Extend the running summary with the older turns it does not cover."""
+        try:
+            new_messages = older[previous.covered:] if previous else older
+            transcript = "\n".join(
+                f"{ROLE_LABELS.get(msg.role, msg.role)}: {msg.content}" for msg in new_messages
+            )
+            content = f"会話:\n{transcript}"
+            if previous:
+                content = f"前回までの要約:\n{previous.text}\n\n続きの{content}"
+
+            text = await self.llm.complete(
+                [
+                    Message(role="system", content=SUMMARY_INSTRUCTIONS),
+                    Message(role="user", content=content),
+                ],
+                max_tokens=settings.history_summary_max_tokens,
+            )
+
+            self._summaries[key] = _Summary(len(older), transcript_fingerprint(older), text.strip())
+            self._summaries.move_to_end(key)
+            while len(self._summaries) > settings.history_summary_cache_size:
+                self._summaries.popitem(last=False)
+
+            logger.info(f"🗜️  Summarized {len(older)} messages for conversation {key}")
+
+        except Exception as e:
+            # Background task: the next turn simply sends the history verbatim
+            logger.error(f"❌ Failed to summarize conversation {key}: {e}")
+
+
+# Global history manager instance
+history_manager = HistoryManager()
@@ -0,0 +1,414 @@
+"""Portable knowledge packs: pre-embedded chunks that import without the model.
+
+A pack is a directory with:
+
+- ``manifest.json``: embedding model, vector dimension, projection, chunker
+  settings and the files it contains
+- ``vectors.npy``: float16 embedding matrix, one row per chunk
+- ``chunks.jsonl``: one ``{"id", "document", "metadata"}`` line per chunk,
+  in the same order as the vectors
+- ``projection.npz``: the embedding projection, if the vectors are projected
+
+Export and import both stream: vectors go through a memory-mapped ``.npy``
+and chunks are read line by line, so a pack never has to fit in memory.
+"""
+
+import json
+import logging
+import os
+import shutil
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from config import settings
+from projection import PROJECTION_FILE, Projection, projection_path
+from text_processing import create_document_id
+
+logger = logging.getLogger(__name__)
+
+PACK_FORMAT = "edgeai-knowledge-pack"
+PACK_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.npy"
+CHUNKS_FILE = "chunks.jsonl"
+IMPORT_BATCH = 5000
+
+# Settings that decide how a document is split; recorded so packs can be
+# compared with the chunks this device would produce on upload
+CHUNKER_SETTINGS = [
+    "chunk_mode",
+    "chunk_size",
+    "chunk_overlap",
+    "chunk_size_tokens",
+    "chunk_overlap_tokens",
+    "structured_chunking",
+]
+
+
+def _current_projection() -> Optional[Projection]:
+    """The projection applied on this device (read from disk, no model load)."""
+    path = projection_path()
+    return Projection.load(path) if os.path.exists(path) else None
+
+
+def _store_projection(db) -> Optional[str]:
+    """Fingerprint of the projection the store's vectors are in."""
+    if settings.store_service_url:
+        # The projection file lives on the store service host
+        return db.projection_fingerprint
+    current = _current_projection()
+    return current.fingerprint if current is not None else None
+
+
+def resolve_pack_path(path: str) -> str:
+    """
+    Resolve a pack path given to the server, which only reads packs under
+    ``knowledge_pack_dir``.
+
+    Args:
+        path: Pack directory, absolute or relative to ``knowledge_pack_dir``
+
+    Returns:
+        The absolute pack directory
+
+    Raises:
+        ValueError: If the path is outside ``knowledge_pack_dir``
+    """
+    pack_dir = os.path.realpath(settings.knowledge_pack_dir)
+    resolved = os.path.realpath(os.path.join(pack_dir, path))
+    if os.path.commonpath([pack_dir, resolved]) != pack_dir:
+        raise ValueError(f"Packs are only read from KNOWLEDGE_PACK_DIR ({pack_dir}): {path}")
+    return resolved
+
+
+def _projection_info(projection: Optional[Projection]) -> Optional[Dict[str, Any]]:
+    if projection is None:
+        return None
+    return {
+        "input_dim": projection.input_dim,
+        "output_dim": projection.output_dim,
+        "fingerprint": projection.fingerprint,
+    }
+
+
+def export_pack(
+    db,
+    path: str,
+    filenames: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Write the stored chunks and their embeddings to a knowledge pack.
+
+    Args:
+        db: Vector store with ``iter_chunks`` (Chroma or local store)
+        path: New pack directory
+        filenames: Only export chunks of these files (default: all)
+
+    Returns:
+        The pack manifest
+    """
+    try:
+        path = os.path.abspath(path)
+        if os.path.exists(path):
+            raise ValueError(f"Pack directory already exists: {path}")
+        tmp_path = f"{path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        start = time.perf_counter()
+        capacity = db.count()
+        vectors = None
+        written = 0
+        files: Dict[str, int] = {}
+        wanted = set(filenames) if filenames else None
+
+        with open(os.path.join(tmp_path, CHUNKS_FILE), "w", encoding="utf-8") as f:
+            for chunk in db.iter_chunks():
+                keep = [
+                    i for i, metadata in enumerate(chunk["metadatas"])
+                    if wanted is None or (metadata or {}).get("filename") in wanted
+                ]
+                if not keep:
+                    continue
+                embeddings = chunk["embeddings"][keep]
+                if vectors is None:
+                    vectors = np.lib.format.open_memmap(
+                        os.path.join(tmp_path, VECTORS_FILE),
+                        mode="w+",
+                        dtype=np.float16,
+                        shape=(capacity, embeddings.shape[1]),
+                    )
+                # Chunks added since count() was read are left for the next export
+                keep, embeddings = keep[:capacity - written], embeddings[:capacity - written]
+                vectors[written:written + len(keep)] = embeddings
+                written += len(keep)
+
+                for i in keep:
+                    metadata = chunk["metadatas"][i] or {}
+                    filename = metadata.get("filename", "")
+                    files[filename] = files.get(filename, 0) + 1
+                    f.write(json.dumps(
+                        {"id": chunk["ids"][i], "document": chunk["documents"][i], "metadata": metadata},
+                        ensure_ascii=False,
+                    ) + "\n")
+
+        if vectors is None:
+            raise ValueError("Nothing to export: no matching chunks")
+        dim = vectors.shape[1]
+        vectors.flush()
+        del vectors
+        if written < capacity:
+            _truncate_rows(os.path.join(tmp_path, VECTORS_FILE), written)
+
+        projection = _current_projection()
+        if projection is not None:
+            shutil.copy2(projection_path(), os.path.join(tmp_path, PROJECTION_FILE))
+
+        manifest = {
+            "format": PACK_FORMAT,
+            "version": PACK_VERSION,
+            "embedding_model": settings.embedding_model,
+            "dim": dim,
+            "dtype": "float16",
+            "space": db.space,
+            "projection": _projection_info(projection),
+            "chunker": {name: getattr(settings, name) for name in CHUNKER_SETTINGS},
+            "chunks": written,
+            "files": files,
+            "created": datetime.now().isoformat(timespec="seconds"),
+        }
+        with open(os.path.join(tmp_path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.rename(tmp_path, path)
+
+        logger.info(
+            f"📦 Exported {written} chunks from {len(files)} files to {path} "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
+        return manifest
+
+    except Exception as e:
+        logger.error(f"❌ Failed to export knowledge pack: {e}")
+        raise
+
+
+def _truncate_rows(path: str, rows: int) -> None:
+    """Rewrite an ``.npy`` file with only its first ``rows`` rows."""
+    source = np.load(path, mmap_mode="r")
+    tmp_path = f"{path}.tmp.npy"
+    target = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=source.dtype, shape=(rows, source.shape[1]))
+    for start in range(0, rows, IMPORT_BATCH):
+        end = min(start + IMPORT_BATCH, rows)
+        target[start:end] = source[start:end]
+    target.flush()
+    del source, target
+    os.replace(tmp_path, path)
+
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    """
+    Read and validate a pack's manifest.
+
+    Raises:
+        ValueError: If ``path`` is not a knowledge pack this version reads
+    """
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        raise ValueError(f"{path} is not a knowledge pack (no {MANIFEST_FILE})")
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != PACK_FORMAT or manifest.get("version", 0) > PACK_VERSION:
+        raise ValueError(
+            f"Unsupported pack format: {manifest.get('format')} v{manifest.get('version')}"
+        )
+    return manifest
+
+
+def check_compatibility(
+    manifest: Dict[str, Any],
+    db,
+    allow_projection_change: bool = True,
+) -> Dict[str, Any]:
+    """
+    Check that a pack's vectors can be searched with this device's model.
+
+    The pack must come from the same embedding model and be in the same
+    vector space: the same projection (or none), and the dimension of the
+    vectors already stored. An empty store adopts the pack's projection,
+    unless ``allow_projection_change`` is off (the running server has
+    already loaded its projection).
+
+    Args:
+        manifest: Pack manifest
+        db: Target vector store
+        allow_projection_change: Let an empty store adopt the pack's projection
+
+    Returns:
+        ``{"install_projection": bool, "remove_projection": bool,
+        "warnings": [...]}``
+
+    Raises:
+        ValueError: If the pack is not compatible
+    """
+    if manifest["embedding_model"] != settings.embedding_model:
+        raise ValueError(
+            f"Pack was embedded with {manifest['embedding_model']}, "
+            f"EMBEDDING_MODEL is {settings.embedding_model}"
+        )
+
+    result = {"install_projection": False, "remove_projection": False, "warnings": []}
+    pack_projection = (manifest.get("projection") or {}).get("fingerprint")
+    if pack_projection != _store_projection(db):
+        if db.count() or settings.store_service_url or not allow_projection_change:
+            raise ValueError(
+                "Pack vectors are in a different vector space (embedding projection) "
+                "than this store; import into an empty store with the server stopped, "
+                "or export the pack again from a store with the same projection"
+            )
+        result["install_projection"] = pack_projection is not None
+        result["remove_projection"] = pack_projection is None
+
+    stored_dim = db.dim
+    if stored_dim is not None and stored_dim != manifest["dim"]:
+        raise ValueError(f"Pack vectors have {manifest['dim']} dims, the store has {stored_dim}")
+
+    differences = [
+        f"{name}={manifest['chunker'][name]} (here {getattr(settings, name)})"
+        for name in CHUNKER_SETTINGS
+        if name in manifest.get("chunker", {}) and manifest["chunker"][name] != getattr(settings, name)
+    ]
+    if differences:
+        result["warnings"].append(
+            "Pack was chunked with different settings; new uploads will be split "
+            "differently: " + ", ".join(differences)
+        )
+    return result
+
+
+def iter_pack(path: str, batch_size: int = IMPORT_BATCH) -> Iterator[Dict[str, Any]]:
+    """
+    Stream a pack's chunks and vectors in batches.
+
+    Yields:
+        Dicts with ids, documents, embeddings (float32) and metadatas
+    """
+    vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r")
+    batch: List[Dict[str, Any]] = []
+    row = 0
+
+    def flush():
+        embeddings = np.asarray(vectors[row:row + len(batch)], dtype=np.float32)
+        return {
+            "ids": [c["id"] for c in batch],
+            "documents": [c["document"] for c in batch],
+            "embeddings": embeddings,
+            "metadatas": [c["metadata"] for c in batch],
+        }
+
+    with open(os.path.join(path, CHUNKS_FILE), encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                batch.append(json.loads(line))
+            if len(batch) == batch_size:
+                yield flush()
+                row += len(batch)
+                batch = []
+    if batch:
+        yield flush()
+        row += len(batch)
+
+    if row != len(vectors):
+        raise ValueError(f"Pack has {row} chunks but {len(vectors)} vectors")
+
+
+def import_pack(
+    db,
+    path: str,
+    batch_size: int = IMPORT_BATCH,
+    allow_projection_change: bool = True,
+) -> Dict[str, Any]:
+    """
+    Add a pack's chunks to the store with their stored embeddings.
+
+    No embedding model is loaded or called. Files in the pack that are
+    already in the store are replaced, so importing the same pack twice
+    leaves one copy. Their old chunks are deleted only once every pack
+    chunk is added; a failed import removes the chunks it added instead.
+
+    Args:
+        db: Target vector store (in-process or store service)
+        path: Pack directory
+        batch_size: Chunks per ``add_documents`` call
+        allow_projection_change: Let an empty store adopt the pack's projection
+
+    Returns:
+        Import report (chunks, files, replaced chunks, time, projection change)
+    """
+    try:
+        path = os.path.abspath(path)
+        manifest = read_manifest(path)
+        vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r")
+        if vectors.shape != (manifest["chunks"], manifest["dim"]):
+            raise ValueError(
+                f"Pack vectors have shape {vectors.shape}, manifest says "
+                f"({manifest['chunks']}, {manifest['dim']})"
+            )
+        del vectors
+        compatibility = check_compatibility(manifest, db, allow_projection_change)
+        for warning in compatibility["warnings"]:
+            logger.warning(f"⚠️  {warning}")
+
+        start = time.perf_counter()
+        replaced = [i for filename in manifest["files"] for i in db.get_ids_by_filename(filename)]
+        taken = set(replaced)
+
+        added: List[str] = []
+        try:
+            for chunk in iter_pack(path, batch_size):
+                # Re-importing a pack: the old copy keeps its IDs until the end
+                ids = [
+                    create_document_id(metadata.get("filename", ""), len(added) + i)
+                    if chunk_id in taken else chunk_id
+                    for i, (chunk_id, metadata) in enumerate(zip(chunk["ids"], chunk["metadatas"]))
+                ]
+                added += ids
+                db.add_documents(
+                    ids=ids,
+                    documents=chunk["documents"],
+                    embeddings=chunk["embeddings"],
+                    metadatas=chunk["metadatas"],
+                )
+        except Exception:
+            # Leave the store as it was (IDs of a half-added batch included)
+            if added:
+                db.delete_documents(added)
+            raise
+
+        if replaced:
+            db.delete_documents(replaced)
+        imported = len(added)
+
+        # The store now holds vectors in the pack's space: follow its projection
+        if compatibility["install_projection"]:
+            os.makedirs(os.path.dirname(projection_path()), exist_ok=True)
+            shutil.copy2(os.path.join(path, PROJECTION_FILE), projection_path())
+        elif compatibility["remove_projection"] and os.path.exists(projection_path()):
+            os.remove(projection_path())
+
+        seconds = time.perf_counter() - start
+        logger.info(f"✅ Imported {imported} chunks from {path} in {seconds:.1f}s")
+        return {
+            "chunks": imported,
+            "files": len(manifest["files"]),
+            "replaced_chunks": len(replaced),
+            "seconds": round(seconds, 2),
+            "projection_changed": compatibility["install_projection"] or compatibility["remove_projection"],
+            "warnings": compatibility["warnings"],
+        }
+
+    except Exception as e:
+        logger.error(f"❌ Failed to import knowledge pack: {e}")
+        raise
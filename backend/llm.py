@@ -87,6 +87,47 @@ class LLMClient:
             logger.error(f"❌ LM Studio API error: {e}")
             raise
 
+    async def complete(
+        self,
+        messages: List[Message],
+        temperature: float = 0.2,
+        max_tokens: int = 512,
+    ) -> str:
+        """
+        Generate a non-streaming completion and return its text.
+
+        Args:
+            messages: Conversation history
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+
+        Returns:
+            Assistant message content
+        """
+        try:
+            payload = {
+                "model": self.model,
+                "messages": [{"role": msg.role, "content": msg.content} for msg in messages],
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "stream": False,
+            }
+
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                response = await client.post(
+                    f"{self.base_url}/chat/completions",
+                    json=payload,
+                )
+                response.raise_for_status()
+                return response.json()["choices"][0]["message"]["content"]
+
+        except httpx.HTTPError as e:
+            logger.error(f"❌ LM Studio API HTTP error: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"❌ LM Studio API error: {e}")
+            raise
+
 
 def create_rag_prompt(context: List[Dict[str, Any]], question: str) -> str:
     """
@@ -107,10 +148,12 @@ def create_rag_prompt(context: List[Dict[str, Any]], question: str) -> str:
     for i, item in enumerate(context, 1):
         content = item["content"]
         metadata = item.get("metadata", {})
-        filename = metadata.get("filename", "不明")
+        source = metadata.get("filename", "不明")
+        if metadata.get("section_path"):
+            source = f"{source} > {metadata['section_path']}"
 
         context_parts.append(
-            f"[参考資料 {i}: {filename}]\n{content}"
+            f"[参考資料 {i}: {source}]\n{content}"
         )
 
     context_text = "\n\n".join(context_parts)
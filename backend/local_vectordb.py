@@ -0,0 +1,1079 @@
+"""Local vector store: memory-mapped vectors, IVF index and SQLite metadata."""
+
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from config import settings
+from projection import PROJECTION_FILE
+from vectordb import (
+    EmbeddingArray,
+    EmbeddingTransform,
+    GenerationCounter,
+    as_float32_matrix,
+    scores_to_distances,
+)
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.bin"
+CODES_FILE = "codes.bin"
+CODE_SCALES_FILE = "code_scales.bin"
+ASSIGN_FILE = "assign.bin"
+CENTROIDS_FILE = "centroids.npy"
+META_FILE = "meta.sqlite3"
+GENERATION_FILE = "generation"
+
+# Rows scanned per block in exact search (bounds temporary memory)
+SCAN_BLOCK = 65536
+# Retrain the IVF index once the collection grows this much past training
+RETRAIN_GROWTH = 4
+# Shortlist size (times k) rescored with full-precision vectors, per quantization
+RESCORE_FACTORS = {"int8": 4, "binary": 16}
+# int8 rows converted to float32 at a time (keeps the conversion cache-resident)
+INT8_BLOCK = 2048
+QUANTIZATIONS = ["none", "int8", "binary"]
+
+# Set bits per byte value, for Hamming distances on NumPy without bitwise_count
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def train_spherical_kmeans(
+    vectors: np.ndarray,
+    nlist: int,
+    iterations: int = 10,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    Train IVF centroids with spherical k-means on normalized vectors.
+
+    Args:
+        vectors: Training sample of shape (n, dim)
+        nlist: Number of centroids
+        iterations: Number of k-means iterations
+        seed: Random seed
+
+    Returns:
+        Normalized centroids of shape (nlist, dim)
+    """
+    rng = np.random.default_rng(seed)
+    sample = np.asarray(vectors, dtype=np.float32)
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+
+    for _ in range(iterations):
+        assign = assign_to_centroids(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        counts = np.bincount(assign, minlength=nlist)
+
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.maximum(norms, 1e-12)
+
+    return centroids.astype(np.float32)
+
+
+def assign_to_centroids(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """
+    Assign each vector to its nearest centroid (by inner product).
+
+    Returns:
+        int32 array of list ids
+    """
+    assign = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), SCAN_BLOCK):
+        block = np.asarray(vectors[start:start + SCAN_BLOCK], dtype=np.float32)
+        assign[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assign
+
+
+def quantize_int8(vectors: np.ndarray):
+    """
+    Scalar-quantize vectors to int8 with one scale per vector.
+
+    Returns:
+        int8 codes of shape (n, dim) and float32 scales of shape (n,);
+        ``codes * scales[:, None]`` approximates the vectors
+    """
+    absmax = np.abs(vectors).max(axis=1)
+    scales = np.maximum(absmax, 1e-12) / 127.0
+    codes = np.rint(vectors / scales[:, np.newaxis]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """
+    Quantize vectors to one sign bit per dimension.
+
+    Returns:
+        uint8 codes of shape (n, ceil(dim / 8))
+    """
+    return np.packbits(vectors > 0, axis=1)
+
+
+def hamming_scores(codes: np.ndarray, query_codes: np.ndarray) -> np.ndarray:
+    """
+    Negated Hamming distances between binary codes (higher is closer).
+
+    Returns:
+        Array of shape (len(codes), len(query_codes))
+    """
+    xor = codes[:, np.newaxis, :] ^ query_codes[np.newaxis, :, :]
+    if hasattr(np, "bitwise_count"):
+        bits = np.bitwise_count(xor)
+    else:
+        bits = POPCOUNT[xor]
+    return -bits.sum(axis=2, dtype=np.int32).astype(np.float32)
+
+
+def _top_k(scores: np.ndarray, rows: np.ndarray, k: int):
+    """Return (rows, scores) of the k best scores, best first."""
+    if len(scores) > k:
+        part = np.argpartition(-scores, k - 1)[:k]
+        rows, scores = rows[part], scores[part]
+    order = np.argsort(-scores, kind="stable")
+    return rows[order], scores[order]
+
+
+class _IndexState:
+    """Immutable snapshot of the index, swapped atomically on every write."""
+
+    def __init__(
+        self,
+        vectors: Optional[np.ndarray],
+        deleted: np.ndarray,
+        centroids: Optional[np.ndarray],
+        assign: Optional[np.ndarray],
+        codes: Optional[np.ndarray] = None,
+        code_scales: Optional[np.ndarray] = None,
+    ):
+        self.vectors = vectors
+        self.codes = codes
+        self.code_scales = code_scales
+        self.deleted = deleted
+        self.centroids = centroids
+        self.list_order = None
+        self.list_offsets = None
+
+        if centroids is not None and assign is not None:
+            self.list_order = np.argsort(assign, kind="stable")
+            self.list_offsets = np.searchsorted(
+                assign[self.list_order], np.arange(len(centroids) + 1)
+            )
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.deleted)
+
+
+class _SwapLock:
+    """
+    Readers share it; rebuilding the store takes it exclusively.
+
+    A rebuild swaps in another directory, whose rows no longer match an
+    earlier index snapshot or the SQLite connections opened on the old
+    files, so readers finish before the swap and wait while it runs.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._swapping = False
+
+    @contextmanager
+    def shared(self):
+        with self._condition:
+            while self._swapping:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                self._condition.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        with self._condition:
+            while self._swapping:
+                self._condition.wait()
+            self._swapping = True
+            while self._readers:
+                self._condition.wait()
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._swapping = False
+                self._condition.notify_all()
+
+
+class LocalVectorDB:
+    """
+    VectorDB-compatible store that keeps vectors in a memory-mapped file.
+
+    Vectors are appended to a flat float32/float16 file and searched through
+    an IVF index (exact scan for small collections); ids, documents and
+    metadata live in SQLite. Readers never wait on writers: each query works
+    on the current immutable index snapshot, and writers publish a new one.
+    Only a rebuild (compaction, reprojection), which swaps in a new
+    directory, briefly holds readers back.
+
+    With quantization enabled, int8 or binary codes are stored next to the
+    vectors and the search runs on the codes; only a shortlist of rows is
+    read back from the full-precision file and rescored exactly, so the hot
+    working set is 1 byte (int8) or 1 bit (binary) per dimension.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """Initialize the local vector store (in ``local_vector_dir`` by default)."""
+        self.path = os.path.abspath(path or settings.local_vector_dir)
+        self.dtype = np.dtype(settings.local_vector_dtype)
+        self.quantization = settings.local_vector_quantization
+        if self.quantization not in QUANTIZATIONS:
+            raise ValueError(
+                f"LOCAL_VECTOR_QUANTIZATION must be one of {QUANTIZATIONS}, "
+                f"got {self.quantization!r}"
+            )
+        # Vectors are normalized, so results are reported as cosine distances
+        self.space = "cosine"
+        self.dim: Optional[int] = None
+        self._state: Optional[_IndexState] = None
+        self.has_documents = False
+        self._generation: Optional[GenerationCounter] = None
+        self._write_lock = threading.Lock()
+        self._swap_lock = _SwapLock()
+        # Bumped when a rebuild swaps in a new directory
+        self._epoch = 0
+        self._local = threading.local()
+        self._initialize()
+
+    def _initialize(self):
+        """Open (or create) the on-disk store."""
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            logger.info(f"📁 Initializing local vector store at: {self.path}")
+            self._generation = GenerationCounter(self._file(GENERATION_FILE))
+
+            conn = self._connection()
+            conn.executescript(
+                """
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS chunks (
+                    row INTEGER PRIMARY KEY,
+                    id TEXT NOT NULL UNIQUE,
+                    document TEXT,
+                    metadata TEXT,
+                    filename TEXT,
+                    deleted INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS chunks_filename ON chunks(filename);
+                CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT);
+                """
+            )
+
+            dim = self._get_info("dim")
+            self.dim = int(dim) if dim else None
+            stored_dtype = self._get_info("dtype")
+            if stored_dtype and np.dtype(stored_dtype) != self.dtype:
+                logger.warning(
+                    f"⚠️  Store uses {stored_dtype}, ignoring "
+                    f"LOCAL_VECTOR_DTYPE={self.dtype.name}"
+                )
+                self.dtype = np.dtype(stored_dtype)
+            if self.dim is not None:
+                # Stores created before quantization existed have no codes
+                stored_quantization = self._get_info("quantization") or "none"
+                if stored_quantization != self.quantization:
+                    logger.warning(
+                        f"⚠️  Store uses quantization {stored_quantization}, ignoring "
+                        f"LOCAL_VECTOR_QUANTIZATION={self.quantization}"
+                    )
+                    self.quantization = stored_quantization
+
+            n_rows = conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+            # Drop vectors written by an add that never committed
+            self._truncate(VECTORS_FILE, n_rows * (self.dim or 0) * self.dtype.itemsize)
+            self._truncate(ASSIGN_FILE, n_rows * np.dtype(np.int32).itemsize)
+            self._truncate(CODES_FILE, n_rows * self._code_width())
+            self._truncate(CODE_SCALES_FILE, n_rows * np.dtype(np.float32).itemsize)
+
+            deleted = np.zeros(n_rows, dtype=bool)
+            deleted_rows = [r for (r,) in conn.execute("SELECT row FROM chunks WHERE deleted = 1")]
+            deleted[deleted_rows] = True
+
+            self._publish(deleted)
+
+            logger.info(
+                f"✅ Local vector store initialized "
+                f"({n_rows - len(deleted_rows)} documents, "
+                f"index: {'IVF' if self._state.centroids is not None else 'exact'}, "
+                f"quantization: {self.quantization})"
+            )
+
+        except Exception as e:
+            logger.error(f"❌ Failed to initialize local vector store: {e}")
+            raise
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread SQLite connection (WAL readers never block each other)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._file(META_FILE), check_same_thread=False)
+            self._local.conn = conn
+        return conn
+
+    def _code_width(self) -> int:
+        """Bytes per row in the codes file."""
+        if self.quantization == "int8":
+            return self.dim or 0
+        if self.quantization == "binary":
+            return ((self.dim or 0) + 7) // 8
+        return 0
+
+    def _get_info(self, key: str) -> Optional[str]:
+        row = self._connection().execute("SELECT value FROM info WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_info(self, conn: sqlite3.Connection, key: str, value: Any) -> None:
+        conn.execute("INSERT OR REPLACE INTO info (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _truncate(self, name: str, size: int) -> None:
+        path = self._file(name)
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            with open(path, "r+b") as f:
+                f.truncate(size)
+
+    def _replace_file(self, name: str, data: bytes) -> None:
+        """Atomically replace a file; existing memory maps keep the old inode."""
+        tmp = self._file(name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._file(name))
+
+    def _publish(self, deleted: np.ndarray) -> None:
+        """Map the current files and publish a new index snapshot."""
+        n_rows = len(deleted)
+        vectors = None
+        assign = None
+        centroids = None
+        codes = None
+        code_scales = None
+
+        if n_rows and self.dim:
+            vectors = np.memmap(
+                self._file(VECTORS_FILE), dtype=self.dtype, mode="r", shape=(n_rows, self.dim)
+            )
+            if self.quantization != "none":
+                codes = np.memmap(
+                    self._file(CODES_FILE),
+                    dtype=np.int8 if self.quantization == "int8" else np.uint8,
+                    mode="r",
+                    shape=(n_rows, self._code_width()),
+                )
+            if self.quantization == "int8":
+                code_scales = np.memmap(
+                    self._file(CODE_SCALES_FILE), dtype=np.float32, mode="r", shape=(n_rows,)
+                )
+            if os.path.exists(self._file(CENTROIDS_FILE)):
+                centroids = np.load(self._file(CENTROIDS_FILE))
+                assign = np.fromfile(self._file(ASSIGN_FILE), dtype=np.int32, count=n_rows)
+
+        self._state = _IndexState(vectors, deleted, centroids, assign, codes, code_scales)
+        self.has_documents = bool(n_rows) and not deleted.all()
+
+    def add_documents(
+        self,
+        ids: List[str],
+        documents: List[str],
+        embeddings: EmbeddingArray,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """
+        Add documents to the store.
+
+        Args:
+            ids: List of unique document IDs
+            documents: List of document texts
+            embeddings: Embedding matrix of shape (len(ids), dim)
+            metadatas: Optional list of metadata dictionaries
+        """
+        try:
+            vectors = as_float32_matrix(embeddings)
+            metadatas = metadatas or [{} for _ in ids]
+            if not (len(ids) == len(documents) == len(vectors) == len(metadatas)):
+                raise ValueError("ids, documents, embeddings and metadatas differ in length")
+            if len(set(ids)) != len(ids):
+                raise ValueError("Duplicate document IDs in one batch")
+            # Serialize before touching any file, so bad metadata fails cleanly
+            records = [
+                (doc_id, documents[i], json.dumps(metadatas[i], ensure_ascii=False), metadatas[i].get("filename"))
+                for i, doc_id in enumerate(ids)
+            ]
+
+            with self._write_lock:
+                conn = self._connection()
+                state = self._state
+                new_store = self.dim is None
+
+                try:
+                    if new_store:
+                        self.dim = vectors.shape[1]
+                        self._set_info(conn, "dim", self.dim)
+                        self._set_info(conn, "dtype", self.dtype.name)
+                        self._set_info(conn, "quantization", self.quantization)
+                    elif vectors.shape[1] != self.dim:
+                        raise ValueError(
+                            f"Embedding dimension {vectors.shape[1]} does not match store ({self.dim})"
+                        )
+
+                    for start in range(0, len(ids), 500):
+                        batch = ids[start:start + 500]
+                        placeholders = ",".join("?" * len(batch))
+                        duplicate = conn.execute(
+                            f"SELECT id FROM chunks WHERE deleted = 0 AND id IN ({placeholders}) LIMIT 1",
+                            batch,
+                        ).fetchone()
+                        if duplicate:
+                            raise ValueError(f"Document ID already exists: {duplicate[0]}")
+                        # Deleted rows keep their id until it is reused (re-upload of a file)
+                        conn.execute(
+                            f"UPDATE chunks SET id = id || '#' || row "
+                            f"WHERE deleted = 1 AND id IN ({placeholders})",
+                            batch,
+                        )
+
+                    if state.centroids is not None:
+                        assign = assign_to_centroids(vectors, state.centroids)
+                    else:
+                        assign = np.full(len(ids), -1, dtype=np.int32)
+
+                    # Vectors first, written at the end of the committed rows (which
+                    # also drops bytes left by a failed add); rows only become
+                    # visible once SQLite commits
+                    first_row = state.n_rows
+                    self._write_rows(VECTORS_FILE, first_row, vectors.astype(self.dtype))
+                    self._write_rows(ASSIGN_FILE, first_row, assign)
+                    self._write_codes(first_row, vectors)
+
+                    conn.executemany(
+                        "INSERT INTO chunks (row, id, document, metadata, filename) VALUES (?, ?, ?, ?, ?)",
+                        [(first_row + i, *record) for i, record in enumerate(records)],
+                    )
+                    conn.commit()
+
+                except Exception:
+                    conn.rollback()
+                    if new_store:
+                        self.dim = None
+                    raise
+
+                deleted = np.concatenate([state.deleted, np.zeros(len(ids), dtype=bool)])
+                self._publish(deleted)
+                self._maybe_train()
+                self._generation.bump()
+
+            logger.info(f"➕ Added {len(ids)} documents to local store")
+
+        except Exception as e:
+            logger.error(f"❌ Failed to add documents: {e}")
+            raise
+
+    def _write_rows(self, name: str, first_row: int, rows: np.ndarray) -> None:
+        """Write rows at ``first_row``, cutting off anything past the committed rows."""
+        data = np.ascontiguousarray(rows)
+        row_bytes = data.nbytes // len(data) if len(data) else 0
+        mode = "r+b" if os.path.exists(self._file(name)) else "w+b"
+        with open(self._file(name), mode) as f:
+            f.truncate(first_row * row_bytes)
+            f.seek(first_row * row_bytes)
+            f.write(data.tobytes())
+
+    def _write_codes(self, first_row: int, vectors: np.ndarray) -> None:
+        """Write the quantized codes of new vectors."""
+        if self.quantization == "int8":
+            codes, scales = quantize_int8(vectors)
+            self._write_rows(CODE_SCALES_FILE, first_row, scales)
+        elif self.quantization == "binary":
+            codes = quantize_binary(vectors)
+        else:
+            return
+        self._write_rows(CODES_FILE, first_row, codes)
+
+    def _maybe_train(self) -> None:
+        """Train or retrain the IVF index when the collection has grown enough."""
+        state = self._state
+        live = state.n_rows - int(state.deleted.sum())
+        trained_rows = int(self._get_info("trained_rows") or 0)
+
+        if live < settings.local_ivf_min_vectors:
+            return
+        if state.centroids is not None and live < trained_rows * RETRAIN_GROWTH:
+            return
+
+        nlist = max(16, int(4 * np.sqrt(live)))
+        live_rows = np.flatnonzero(~state.deleted)
+        rng = np.random.default_rng(0)
+        sample_rows = np.sort(rng.choice(live_rows, min(len(live_rows), nlist * 64), replace=False))
+
+        logger.info(f"🔄 Training IVF index ({nlist} lists, {len(sample_rows)} samples)...")
+        centroids = train_spherical_kmeans(state.vectors[sample_rows], nlist)
+        assign = assign_to_centroids(state.vectors, centroids)
+
+        self._replace_file(ASSIGN_FILE, assign.tobytes())
+        tmp = self._file(CENTROIDS_FILE + ".tmp.npy")
+        np.save(tmp, centroids)
+        os.replace(tmp, self._file(CENTROIDS_FILE))
+
+        conn = self._connection()
+        self._set_info(conn, "trained_rows", live)
+        conn.commit()
+
+        self._publish(state.deleted)
+        logger.info("✅ IVF index trained")
+
+    def _allowed_rows(self, state: _IndexState, where: Dict[str, Any]) -> np.ndarray:
+        """Rows of ``state`` matching a simple equality metadata filter."""
+        clauses = ["deleted = 0"]
+        params: List[Any] = []
+
+        for key, value in where.items():
+            if isinstance(value, dict):
+                if set(value) != {"$eq"}:
+                    raise ValueError(f"Unsupported filter operator: {value}")
+                value = value["$eq"]
+
+            if key == "filename":
+                clauses.append("filename = ?")
+            else:
+                clauses.append("json_extract(metadata, ?) = ?")
+                params.append(f'$."{key}"')
+            params.append(value)
+
+        rows = self._connection().execute(
+            f"SELECT row FROM chunks WHERE {' AND '.join(clauses)} ORDER BY row", params
+        ).fetchall()
+        rows = np.fromiter((r for (r,) in rows), dtype=np.int64, count=len(rows))
+        # Rows committed after the snapshot was taken are not in its arrays
+        return rows[rows < state.n_rows]
+
+    def _first_pass_scores(self, state: _IndexState, rows: np.ndarray, queries: np.ndarray):
+        """
+        Scores of sorted rows against the queries, from the codes if quantized.
+
+        Returns:
+            Array of shape (len(rows), len(queries))
+        """
+        def gather(array: np.ndarray) -> np.ndarray:
+            # Contiguous rows are read as one slice of the memory map
+            if rows[-1] - rows[0] + 1 == len(rows):
+                return np.asarray(array[rows[0]:rows[-1] + 1])
+            return np.asarray(array[rows])
+
+        if self.quantization == "int8":
+            codes = gather(state.codes)
+            scores = np.concatenate([
+                codes[start:start + INT8_BLOCK].astype(np.float32) @ queries.T
+                for start in range(0, len(codes), INT8_BLOCK)
+            ])
+            return scores * gather(state.code_scales)[:, np.newaxis]
+        if self.quantization == "binary":
+            return hamming_scores(gather(state.codes), quantize_binary(queries))
+        return np.asarray(gather(state.vectors), dtype=np.float32) @ queries.T
+
+    def _shortlist_size(self, k: int) -> int:
+        """Candidates kept from the first pass (rescored exactly if quantized)."""
+        if self.quantization == "none":
+            return k
+        return k * (settings.local_rescore_factor or RESCORE_FACTORS[self.quantization])
+
+    def _rescore(self, state: _IndexState, hits, queries: np.ndarray, k: int):
+        """Exact top-k of each shortlist, read from the full-precision vectors."""
+        if self.quantization == "none":
+            return hits
+
+        rescored = []
+        for (rows, _), query in zip(hits, queries):
+            rows = np.sort(rows)
+            scores = np.asarray(state.vectors[rows], dtype=np.float32) @ query
+            rescored.append(_top_k(scores, rows, k))
+        return rescored
+
+    def _search_exact(self, state: _IndexState, queries: np.ndarray, k: int, rows=None):
+        """Top-k by scanning all (or the given) rows in blocks."""
+        best = [(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)) for _ in queries]
+        shortlist = self._shortlist_size(k)
+
+        if rows is None:
+            spans = [
+                np.arange(start, min(start + SCAN_BLOCK, state.n_rows))
+                for start in range(0, state.n_rows, SCAN_BLOCK)
+            ]
+        else:
+            spans = [rows[start:start + SCAN_BLOCK] for start in range(0, len(rows), SCAN_BLOCK)]
+
+        for span in spans:
+            span = span[~state.deleted[span]]
+            if not len(span):
+                continue
+            scores = self._first_pass_scores(state, span, queries)
+
+            for qi in range(len(queries)):
+                merged_rows = np.concatenate([best[qi][0], span])
+                merged_scores = np.concatenate([best[qi][1], scores[:, qi]])
+                best[qi] = _top_k(merged_scores, merged_rows, shortlist)
+
+        return self._rescore(state, best, queries, k)
+
+    def _search_ivf(self, state: _IndexState, query: np.ndarray, k: int):
+        """Approximate top-k by probing the closest IVF lists."""
+        nprobe = min(settings.local_ivf_nprobe, len(state.centroids))
+        probes = np.argpartition(-(state.centroids @ query), nprobe - 1)[:nprobe]
+
+        candidates = np.concatenate([
+            state.list_order[state.list_offsets[c]:state.list_offsets[c + 1]]
+            for c in probes
+        ])
+        candidates = np.sort(candidates[~state.deleted[candidates]])
+        if not len(candidates):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        queries = query[np.newaxis, :]
+        scores = self._first_pass_scores(state, candidates, queries)[:, 0]
+        hits = [_top_k(scores, candidates, self._shortlist_size(k))]
+        return self._rescore(state, hits, queries, k)[0]
+
+    def query(
+        self,
+        query_embeddings: EmbeddingArray,
+        n_results: int = 3,
+        where: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Query the store for similar documents.
+
+        Args:
+            query_embeddings: Query embedding matrix (or list of vectors)
+            n_results: Number of results to return
+            where: Optional metadata filter (equality only)
+
+        Returns:
+            Chroma-style results with ids, documents, metadatas, and distances
+        """
+        try:
+            queries = as_float32_matrix(query_embeddings)
+            with self._swap_lock.shared():
+                state = self._state
+                if state.vectors is None:
+                    hits = [
+                        (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)) for _ in queries
+                    ]
+                elif where:
+                    rows = self._allowed_rows(state, where)
+                    hits = self._search_exact(state, queries, n_results, rows=rows)
+                elif state.centroids is None:
+                    hits = self._search_exact(state, queries, n_results)
+                else:
+                    hits = [self._search_ivf(state, query, n_results) for query in queries]
+
+                results = self._fetch_results(hits)
+            logger.info(f"🔍 Query returned {len(results['ids'][0])} results")
+            return results
+
+        except Exception as e:
+            logger.error(f"❌ Failed to query local store: {e}")
+            raise
+
+    def _fetch_results(self, hits) -> Dict[str, Any]:
+        """Load ids, documents and metadata for search hits."""
+        all_rows = sorted({int(r) for rows, _ in hits for r in rows})
+        records = {}
+        conn = self._connection()
+        for start in range(0, len(all_rows), 500):
+            batch = all_rows[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            for row, doc_id, document, metadata in conn.execute(
+                f"SELECT row, id, document, metadata FROM chunks WHERE row IN ({placeholders})",
+                batch,
+            ):
+                records[row] = (doc_id, document, json.loads(metadata))
+
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for rows, scores in hits:
+            distances = scores_to_distances(scores, self.space)
+            results["ids"].append([records[int(r)][0] for r in rows])
+            results["documents"].append([records[int(r)][1] for r in rows])
+            results["metadatas"].append([records[int(r)][2] for r in rows])
+            results["distances"].append(distances.tolist())
+        return results
+
+    def get_all_documents(self) -> Dict[str, Any]:
+        """
+        Get all documents from the store.
+
+        Returns:
+            All documents with their metadata
+        """
+        try:
+            with self._swap_lock.shared():
+                rows = self._connection().execute(
+                    "SELECT id, document, metadata FROM chunks WHERE deleted = 0 ORDER BY row"
+                ).fetchall()
+            results = {
+                "ids": [r[0] for r in rows],
+                "documents": [r[1] for r in rows],
+                "metadatas": [json.loads(r[2]) for r in rows],
+            }
+            logger.info(f"📚 Retrieved {len(results['ids'])} documents")
+            return results
+
+        except Exception as e:
+            logger.error(f"❌ Failed to get documents: {e}")
+            raise
+
+    def get_ids_by_filename(self, filename: str) -> List[str]:
+        """
+        Get the IDs of all chunks of a file.
+
+        Args:
+            filename: Source filename
+
+        Returns:
+            Chunk IDs
+        """
+        try:
+            with self._swap_lock.shared():
+                rows = self._connection().execute(
+                    "SELECT id FROM chunks WHERE deleted = 0 AND filename = ? ORDER BY row", (filename,)
+                ).fetchall()
+            return [r[0] for r in rows]
+
+        except Exception as e:
+            logger.error(f"❌ Failed to get documents by filename: {e}")
+            raise
+
+    def _mark_deleted(self, clause: str, params: List[Any]) -> int:
+        """Tombstone matching rows and publish the new deleted mask."""
+        with self._write_lock:
+            conn = self._connection()
+            rows = [
+                r for (r,) in conn.execute(
+                    f"SELECT row FROM chunks WHERE deleted = 0 AND {clause}", params
+                )
+            ]
+            if rows:
+                conn.execute(f"UPDATE chunks SET deleted = 1 WHERE deleted = 0 AND {clause}", params)
+                conn.commit()
+
+                deleted = self._state.deleted.copy()
+                deleted[rows] = True
+                self._publish(deleted)
+                self._generation.bump()
+
+            return len(rows)
+
+    def delete_documents(self, ids: List[str]) -> None:
+        """
+        Delete documents from the store.
+
+        Args:
+            ids: List of document IDs to delete
+        """
+        try:
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                self._mark_deleted(f"id IN ({','.join('?' * len(batch))})", batch)
+            logger.info(f"🗑️  Deleted {len(ids)} documents from local store")
+
+        except Exception as e:
+            logger.error(f"❌ Failed to delete documents: {e}")
+            raise
+
+    def delete_by_filename(self, filename: str) -> int:
+        """
+        Delete all documents associated with a filename.
+
+        Args:
+            filename: Filename to delete
+
+        Returns:
+            Number of documents deleted
+        """
+        try:
+            count = self._mark_deleted("filename = ?", [filename])
+            if count:
+                logger.info(f"🗑️  Deleted {count} chunks for file: {filename}")
+            else:
+                logger.info(f"ℹ️  No documents found for file: {filename}")
+            return count
+
+        except Exception as e:
+            logger.error(f"❌ Failed to delete by filename: {e}")
+            raise
+
+    def sample_embeddings(self, limit: int) -> Tuple[List[str], np.ndarray]:
+        """
+        Random stored documents with their embeddings (to fit a projection).
+
+        Args:
+            limit: Maximum number of documents
+
+        Returns:
+            Documents and their embedding matrix
+        """
+        with self._swap_lock.shared():
+            state = self._state
+            rows = np.flatnonzero(~state.deleted)
+            if len(rows) > limit:
+                rng = np.random.default_rng(0)
+                rows = np.sort(rng.choice(rows, limit, replace=False))
+            if not len(rows):
+                return [], np.empty((0, self.dim or 0), dtype=np.float32)
+
+            records = {}
+            conn = self._connection()
+            for start in range(0, len(rows), 500):
+                batch = rows[start:start + 500].tolist()
+                placeholders = ",".join("?" * len(batch))
+                records.update(conn.execute(
+                    f"SELECT row, document FROM chunks WHERE row IN ({placeholders})", batch
+                ).fetchall())
+            return [records[int(r)] for r in rows], np.asarray(state.vectors[rows], dtype=np.float32)
+
+    def iter_chunks(self, batch_size: int = 5000) -> Iterator[Dict[str, Any]]:
+        """
+        Live chunks with their stored embeddings, one batch at a time.
+
+        Batches come from the index snapshot current at the first call, so
+        they stay consistent while other threads write.
+
+        Args:
+            batch_size: Chunks per batch
+
+        Yields:
+            Dicts with ids, documents, embeddings (float32) and metadatas
+
+        Raises:
+            RuntimeError: If the store is rebuilt before the last batch
+        """
+        with self._swap_lock.shared():
+            state, epoch = self._state, self._epoch
+        rows = np.flatnonzero(~state.deleted)
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            with self._swap_lock.shared():
+                if self._epoch != epoch:
+                    raise RuntimeError("Local store was rebuilt while it was being read")
+                records = {
+                    r[0]: r[1:]
+                    for r in self._connection().execute(
+                        f"SELECT row, id, document, metadata FROM chunks WHERE row IN "
+                        f"({','.join('?' * len(batch))})",
+                        batch.tolist(),
+                    )
+                }
+                batch = np.array([r for r in batch.tolist() if r in records], dtype=np.int64)
+                embeddings = np.asarray(state.vectors[batch], dtype=np.float32)
+            yield {
+                "ids": [records[r][0] for r in batch.tolist()],
+                "documents": [records[r][1] for r in batch.tolist()],
+                "embeddings": embeddings,
+                "metadatas": [json.loads(records[r][2]) for r in batch.tolist()],
+            }
+
+    def reproject(self, transform: EmbeddingTransform) -> int:
+        """
+        Rebuild the store with transformed (e.g. projected) embeddings.
+
+        The new store is written to a sibling directory and swapped in once
+        complete, so an interrupted rebuild leaves the current store intact.
+        Not meant to run while other processes write to the store.
+
+        Args:
+            transform: Maps each batch's documents and stored embeddings to
+                the new embeddings
+
+        Returns:
+            Number of chunks in the rebuilt store
+        """
+        try:
+            return self._rebuild(transform)
+
+        except Exception as e:
+            logger.error(f"❌ Failed to reproject local store: {e}")
+            raise
+
+    def compact(self) -> Dict[str, Any]:
+        """
+        Drop deleted rows from the vector, code and metadata files.
+
+        Deletions only mark rows, so the files keep growing with uploads and
+        deletes. The live rows are rewritten into a fresh store (the IVF
+        index is retrained on them) and swapped in like ``reproject``.
+
+        Returns:
+            Report with on-disk size and cold open time before and after
+        """
+        from store_maintenance import store_report
+
+        try:
+            with self._write_lock:
+                before = store_report(self.path, "local")
+            start = time.perf_counter()
+            count = self._rebuild()
+
+            report = {
+                "chunks": count,
+                "seconds": round(time.perf_counter() - start, 2),
+                "before": before,
+                "after": store_report(self.path, "local"),
+            }
+            logger.info(
+                f"🧹 Compacted local store: {before['bytes'] / 1e6:.1f} MB -> "
+                f"{report['after']['bytes'] / 1e6:.1f} MB"
+            )
+            return report
+
+        except Exception as e:
+            logger.error(f"❌ Failed to compact local store: {e}")
+            raise
+
+    def snapshot(self, path: str) -> Dict[str, Any]:
+        """
+        Write a compact, self-contained copy of the store to ``path``.
+
+        The snapshot opens as a regular ``LOCAL_VECTOR_DIR`` and is restored
+        with tools/compact_store.py.
+
+        Args:
+            path: New directory for the snapshot
+
+        Returns:
+            Snapshot report (path, chunks, size, cold open time)
+        """
+        from store_maintenance import finish_snapshot
+
+        try:
+            path = os.path.abspath(path)
+            if os.path.exists(path):
+                raise ValueError(f"Snapshot directory already exists: {path}")
+
+            with self._write_lock:
+                generation = self._generation.value
+                count = self._write_copy(path)
+            return finish_snapshot(path, "local", count, generation)
+
+        except Exception as e:
+            logger.error(f"❌ Failed to snapshot local store: {e}")
+            raise
+
+    def _write_copy(self, path: str, transform: Optional[EmbeddingTransform] = None) -> int:
+        """Write the live rows into a new store at ``path`` (caller holds the write lock)."""
+        target = LocalVectorDB(path)
+        target.dtype = self.dtype
+        target.quantization = self.quantization
+
+        for chunk in self.iter_chunks():
+            embeddings = chunk["embeddings"]
+            target.add_documents(
+                ids=chunk["ids"],
+                documents=chunk["documents"],
+                embeddings=transform(chunk["documents"], embeddings) if transform else embeddings,
+                metadatas=chunk["metadatas"],
+            )
+        count = target.count()
+        target._connection().close()
+        return count
+
+    def _rebuild(self, transform: Optional[EmbeddingTransform] = None) -> int:
+        """Rewrite the store into a sibling directory and swap it in."""
+        rebuild_path = f"{self.path}.rebuild"
+        shutil.rmtree(rebuild_path, ignore_errors=True)
+        logger.info(f"🔄 Rebuilding local store into {rebuild_path}")
+
+        with self._write_lock:
+            count = self._write_copy(rebuild_path, transform)
+
+            # The embedding projection is kept next to the vectors by default
+            projection = self._file(PROJECTION_FILE)
+            if os.path.exists(projection):
+                shutil.copy2(projection, os.path.join(rebuild_path, PROJECTION_FILE))
+
+            # Keep the generation increasing across the swap
+            generation = self._generation.value
+            with self._swap_lock.exclusive():
+                # Connections of every thread point at the old files
+                self._connection().close()
+                self._local = threading.local()
+                old_path = f"{self.path}.old"
+                shutil.rmtree(old_path, ignore_errors=True)
+                os.rename(self.path, old_path)
+                os.rename(rebuild_path, self.path)
+                shutil.rmtree(old_path)
+
+                self.dim = None
+                self._epoch += 1
+                self._initialize()
+                while self._generation.value <= generation:
+                    self._generation.bump()
+
+        logger.info(f"✅ Rebuilt local store ({count} chunks)")
+        return count
+
+    @property
+    def generation(self) -> int:
+        """Counter bumped on every change to the stored documents."""
+        return self._generation.value
+
+    def count(self) -> int:
+        """
+        Count live documents in the store.
+
+        Returns:
+            Number of documents
+        """
+        state = self._state
+        return state.n_rows - int(state.deleted.sum())
+
+    def reset(self) -> None:
+        """Reset the store (delete all documents)."""
+        try:
+            with self._write_lock:
+                conn = self._connection()
+                conn.execute("DELETE FROM chunks")
+                conn.execute("DELETE FROM info")
+                conn.commit()
+
+                self._replace_file(VECTORS_FILE, b"")
+                self._replace_file(ASSIGN_FILE, b"")
+                self._replace_file(CODES_FILE, b"")
+                self._replace_file(CODE_SCALES_FILE, b"")
+                if os.path.exists(self._file(CENTROIDS_FILE)):
+                    os.remove(self._file(CENTROIDS_FILE))
+
+                self.dim = None
+                self.quantization = settings.local_vector_quantization
+                self._publish(np.zeros(0, dtype=bool))
+                self._generation.bump()
+
+            logger.info(f"🔄 Reset local vector store: {self.path}")
+
+        except Exception as e:
+            logger.error(f"❌ Failed to reset local store: {e}")
+            raise
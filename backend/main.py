@@ -1,6 +1,7 @@
 """FastAPI backend for RAG-enabled chat application."""
 
 import logging
+import os
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -25,6 +26,13 @@ async def lifespan(app: FastAPI):
     logger.info(f"📊 ChromaDB persist dir: {settings.chroma_persist_dir}")
     logger.info(f"🤖 Embedding model: {settings.embedding_model}")
     logger.info(f"🔗 LM Studio URL: {settings.lm_studio_base_url}")
+    if settings.store_service_url:
+        logger.info(f"🗄️  Store service: {settings.store_service_url}")
+    elif int(os.environ.get("WEB_CONCURRENCY", "1")) > 1:
+        logger.warning(
+            "⚠️  Several workers without STORE_SERVICE_URL: each worker opens the "
+            "vector store and loads the embedding model; run store_service.py"
+        )
 
     # Initialize services
     from vectordb import vector_db
@@ -36,6 +44,7 @@ async def lifespan(app: FastAPI):
     yield
 
     logger.info("👋 Shutting down RAG backend server...")
+    embedding_model.close()
 
 
 # Create FastAPI app
@@ -53,6 +62,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Prompt-Tokens", "X-Prompt-Tokens-Saved", "X-Warm-Answer-Similarity"],
 )
 
 
@@ -94,11 +104,13 @@ async def health_check():
 
 
 # Import and register routers
-from routes import documents, rag, chat
+from routes import documents, rag, chat, tts, warm_cache
 
 app.include_router(documents.router, prefix="/api/documents", tags=["documents"])
 app.include_router(rag.router, prefix="/api/rag", tags=["rag"])
 app.include_router(chat.router, prefix="/api/chat", tags=["chat"])
+app.include_router(tts.router, prefix="/api/tts", tags=["tts"])
+app.include_router(warm_cache.router, prefix="/api/warm-cache", tags=["warm-cache"])
 
 
 if __name__ == "__main__":
@@ -17,6 +17,13 @@ class ChatRequest(BaseModel):
     use_rag: bool = Field(default=True, description="Enable RAG context retrieval")
     top_k: Optional[int] = Field(default=None, description="Number of context chunks to retrieve")
     stream: bool = Field(default=True, description="Enable streaming response")
+    temperature: float = Field(default=0.7, description="Sampling temperature")
+    conversation_id: Optional[str] = Field(default=None, description="Conversation ID for history summaries")
+
+
+class TTSChatRequest(ChatRequest):
+    """Chat request answered with sentence-by-sentence VOICEVOX audio."""
+    speaker: Optional[int] = Field(default=None, description="VOICEVOX speaker ID (defaults to VOICEVOX_SPEAKER_ID)")
 
 
 # Document Models
@@ -27,6 +34,7 @@ class DocumentMetadata(BaseModel):
     chunk_index: int
     total_chunks: int
     upload_timestamp: str
+    section_path: str = ""
 
 
 class Document(BaseModel):
@@ -56,6 +64,15 @@ class RAGQueryRequest(BaseModel):
     query: str = Field(..., description="Query text")
     top_k: Optional[int] = Field(default=3, description="Number of results to retrieve")
     threshold: Optional[float] = Field(default=0.5, description="Similarity threshold")
+    section_path: Optional[str] = Field(
+        default=None,
+        description="Restrict results to one document section (e.g. 'FAQ > Q1' or '$.faq')",
+    )
+
+
+class RAGBatchQueryRequest(BaseModel):
+    """Batched RAG query request."""
+    queries: List[RAGQueryRequest] = Field(..., description="Queries with per-query top_k and threshold")
 
 
 class ContextItem(BaseModel):
@@ -70,6 +87,12 @@ class RAGQueryResponse(BaseModel):
     context: List[ContextItem]
     query: str
     retrieved_count: int
+    timings: Optional[Dict[str, float]] = Field(None, description="Retrieval timings in milliseconds")
+
+
+class RAGBatchQueryResponse(BaseModel):
+    """Batched RAG query response (same order as the request)."""
+    results: List[RAGQueryResponse]
 
 
 # Health Check
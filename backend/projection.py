@@ -0,0 +1,171 @@
+"""PCA projection of embeddings to fewer dimensions."""
+
+import hashlib
+import logging
+import os
+from typing import Optional
+
+import numpy as np
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+PROJECTION_FILE = "projection.npz"
+
+
+def projection_path() -> str:
+    """Where the projection is stored: next to the active vector store by default."""
+    if settings.embedding_projection_path:
+        return os.path.abspath(settings.embedding_projection_path)
+    store_dir = settings.local_vector_dir if settings.vector_backend == "local" else settings.chroma_persist_dir
+    return os.path.join(os.path.abspath(store_dir), PROJECTION_FILE)
+
+
+class Projection:
+    """
+    Linear projection fitted with PCA on a collection's embeddings.
+
+    Vectors are centered, projected onto the top principal components
+    (optionally whitened) and re-normalized, so cosine similarity still
+    applies to the projected vectors.
+    """
+
+    def __init__(
+        self,
+        mean: np.ndarray,
+        components: np.ndarray,
+        model: str,
+        explained_variance: float,
+    ):
+        """
+        Args:
+            mean: Mean of the fitting vectors, shape (input_dim,)
+            components: Projection matrix, shape (input_dim, output_dim)
+            model: Embedding model the projection was fitted for
+            explained_variance: Share of the variance kept by the components
+        """
+        self.mean = mean.astype(np.float32)
+        self.components = np.ascontiguousarray(components, dtype=np.float32)
+        self.model = model
+        self.explained_variance = explained_variance
+
+    @property
+    def input_dim(self) -> int:
+        return self.components.shape[0]
+
+    @property
+    def output_dim(self) -> int:
+        return self.components.shape[1]
+
+    @property
+    def fingerprint(self) -> str:
+        """Hash of the projection matrix (identifies the vector space it produces)."""
+        return hashlib.sha256(self.mean.tobytes() + self.components.tobytes()).hexdigest()[:16]
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray, dim: int, model: str, whiten: bool = False) -> "Projection":
+        """
+        Fit a projection on a sample of normalized embeddings.
+
+        Args:
+            vectors: Sample of shape (n, input_dim)
+            dim: Output dimension
+            model: Embedding model that produced the vectors
+            whiten: Scale each component to unit variance
+
+        Returns:
+            Fitted projection
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if dim >= vectors.shape[1]:
+            raise ValueError(f"Projection dim {dim} must be below the input dim {vectors.shape[1]}")
+        if len(vectors) < dim:
+            raise ValueError(f"Need at least {dim} vectors to fit {dim} components, got {len(vectors)}")
+
+        mean = vectors.mean(axis=0)
+        covariance = np.cov(vectors - mean, rowvar=False)
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        order = np.argsort(eigenvalues)[::-1][:dim]
+
+        components = eigenvectors[:, order]
+        if whiten:
+            components = components / np.sqrt(np.maximum(eigenvalues[order], 1e-12))
+        explained = float(eigenvalues[order].sum() / eigenvalues.sum())
+        return cls(mean, components, model, explained)
+
+    def apply(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Project and re-normalize vectors.
+
+        Args:
+            vectors: Array of shape (n, input_dim)
+
+        Returns:
+            float32 array of shape (n, output_dim)
+        """
+        projected = (np.asarray(vectors, dtype=np.float32) - self.mean) @ self.components
+        norms = np.linalg.norm(projected, axis=1, keepdims=True)
+        return projected / np.maximum(norms, 1e-12)
+
+    def save(self, path: str) -> None:
+        """Write the projection atomically."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            mean=self.mean,
+            components=self.components,
+            model=np.array(self.model),
+            explained_variance=np.array(self.explained_variance),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "Projection":
+        """Read a projection written by ``save``."""
+        with np.load(path) as data:
+            return cls(
+                data["mean"],
+                data["components"],
+                str(data["model"]),
+                float(data["explained_variance"]),
+            )
+
+
+def load_projection(model: str, input_dim: int) -> Optional[Projection]:
+    """
+    Load the stored projection for an embedding model, if there is one.
+
+    Args:
+        model: Embedding model name
+        input_dim: The model's native embedding dimension
+
+    Returns:
+        The projection, or None if no projection has been fitted
+
+    Raises:
+        ValueError: If the projection was fitted for another model
+    """
+    path = projection_path()
+    if not os.path.exists(path):
+        return None
+
+    try:
+        projection = Projection.load(path)
+    except Exception as e:
+        logger.error(f"❌ Failed to load embedding projection from {path}: {e}")
+        raise
+
+    if projection.model != model or projection.input_dim != input_dim:
+        raise ValueError(
+            f"Projection at {path} was fitted for {projection.model} "
+            f"({projection.input_dim} dims), not {model} ({input_dim} dims); "
+            f"run tools/reproject_collection.py"
+        )
+
+    logger.info(
+        f"📐 Projecting embeddings {projection.input_dim} -> {projection.output_dim} dims "
+        f"({projection.explained_variance:.1%} of variance)"
+    )
+    return projection
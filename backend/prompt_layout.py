@@ -0,0 +1,203 @@
+"""Prefix-stable prompt layout for LLM KV-cache reuse."""
+
+import logging
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+
+from config import settings
+from models import Message
+from llm import create_rag_prompt
+from context_packer import ContextPacker, PackedPrompt, context_packer
+from history import (
+    HistoryManager,
+    history_manager,
+    conversation_key,
+    transcript_fingerprint,
+    SUMMARY_HEADER,
+)
+
+logger = logging.getLogger(__name__)
+
+# When the prompt outgrows its budget, old turns are dropped until it fits in
+# this fraction of the budget, so the following turns extend it unchanged
+STABLE_TRIM_RATIO = 0.5
+
+# A summary request replaces the conversation in the KV cache of a
+# single-slot server, so summaries are only requested once the prompt is
+# this close to the budget (the trim breaks the prefix anyway)
+STABLE_SUMMARY_RATIO = 0.8
+
+
+class _Conversation:
+    """Layout state of one conversation."""
+
+    def __init__(self):
+        # Dialogue index -> (content sent by the client, content sent to the LLM)
+        self.augmented: Dict[int, Tuple[str, str]] = {}
+        # First dialogue message sent verbatim; earlier ones are dropped
+        self.start = 0
+        # Summary of exactly the dropped messages (dialogue[:start]), if any
+        self.summary: Optional[str] = None
+        # Length and fingerprint of the dialogue this state was built from
+        self.seen = 0
+        self.fingerprint = transcript_fingerprint([])
+
+    def continues(self, dialogue: List[Message]) -> bool:
+        """Whether ``dialogue`` extends (or repeats) the dialogue seen last."""
+        if len(dialogue) < self.seen:
+            return False
+        return transcript_fingerprint(dialogue[:self.seen]) == self.fingerprint
+
+
+class StablePromptLayout:
+    """
+    Lay out prompts so each turn extends the previous prompt byte for byte.
+
+    The default layout resends earlier user turns as the client sent them,
+    without the context they were answered with, and trims history a little
+    every turn once over budget; both change the prompt before the newest
+    turn, so llama.cpp/LM Studio must prefill it again. Here earlier user
+    turns are resent exactly as the LLM saw them (with their context), new
+    context is only ever added in the newest message, and history is
+    trimmed rarely and in large steps.
+    """
+
+    def __init__(
+        self,
+        packer: ContextPacker = context_packer,
+        history: HistoryManager = history_manager,
+    ):
+        """Initialize with the context packer and history manager to use."""
+        self.packer = packer
+        self.history = history
+        self._conversations: "OrderedDict[str, _Conversation]" = OrderedDict()
+
+    def _state(self, key: str, dialogue: List[Message]) -> _Conversation:
+        """
+        Get the state of a conversation, or a new one.
+
+        Anonymous conversations are keyed by their first question, which
+        different visitors (or an edited conversation) can share, so the
+        stored state is only reused if the dialogue continues it.
+        """
+        state = self._conversations.get(key)
+        if state is None or not state.continues(dialogue):
+            state = self._conversations[key] = _Conversation()
+            while len(self._conversations) > settings.prompt_layout_cache_size:
+                self._conversations.popitem(last=False)
+        self._conversations.move_to_end(key)
+        return state
+
+    @staticmethod
+    def _assemble(
+        system: List[Message],
+        state: _Conversation,
+        dialogue: List[Message],
+    ) -> List[Message]:
+        """System messages, pinned summary and the kept dialogue."""
+        summary = []
+        if state.summary:
+            summary = [Message(role="system", content=f"{SUMMARY_HEADER}\n{state.summary}")]
+        return system + summary + dialogue[state.start:]
+
+    def wants_summary(self, packed: PackedPrompt) -> bool:
+        """
+        Whether to summarize older turns after answering a prompt.
+
+        Args:
+            packed: Prompt the answer was generated for
+
+        Returns:
+            True once the prompt nears the budget, so the summary is ready
+            for the next trim
+        """
+        return packed.prompt_tokens >= settings.prompt_token_budget * STABLE_SUMMARY_RATIO
+
+    def build(
+        self,
+        conversation_id: Optional[str],
+        messages: List[Message],
+        context: List[Dict[str, Any]],
+        question: str,
+    ) -> PackedPrompt:
+        """
+        Build the message list for a chat completion.
+
+        Args:
+            conversation_id: Client conversation ID (optional)
+            messages: Conversation as sent by the client, ending with the
+                user's message
+            context: Retrieved context items, best first
+            question: The user's latest question
+
+        Returns:
+            Packed prompt with the messages to send and tokens saved
+        """
+        try:
+            counter = self.packer.counter
+            system = [msg for msg in messages if msg.role == "system"]
+            dialogue = [msg for msg in messages if msg.role != "system"]
+            latest_index = len(dialogue) - 1
+            state = self._state(conversation_key(conversation_id, messages), dialogue)
+            state.seen, state.fingerprint = len(dialogue), transcript_fingerprint(dialogue)
+
+            # Resend earlier user turns exactly as the LLM saw them
+            sent: List[Message] = []
+            for i, msg in enumerate(dialogue[:-1]):
+                stored = state.augmented.get(i)
+                if msg.role == "user" and stored and stored[0] == msg.content:
+                    sent.append(Message(role="user", content=stored[1]))
+                else:
+                    sent.append(msg)
+
+            packed_context = self.packer.pack_context(context, question)
+            latest = dialogue[-1]
+            if packed_context:
+                latest = Message(role="user", content=create_rag_prompt(packed_context, question))
+            sent.append(latest)
+
+            # A repeated (regenerated) question gets the context retrieved now
+            state.augmented = {i: v for i, v in state.augmented.items() if i < latest_index}
+            if latest.content != dialogue[-1].content:
+                state.augmented[latest_index] = (dialogue[-1].content, latest.content)
+
+            prompt = self._assemble(system, state, sent)
+            if counter.count_messages(prompt) > settings.prompt_token_budget:
+                # Break the prefix once, leaving room for the next turns
+                target = settings.prompt_token_budget * STABLE_TRIM_RATIO
+                summary = self.history.summary_for(conversation_id, messages)
+                state.summary = summary[1] if summary else None
+                while state.start < latest_index:
+                    state.start += 1
+                    while state.start < latest_index and sent[state.start].role != "user":
+                        state.start += 1
+                    if counter.count_messages(self._assemble(system, state, sent)) <= target:
+                        break
+                # The summary must cover exactly the dropped turns: drop up to
+                # its end if it reaches further, leave it out if it falls short
+                if summary and state.start <= summary[0] <= latest_index:
+                    state.start = summary[0]
+                else:
+                    state.summary = None
+                prompt = self._assemble(system, state, sent)
+                logger.info(f"✂️  Prompt prefix reset: dropped {state.start} messages")
+
+            prompt_tokens = counter.count_messages(prompt)
+            tokens_saved = max(
+                self.packer.unpacked_tokens(messages, context, question) - prompt_tokens, 0
+            )
+
+            logger.info(
+                f"📐 Stable prompt: {prompt_tokens} tokens "
+                f"({len(prompt) - 1} earlier messages, {len(packed_context)} passages)"
+            )
+
+            return PackedPrompt(prompt, packed_context, prompt_tokens, tokens_saved)
+
+        except Exception as e:
+            logger.error(f"❌ Failed to lay out prompt: {e}")
+            raise
+
+
+# Global prompt layout instance
+prompt_layout = StablePromptLayout()
@@ -0,0 +1,170 @@
+"""Retrieval service shared by the chat and RAG routes."""
+
+import asyncio
+import logging
+import time
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from config import settings
+from vectordb import vector_db, select_context
+from embeddings import embedding_model
+
+logger = logging.getLogger(__name__)
+
+
+class RetrievalResult:
+    """Context retrieved for one query."""
+
+    def __init__(
+        self,
+        query: str,
+        context: List[Dict[str, Any]],
+        timings: Dict[str, float],
+    ):
+        self.query = query
+        self.context = context
+        self.timings = timings
+
+
+class RetrievalService:
+    """
+    Query encoding, vector search, thresholding and context assembly.
+
+    The blocking work runs in a worker thread so the event loop keeps
+    serving other requests (and streaming responses) while a query is
+    encoded and searched.
+    """
+
+    def __init__(self, db=vector_db, model=embedding_model):
+        """Initialize with the vector store and embedding model to use."""
+        self.db = db
+        self.model = model
+
+    async def retrieve(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        threshold: Optional[float] = None,
+        section_path: Optional[str] = None,
+        embedding: Optional[np.ndarray] = None,
+    ) -> RetrievalResult:
+        """
+        Retrieve context for a single query.
+
+        Args:
+            query: Query text
+            top_k: Maximum number of items (defaults to ``rag_top_k``)
+            threshold: Minimum similarity (defaults to ``rag_similarity_threshold``)
+            section_path: Optional section filter
+            embedding: Query embedding from ``encode_query``, if already computed
+
+        Returns:
+            Retrieval result with context items and timings
+        """
+        results = await self.retrieve_batch(
+            [query], [top_k], [threshold], [section_path],
+            query_embeddings=None if embedding is None else embedding[np.newaxis],
+        )
+        return results[0]
+
+    async def encode_query(self, query: str) -> np.ndarray:
+        """Encode a query off the event loop, for reuse with ``retrieve``."""
+        return await asyncio.to_thread(self.model.encode_query, query)
+
+    async def retrieve_batch(
+        self,
+        queries: List[str],
+        top_ks: Optional[List[Optional[int]]] = None,
+        thresholds: Optional[List[Optional[float]]] = None,
+        section_paths: Optional[List[Optional[str]]] = None,
+        query_embeddings: Optional[np.ndarray] = None,
+    ) -> List[RetrievalResult]:
+        """
+        Retrieve context for many queries in one model call.
+
+        Args:
+            queries: Query texts
+            top_ks: Per-query maximum number of items (None for the default)
+            thresholds: Per-query minimum similarity (None for the default)
+            section_paths: Per-query section filter (None for no filter)
+            query_embeddings: Precomputed query embeddings (encoded here if None)
+
+        Returns:
+            Retrieval results in query order
+        """
+        n = len(queries)
+        return await asyncio.to_thread(
+            self._retrieve_batch,
+            queries,
+            [k or settings.rag_top_k for k in (top_ks or [None] * n)],
+            [t or settings.rag_similarity_threshold for t in (thresholds or [None] * n)],
+            section_paths or [None] * n,
+            query_embeddings,
+        )
+
+    def _retrieve_batch(
+        self,
+        queries: List[str],
+        top_ks: List[int],
+        thresholds: List[float],
+        section_paths: List[Optional[str]],
+        query_embeddings: Optional[np.ndarray] = None,
+    ) -> List[RetrievalResult]:
+        """Blocking implementation of ``retrieve_batch``."""
+        try:
+            start = time.perf_counter()
+
+            if not queries or not self.db.has_documents:
+                if queries:
+                    logger.info("ℹ️  No documents in collection, skipping retrieval")
+                return [RetrievalResult(q, [], {"total_ms": 0.0}) for q in queries]
+
+            if query_embeddings is None:
+                query_embeddings = self.model.encode_queries(queries)
+            encoded = time.perf_counter()
+
+            # One vector search per distinct filter (usually exactly one)
+            groups: Dict[Optional[str], List[int]] = {}
+            for i, section_path in enumerate(section_paths):
+                groups.setdefault(section_path, []).append(i)
+
+            context: List[List[Dict[str, Any]]] = [[] for _ in queries]
+            for section_path, indices in groups.items():
+                group_top_ks = [top_ks[i] for i in indices]
+                results = self.db.query(
+                    query_embeddings=query_embeddings[indices],
+                    n_results=max(group_top_ks),
+                    where={"section_path": section_path} if section_path else None,
+                )
+                selected = select_context(
+                    results,
+                    self.db.space,
+                    group_top_ks,
+                    [thresholds[i] for i in indices],
+                )
+                for i, items in zip(indices, selected):
+                    context[i] = items
+            searched = time.perf_counter()
+
+            timings = {
+                "encode_ms": round((encoded - start) * 1000, 2),
+                "search_ms": round((searched - encoded) * 1000, 2),
+                "total_ms": round((searched - start) * 1000, 2),
+            }
+            logger.info(
+                f"🔍 Retrieved {sum(len(items) for items in context)} context items "
+                f"for {len(queries)} queries (encode {timings['encode_ms']} ms, "
+                f"search {timings['search_ms']} ms)"
+            )
+
+            return [RetrievalResult(q, items, timings) for q, items in zip(queries, context)]
+
+        except Exception as e:
+            logger.error(f"❌ Retrieval failed: {e}")
+            raise
+
+
+# Global retrieval service instance
+retrieval_service = RetrievalService()
@@ -1,14 +1,24 @@
 """RAG-enabled chat API routes."""
 
+import asyncio
 import logging
 import json
-from fastapi import APIRouter, HTTPException
+import os
+import anyio
+import numpy as np
+from typing import AsyncGenerator, Awaitable, Callable, List, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import StreamingResponse
 
-from models import ChatRequest, Message
+from models import ChatRequest
+from llm import llm_client
+from retrieval import retrieval_service
+from context_packer import context_packer, PackedPrompt
+from history import history_manager
+from prompt_layout import prompt_layout
+from completion_cache import completion_cache, completion_key, replay
+from warm_cache import warm_cache, WarmAnswer
 from vectordb import vector_db
-from embeddings import embedding_model
-from llm import llm_client, create_rag_prompt
 from config import settings
 
 logger = logging.getLogger(__name__)
@@ -16,111 +26,325 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-@router.post("/completions")
-async def chat_with_rag(request: ChatRequest):
+class GenerationStats:
+    """Counters for streamed completions and client cancellations."""
+
+    def __init__(self):
+        self.completed = 0
+        self.cancelled = 0
+        self.completed_tokens = 0
+        self.cancelled_tokens = 0
+        self.tokens_saved = 0
+
+    @property
+    def average_completion_tokens(self) -> float:
+        """Mean length of completions that ran to the end."""
+        return self.completed_tokens / self.completed if self.completed else 0.0
+
+    def record(self, tokens: int, cancelled: bool) -> int:
+        """
+        Record one finished stream.
+
+        Args:
+            tokens: Tokens streamed before the stream ended
+            cancelled: Whether the client disconnected first
+
+        Returns:
+            Estimated tokens saved by the cancellation
+        """
+        if not cancelled:
+            self.completed += 1
+            self.completed_tokens += tokens
+            return 0
+
+        # Assume the answer would have been as long as an average one
+        saved = max(round(self.average_completion_tokens) - tokens, 0)
+        self.cancelled += 1
+        self.cancelled_tokens += tokens
+        self.tokens_saved += saved
+        return saved
+
+
+# Global generation stats instance
+generation_stats = GenerationStats()
+
+
+class ClientDisconnected(Exception):
+    """The client closed the connection while a response was streaming."""
+
+
+async def _wait_for_disconnect(http_request: Request) -> None:
+    """Return once the client has disconnected."""
+    while True:
+        message = await http_request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def _stream_until_disconnect(
+    http_request: Request,
+    chunks: AsyncGenerator[str, None],
+) -> AsyncGenerator[str, None]:
     """
-    Chat endpoint with RAG support.
+    Relay chunks until the upstream ends or the client disconnects.
 
-    This endpoint:
-    1. Takes the user's latest message
-    2. If RAG is enabled, retrieves relevant context from vector database
-    3. Constructs a prompt with context
-    4. Calls LM Studio for completion
-    5. Streams the response back to the client
+    The upstream generator is closed as soon as the client goes away, even
+    while waiting for the first token, so the LLM stops generating.
+
+    Raises:
+        ClientDisconnected: If the client disconnected first
     """
+    disconnect = asyncio.ensure_future(_wait_for_disconnect(http_request))
+    next_chunk = None
     try:
-        logger.info(f"💬 Chat request (RAG: {request.use_rag})")
+        while True:
+            next_chunk = asyncio.ensure_future(chunks.__anext__())
+            await asyncio.wait({next_chunk, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+            if not next_chunk.done():
+                raise ClientDisconnected()
 
-        # Get the latest user message
-        user_messages = [msg for msg in request.messages if msg.role == "user"]
-        if not user_messages:
-            raise HTTPException(
-                status_code=400,
-                detail="No user message found"
-            )
+            try:
+                chunk = next_chunk.result()
+            except StopAsyncIteration:
+                return
+            yield chunk
+    finally:
+        disconnect.cancel()
+        # Shielded: the server may be cancelling this task at the same time
+        with anyio.CancelScope(shield=True):
+            if next_chunk is not None and not next_chunk.done():
+                next_chunk.cancel()
+                await asyncio.gather(next_chunk, return_exceptions=True)
+            await chunks.aclose()
 
-        latest_message = user_messages[-1].content
-        logger.info(f"  User: {latest_message[:50]}...")
 
-        # Prepare messages for LLM
-        messages = list(request.messages)
+async def match_warm_answer(
+    request: ChatRequest,
+) -> Tuple[Optional[WarmAnswer], Optional[np.ndarray]]:
+    """
+    Look up a first-turn question in the warm answer cache.
 
-        # If RAG is enabled, retrieve context and modify the latest message
-        if request.use_rag:
-            doc_count = vector_db.count()
+    Only single-question RAG requests are matched: a follow-up depends on
+    the earlier turns, which the precomputed answers never saw. The answers
+    were generated as default streaming requests, so requests that ask for
+    a plain response or other sampling settings are not matched either.
 
-            if doc_count > 0:
-                logger.info("🔍 Retrieving RAG context...")
+    Args:
+        request: Chat request
 
-                # Get top_k from request or use default
-                top_k = request.top_k or settings.rag_top_k
+    Returns:
+        The warm answer (None on a miss or when not applicable) and the
+        query embedding, which ``build_prompt`` reuses on a miss
+    """
+    if warm_cache is None or not request.use_rag or not request.stream:
+        return None, None
+    defaults = ChatRequest.model_fields
+    if (request.temperature, request.top_k) != (
+        defaults["temperature"].default, defaults["top_k"].default
+    ):
+        return None, None
+    dialogue = [msg for msg in request.messages if msg.role != "system"]
+    if [msg.role for msg in dialogue] != ["user"]:
+        return None, None
 
-                # Generate query embedding
-                query_embedding = embedding_model.encode_query(latest_message)
+    # System messages may come after the question; match the question itself
+    embedding = await retrieval_service.encode_query(dialogue[0].content)
+    warm = await asyncio.to_thread(lambda: warm_cache.match(embedding, vector_db.generation))
+    if warm is not None:
+        logger.info(f"🔥 Warm answer hit (similarity {warm.similarity:.3f}): {warm.prompt[:50]}")
+    return warm, embedding
 
-                # Query vector database
-                results = vector_db.query(
-                    query_embeddings=[query_embedding],
-                    n_results=top_k,
-                )
 
-                # Build context items
-                context_items = []
-                threshold = settings.rag_similarity_threshold
+async def build_prompt(
+    request: ChatRequest,
+    embedding: Optional[np.ndarray] = None,
+) -> PackedPrompt:
+    """
+    Retrieve context and lay out the messages to send to the LLM.
 
-                for i in range(len(results["ids"][0])):
-                    document = results["documents"][0][i]
-                    metadata = results["metadatas"][0][i]
-                    distance = results["distances"][0][i]
+    Args:
+        request: Chat request
+        embedding: Embedding of the latest user message, if already computed
 
-                    # Convert distance to similarity
-                    similarity = 1 - (distance ** 2 / 2)
+    Returns:
+        Packed prompt for the configured prompt layout
 
-                    if similarity >= threshold:
-                        context_items.append({
-                            "content": document,
-                            "metadata": metadata,
-                            "score": similarity,
-                        })
+    Raises:
+        HTTPException: If the request has no user message
+    """
+    # Get the latest user message
+    user_messages = [msg for msg in request.messages if msg.role == "user"]
+    if not user_messages:
+        raise HTTPException(
+            status_code=400,
+            detail="No user message found"
+        )
+
+    latest_message = user_messages[-1].content
+    logger.info(f"  User: {latest_message[:50]}...")
 
-                if context_items:
-                    logger.info(f"  ✅ Retrieved {len(context_items)} context items")
+    # If RAG is enabled, retrieve context for the latest message
+    context_items = []
+    if request.use_rag:
+        logger.info("🔍 Retrieving RAG context...")
+        result = await retrieval_service.retrieve(
+            latest_message, top_k=request.top_k, embedding=embedding
+        )
+        context_items = result.context
 
-                    # Create RAG prompt
-                    rag_prompt = create_rag_prompt(context_items, latest_message)
+        if context_items:
+            logger.info(f"  ✅ Retrieved {len(context_items)} context items")
+        else:
+            logger.info("  ℹ️  No relevant context found")
+
+    if settings.prompt_layout == "stable":
+        # Extend the previous prompt so the LLM can reuse its KV cache
+        return prompt_layout.build(
+            request.conversation_id, request.messages, context_items, latest_message
+        )
+
+    # Replace summarized older turns, then fit everything into the budget
+    history = history_manager.compact(request.conversation_id, request.messages)
+    return context_packer.pack(history, context_items, latest_message)
+
+
+def schedule_summary(request: ChatRequest, packed: Optional[PackedPrompt]) -> None:
+    """
+    Summarize older turns in the background when the prompt layout needs it.
 
-                    # Replace the latest user message with RAG prompt
-                    messages[-1] = Message(role="user", content=rag_prompt)
-                else:
-                    logger.info("  ℹ️  No relevant context found (below threshold)")
-            else:
-                logger.info("  ℹ️  No documents in collection, skipping RAG")
+    The stable layout only uses a summary when it trims the prompt, so it
+    defers the summary request (which evicts the conversation from the
+    LLM's KV cache) until the prompt nears the budget.
+
+    Args:
+        request: Chat request that was answered
+        packed: Prompt that was sent (None for a warm answer)
+    """
+    if settings.prompt_layout == "stable" and (
+        packed is None or not prompt_layout.wants_summary(packed)
+    ):
+        return
+    history_manager.schedule_summary(request.conversation_id, request.messages)
+
+
+async def _keep_uncached(chunks: List[str]) -> None:
+    """Store callback for answers that are already cached."""
+
+
+async def open_completion(
+    request: ChatRequest,
+    packed: Optional[PackedPrompt],
+    warm: Optional[WarmAnswer] = None,
+    paced: bool = True,
+) -> Tuple[AsyncGenerator[str, None], Callable[[List[str]], Awaitable[None]]]:
+    """
+    Start a completion, replayed from the completion cache when possible.
+
+    Args:
+        request: Chat request (stream and temperature settings)
+        packed: Prompt to send to the LLM (unused for a warm answer)
+        warm: Warm answer to replay instead of generating
+        paced: Replay cached answers at streaming pace (off when the
+            chunks are consumed by the server, not shown to the user)
+
+    Returns:
+        The chunk stream, and a coroutine function that caches the chunks
+        of a stream that ran to the end
+    """
+    if warm is not None:
+        return replay(warm.chunks, paced), _keep_uncached
+
+    messages = packed.messages
+    generation = vector_db.generation
+    cache_key = None
+    if completion_cache is not None:
+        cache_key = completion_key(
+            messages, llm_client.model, request.temperature, request.stream, generation
+        )
+        # SQLite lookups block; keep them off the event loop
+        cached = await asyncio.to_thread(completion_cache.get, cache_key, generation)
+        if cached is not None:
+            logger.info(f"♻️  Completion cache hit ({len(cached)} chunks)")
+            return replay(cached, paced), _keep_uncached
+
+    async def store(chunks: List[str]) -> None:
+        if cache_key is not None and chunks:
+            await asyncio.to_thread(completion_cache.put, cache_key, generation, chunks)
+
+    upstream = llm_client.chat_completion(
+        messages=messages, stream=request.stream, temperature=request.temperature
+    )
+    return upstream, store
+
+
+@router.post("/completions")
+async def chat_with_rag(request: ChatRequest, http_request: Request):
+    """
+    Chat endpoint with RAG support.
+
+    This endpoint:
+    1. Takes the user's latest message
+    2. If RAG is enabled, retrieves relevant context from vector database
+    3. Constructs a prompt with context within the token budget
+    4. Calls LM Studio for completion
+    5. Streams the response back to the client
+    """
+    try:
+        logger.info(f"💬 Chat request (RAG: {request.use_rag})")
+
+        warm, embedding = await match_warm_answer(request)
+        packed = await build_prompt(request, embedding) if warm is None else None
 
         # Stream response from LLM
         async def generate():
+            tokens = 0
+            collected = []
+            upstream, store = await open_completion(request, packed, warm)
             try:
-                async for chunk in llm_client.chat_completion(
-                    messages=messages,
-                    stream=request.stream,
-                ):
+                async for chunk in _stream_until_disconnect(http_request, upstream):
+                    tokens += 1
+                    collected.append(chunk)
                     # Format as SSE (Server-Sent Events)
                     yield f"data: {chunk}\n\n"
 
+                generation_stats.record(tokens, cancelled=False)
+                await store(collected)
+
                 # Send done signal
                 yield "data: [DONE]\n\n"
 
+                # Summarize older turns while the user reads the answer
+                schedule_summary(request, packed)
+
+            except (ClientDisconnected, asyncio.CancelledError) as e:
+                # The server may also cancel the response task on disconnect
+                saved = generation_stats.record(tokens, cancelled=True)
+                logger.info(
+                    f"🔌 Client disconnected after {tokens} tokens, "
+                    f"generation cancelled (~{saved} tokens saved)"
+                )
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+
             except Exception as e:
                 logger.error(f"❌ Error in streaming: {e}")
                 error_data = json.dumps({"error": str(e)})
                 yield f"data: {error_data}\n\n"
 
+        headers = {
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+        }
+        if warm is not None:
+            headers["X-Warm-Answer-Similarity"] = f"{warm.similarity:.3f}"
+        else:
+            headers["X-Prompt-Tokens"] = str(packed.prompt_tokens)
+            headers["X-Prompt-Tokens-Saved"] = str(packed.tokens_saved)
+
         return StreamingResponse(
             generate(),
             media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-            },
+            headers=headers,
         )
 
     except HTTPException:
@@ -131,3 +355,26 @@ async def chat_with_rag(request: ChatRequest):
             status_code=500,
             detail=f"Chat request failed: {str(e)}"
         )
+
+
+@router.get("/stats")
+async def get_chat_stats():
+    """Get streaming and cancellation statistics (of the worker that answers)."""
+    def cache_stats():
+        return (
+            completion_cache.stats() if completion_cache is not None else None,
+            warm_cache.stats(vector_db.generation) if warm_cache is not None else None,
+        )
+
+    # Both caches read SQLite or the store generation; keep that off the event loop
+    completion_stats, warm_stats = await asyncio.to_thread(cache_stats)
+    return {
+        "worker_pid": os.getpid(),
+        "completed_streams": generation_stats.completed,
+        "cancelled_streams": generation_stats.cancelled,
+        "average_completion_tokens": round(generation_stats.average_completion_tokens, 1),
+        "tokens_streamed_before_cancel": generation_stats.cancelled_tokens,
+        "tokens_saved_by_cancellation": generation_stats.tokens_saved,
+        "completion_cache": completion_stats,
+        "warm_cache": warm_stats,
+    }
@@ -9,8 +9,10 @@ from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
 from models import DocumentUploadResponse, DocumentListResponse
-from vectordb import vector_db
+from vectordb import vector_db, COLLECTION_SPACE
 from embeddings import embedding_model
+from store_maintenance import new_snapshot_path
+from knowledge_pack import import_pack, resolve_pack_path
 from text_processing import (
     extract_text_from_file,
     create_chunks_with_metadata,
@@ -25,6 +27,11 @@ router = APIRouter()
 TEMPLATES_DIR = Path(__file__).parent.parent / "templates"
 
 
+class PackImportRequest(BaseModel):
+    """ナレッジパック読み込みのリクエストモデル"""
+    path: str
+
+
 class TextUploadRequest(BaseModel):
     """テキスト直接アップロードのリクエストモデル"""
     text: str
@@ -245,6 +252,98 @@ async def reset_collection():
         )
 
 
+@router.post("/migrate-space")
+def migrate_collection_space(space: str = COLLECTION_SPACE):
+    """
+    Rebuild the collection in another distance space without re-embedding.
+
+    Runs in a worker thread; the current collection keeps serving queries
+    until the rebuilt one replaces it.
+    """
+    try:
+        # The store service checks the backend itself
+        if not hasattr(vector_db, "migrate_space"):
+            raise HTTPException(
+                status_code=400,
+                detail="Space migration is only supported for the chroma backend"
+            )
+        if space not in ("cosine", "ip", "l2"):
+            raise HTTPException(status_code=400, detail=f"Unsupported space: {space}")
+
+        count = vector_db.migrate_space(space)
+
+        return {
+            "success": True,
+            "space": vector_db.space,
+            "total_chunks": count,
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Failed to migrate collection: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to migrate collection: {str(e)}"
+        )
+
+
+@router.post("/compact")
+def compact_collection(snapshot: bool = False):
+    """
+    Compact the vector store and optionally write a snapshot.
+
+    Rebuilds the index without deleted chunks and reclaims their disk
+    space, without re-embedding. Reports on-disk size and cold open time
+    before and after. With ``snapshot``, a self-contained copy is written
+    under ``snapshot_dir`` for tools/compact_store.py --restore.
+    """
+    try:
+        report = vector_db.compact()
+        if snapshot:
+            report["snapshot"] = vector_db.snapshot(new_snapshot_path())
+
+        return {
+            "success": True,
+            **report,
+        }
+
+    except Exception as e:
+        logger.error(f"❌ Failed to compact collection: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to compact collection: {str(e)}"
+        )
+
+
+@router.post("/import-pack")
+def import_knowledge_pack(request: PackImportRequest):
+    """
+    Import a knowledge pack from a directory under ``knowledge_pack_dir``.
+
+    Adds the pack's stored embeddings in bulk without calling the embedding
+    model; files already in the store are replaced. Packs that would change
+    the embedding projection must be imported with the server stopped.
+    """
+    try:
+        path = resolve_pack_path(request.path)
+        report = import_pack(vector_db, path, allow_projection_change=False)
+
+        return {
+            "success": True,
+            **report,
+        }
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ Failed to import knowledge pack: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to import knowledge pack: {str(e)}"
+        )
+
+
 @router.get("/count")
 async def get_document_count():
     """Get total document count in the collection."""
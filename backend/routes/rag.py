@@ -3,9 +3,16 @@
 import logging
 from fastapi import APIRouter, HTTPException
 
-from models import RAGQueryRequest, RAGQueryResponse, ContextItem
+from models import (
+    RAGQueryRequest,
+    RAGQueryResponse,
+    RAGBatchQueryRequest,
+    RAGBatchQueryResponse,
+    ContextItem,
+)
 from vectordb import vector_db
 from embeddings import embedding_model
+from retrieval import retrieval_service, RetrievalResult
 from config import settings
 
 logger = logging.getLogger(__name__)
@@ -13,6 +20,24 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+def _to_response(result: RetrievalResult) -> RAGQueryResponse:
+    """Convert a retrieval result into the API response model."""
+    context_items = [
+        ContextItem(
+            content=item["content"],
+            metadata=item["metadata"],
+            score=round(item["score"], 4),
+        )
+        for item in result.context
+    ]
+    return RAGQueryResponse(
+        context=context_items,
+        query=result.query,
+        retrieved_count=len(context_items),
+        timings=result.timings,
+    )
+
+
 @router.post("/query", response_model=RAGQueryResponse)
 async def query_rag(request: RAGQueryRequest):
     """
@@ -27,74 +52,50 @@ async def query_rag(request: RAGQueryRequest):
     try:
         logger.info(f"🔍 RAG query: {request.query[:50]}...")
 
-        # Use provided parameters or defaults from settings
-        top_k = request.top_k or settings.rag_top_k
-        threshold = request.threshold or settings.rag_similarity_threshold
-
-        # Check if collection is empty
-        doc_count = vector_db.count()
-        if doc_count == 0:
-            logger.warning("⚠️  No documents in collection")
-            return RAGQueryResponse(
-                context=[],
-                query=request.query,
-                retrieved_count=0,
-            )
-
-        # Generate query embedding
-        logger.debug("🔢 Generating query embedding...")
-        query_embedding = embedding_model.encode_query(request.query)
-
-        # Query vector database
-        results = vector_db.query(
-            query_embeddings=[query_embedding],
-            n_results=top_k,
+        result = await retrieval_service.retrieve(
+            request.query,
+            top_k=request.top_k,
+            threshold=request.threshold,
+            section_path=request.section_path,
         )
 
-        # Process results
-        context_items = []
-        for i in range(len(results["ids"][0])):
-            doc_id = results["ids"][0][i]
-            document = results["documents"][0][i]
-            metadata = results["metadatas"][0][i]
-            distance = results["distances"][0][i]
-
-            # Convert distance to similarity score (cosine similarity)
-            # ChromaDB returns L2 distance for normalized vectors
-            # similarity = 1 - (distance^2 / 2)
-            similarity = 1 - (distance ** 2 / 2)
-
-            # Filter by threshold
-            if similarity >= threshold:
-                context_items.append(
-                    ContextItem(
-                        content=document,
-                        metadata=metadata,
-                        score=round(similarity, 4),
-                    )
-                )
-                logger.debug(
-                    f"  📄 {metadata.get('filename', 'unknown')} "
-                    f"(chunk {metadata.get('chunk_index', '?')}) "
-                    f"- score: {similarity:.4f}"
-                )
-
-        logger.info(
-            f"✅ Retrieved {len(context_items)} context items "
-            f"(threshold: {threshold})"
+        return _to_response(result)
+
+    except Exception as e:
+        logger.error(f"❌ RAG query failed: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"RAG query failed: {str(e)}"
         )
 
-        return RAGQueryResponse(
-            context=context_items,
-            query=request.query,
-            retrieved_count=len(context_items),
+
+@router.post("/query-batch", response_model=RAGBatchQueryResponse)
+async def query_rag_batch(request: RAGBatchQueryRequest):
+    """
+    Query the RAG system with many queries at once.
+
+    All queries are encoded in one model call and searched with one vector
+    database query per distinct section filter. Results are returned in
+    request order, each honoring its own top_k and threshold.
+    """
+    try:
+        queries = request.queries
+        logger.info(f"🔍 RAG batch query: {len(queries)} queries")
+
+        results = await retrieval_service.retrieve_batch(
+            [q.query for q in queries],
+            top_ks=[q.top_k for q in queries],
+            thresholds=[q.threshold for q in queries],
+            section_paths=[q.section_path for q in queries],
         )
 
+        return RAGBatchQueryResponse(results=[_to_response(result) for result in results])
+
     except Exception as e:
-        logger.error(f"❌ RAG query failed: {e}")
+        logger.error(f"❌ RAG batch query failed: {e}")
         raise HTTPException(
             status_code=500,
-            detail=f"RAG query failed: {str(e)}"
+            detail=f"RAG batch query failed: {str(e)}"
         )
 
 
@@ -0,0 +1,167 @@
+"""Sentence-pipelined TTS API routes."""
+
+import asyncio
+import base64
+import json
+import logging
+import time
+import anyio
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from models import TTSChatRequest
+from tts import SentenceSplitter, voicevox_client
+from config import settings
+from routes.chat import (
+    build_prompt,
+    match_warm_answer,
+    open_completion,
+    schedule_summary,
+    _stream_until_disconnect,
+    ClientDisconnected,
+    generation_stats,
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def chunk_text(chunk: str) -> str:
+    """Extract the generated text from an LM Studio stream chunk."""
+    try:
+        choice = json.loads(chunk)["choices"][0]
+    except (ValueError, KeyError, IndexError):
+        return ""
+    # Streaming chunks carry a delta, a non-streaming response the message
+    part = choice.get("delta") or choice.get("message") or {}
+    return part.get("content") or ""
+
+
+@router.post("/chat")
+async def chat_with_tts(request: TTSChatRequest, http_request: Request):
+    """
+    Chat endpoint that streams the answer as VOICEVOX audio, sentence by sentence.
+
+    The LLM response is split at 。！？ while it is still being generated;
+    each finished sentence is synthesized right away (a few at a time) and
+    the audio segments are streamed back in order as SSE events:
+    ``{"type": "audio", "index", "text", "audio" (base64 WAV), "cached",
+    "elapsed_ms"}``, or ``{"type": "error", ...}`` for a sentence that
+    failed, followed by ``[DONE]``.
+    """
+    try:
+        logger.info(f"🔊 TTS chat request (RAG: {request.use_rag})")
+
+        warm, embedding = await match_warm_answer(request)
+        packed = await build_prompt(request, embedding) if warm is None else None
+        speaker = request.speaker if request.speaker is not None else settings.voicevox_speaker_id
+
+        async def generate():
+            start = time.perf_counter()
+            # Synthesis tasks in sentence order; None once the answer is complete
+            segments: asyncio.Queue = asyncio.Queue()
+            tasks = []
+
+            def schedule(sentence: str) -> None:
+                task = asyncio.create_task(voicevox_client.synthesize(sentence, speaker))
+                tasks.append(task)
+                segments.put_nowait((sentence, task))
+
+            async def produce() -> None:
+                upstream, store = await open_completion(request, packed, warm, paced=False)
+                splitter = SentenceSplitter()
+                tokens = 0
+                collected = []
+                try:
+                    try:
+                        async for chunk in _stream_until_disconnect(http_request, upstream):
+                            tokens += 1
+                            collected.append(chunk)
+                            for sentence in splitter.feed(chunk_text(chunk)):
+                                schedule(sentence)
+                    except (ClientDisconnected, asyncio.CancelledError):
+                        # Generation stops on disconnect, as for /api/chat streams
+                        saved = generation_stats.record(tokens, cancelled=True)
+                        logger.info(
+                            f"🔌 TTS generation cancelled after {tokens} tokens (~{saved} tokens saved)"
+                        )
+                        raise
+                    generation_stats.record(tokens, cancelled=False)
+
+                    rest = splitter.flush()
+                    if rest:
+                        schedule(rest)
+                    await store(collected)
+                    schedule_summary(request, packed)
+                finally:
+                    segments.put_nowait(None)
+
+            producer = asyncio.create_task(produce())
+            first_audio_ms: Optional[float] = None
+            try:
+                index = 0
+                while (segment := await segments.get()) is not None:
+                    sentence, task = segment
+                    try:
+                        audio, cached = await task
+                        elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+                        if first_audio_ms is None:
+                            first_audio_ms = elapsed_ms
+                            logger.info(f"🔊 First audio after {first_audio_ms} ms")
+                        event = {
+                            "type": "audio",
+                            "index": index,
+                            "text": sentence,
+                            "audio": base64.b64encode(audio).decode("ascii"),
+                            "cached": cached,
+                            "elapsed_ms": elapsed_ms,
+                        }
+                    except Exception as e:
+                        logger.error(f"❌ Synthesis failed for sentence {index}: {e}")
+                        event = {"type": "error", "index": index, "text": sentence, "error": str(e)}
+                    yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+                    index += 1
+
+                # Raise errors from the LLM stream
+                await producer
+                logger.info(f"✅ TTS answer: {index} sentences")
+                yield "data: [DONE]\n\n"
+
+            except ClientDisconnected:
+                logger.info("🔌 Client disconnected, TTS answer cancelled")
+
+            except asyncio.CancelledError:
+                logger.info("🔌 Client disconnected, TTS answer cancelled")
+                raise
+
+            except Exception as e:
+                logger.error(f"❌ Error in TTS streaming: {e}")
+                yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+
+            finally:
+                producer.cancel()
+                for task in tasks:
+                    task.cancel()
+                # Shielded: the server may be cancelling this task at the same time
+                with anyio.CancelScope(shield=True):
+                    await asyncio.gather(producer, *tasks, return_exceptions=True)
+
+        return StreamingResponse(
+            generate(),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive",
+            },
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ TTS chat request failed: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"TTS chat request failed: {str(e)}"
+        )
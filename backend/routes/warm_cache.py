@@ -0,0 +1,193 @@
+"""Warm answer cache API routes and warm-up job."""
+
+import asyncio
+import logging
+import time
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException
+
+from models import ChatRequest, Message
+from llm import llm_client
+from retrieval import retrieval_service
+from tts import SentenceSplitter, voicevox_client
+from vectordb import vector_db
+from warm_cache import warm_cache, load_canonical_prompts
+from config import settings
+from routes.chat import build_prompt
+from routes.tts import chunk_text
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+class WarmUpStatus:
+    """Progress of the latest warm-up run."""
+
+    def __init__(self):
+        self.start(0)
+        self.running = False
+        self.started_at = None
+
+    def start(self, total: int) -> None:
+        """Reset the counters for a new run."""
+        self.running = True
+        self.total = total
+        self.warmed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.pruned = 0
+        self.started_at: Optional[float] = time.time()
+        self.finished_at: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        """Status as a JSON-serializable dict."""
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round((self.finished_at or time.time()) - self.started_at, 1)
+        return {
+            "running": self.running,
+            "total": self.total,
+            "warmed": self.warmed,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "pruned": self.pruned,
+            "elapsed_s": elapsed,
+        }
+
+
+# Global warm-up status instance
+warm_up_status = WarmUpStatus()
+
+
+async def warm_prompt(prompt: str, audio: bool, generation: int) -> None:
+    """
+    Answer one canonical prompt and store it in the warm answer cache.
+
+    Runs the same retrieval and prompt layout as a first-turn chat request,
+    generates the answer, and (with ``audio``) synthesizes its sentences so
+    the TTS endpoint finds them in the audio cache.
+    """
+    request = ChatRequest(messages=[Message(role="user", content=prompt)])
+    embedding = await retrieval_service.encode_query(prompt)
+    packed = await build_prompt(request, embedding)
+
+    chunks = [
+        chunk
+        async for chunk in llm_client.chat_completion(
+            messages=packed.messages, stream=True, temperature=request.temperature
+        )
+    ]
+
+    if audio:
+        splitter = SentenceSplitter()
+        sentences = splitter.feed("".join(chunk_text(chunk) for chunk in chunks))
+        rest = splitter.flush()
+        if rest:
+            sentences.append(rest)
+        speaker = settings.voicevox_speaker_id
+        await asyncio.gather(*(voicevox_client.synthesize(s, speaker) for s in sentences))
+
+    await asyncio.to_thread(warm_cache.put, prompt, embedding, generation, chunks, audio)
+
+
+async def warm_up(
+    prompts: Optional[List[str]] = None,
+    audio: bool = settings.warm_cache_audio,
+    force: bool = False,
+) -> dict:
+    """
+    Precompute answers for the canonical prompts.
+
+    Prompts that already have an answer for the current vector store
+    generation are skipped unless ``force`` is set; entries for prompts no
+    longer in the list are removed.
+
+    Args:
+        prompts: Prompts to warm (defaults to ``warm_prompts_path``)
+        audio: Also synthesize the answers with VOICEVOX
+        force: Regenerate fresh entries too
+
+    Returns:
+        Warm-up status
+    """
+    status = warm_up_status
+    if prompts is None:
+        prompts = load_canonical_prompts()
+
+    status.start(len(prompts))
+    logger.info(f"🔥 Warming {len(prompts)} canonical prompts (audio: {audio})")
+
+    try:
+        status.pruned = await asyncio.to_thread(warm_cache.prune, prompts)
+        for prompt in prompts:
+            generation = await asyncio.to_thread(lambda: vector_db.generation)
+            if not force and await asyncio.to_thread(warm_cache.is_fresh, prompt, generation, audio):
+                status.skipped += 1
+                continue
+
+            try:
+                await warm_prompt(prompt, audio, generation)
+                status.warmed += 1
+            except Exception as e:
+                logger.error(f"❌ Warm-up failed for '{prompt[:30]}': {e}")
+                status.failed += 1
+
+        logger.info(
+            f"✅ Warm-up done: {status.warmed} warmed, {status.skipped} fresh, "
+            f"{status.failed} failed"
+        )
+        return status.to_dict()
+
+    except Exception as e:
+        logger.error(f"❌ Warm-up failed: {e}")
+        raise
+
+    finally:
+        status.running = False
+        status.finished_at = time.time()
+
+
+# Background warm-up task started by the API (kept so it is not garbage collected)
+_warm_up_task: Optional[asyncio.Task] = None
+
+
+@router.get("")
+async def get_warm_cache():
+    """Get warm answer cache statistics and warm-up progress."""
+    generation = await asyncio.to_thread(lambda: vector_db.generation)
+    return {
+        "enabled": warm_cache is not None,
+        "prompts_path": settings.warm_prompts_path,
+        "similarity_threshold": settings.warm_cache_similarity,
+        "cache": warm_cache.stats(generation) if warm_cache is not None else None,
+        "warm_up": warm_up_status.to_dict(),
+    }
+
+
+@router.post("/warm-up")
+async def start_warm_up(force: bool = False, audio: Optional[bool] = None):
+    """
+    Start warming the canonical prompts in the background.
+
+    Args:
+        force: Regenerate answers that are already fresh
+        audio: Synthesize the answers too (defaults to ``warm_cache_audio``)
+    """
+    global _warm_up_task
+
+    if warm_cache is None:
+        raise HTTPException(status_code=400, detail="Warm answer cache is disabled (WARM_CACHE_ENABLED)")
+    if warm_up_status.running:
+        raise HTTPException(status_code=409, detail="Warm-up already running")
+
+    try:
+        prompts = load_canonical_prompts()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load canonical prompts: {str(e)}")
+
+    audio = settings.warm_cache_audio if audio is None else audio
+    _warm_up_task = asyncio.create_task(warm_up(prompts, audio, force))
+    # Let the task mark itself as running before reporting the status
+    await asyncio.sleep(0)
+    return warm_up_status.to_dict()
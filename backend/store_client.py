@@ -0,0 +1,254 @@
+"""Clients for the store service used by API workers in multi-worker mode."""
+
+import base64
+import logging
+import threading
+import time
+from typing import List, Dict, Any, Optional
+
+import httpx
+import numpy as np
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def encode_array(array: np.ndarray) -> Dict[str, Any]:
+    """Serialize a float32 matrix for JSON transport."""
+    array = np.ascontiguousarray(array, dtype=np.float32)
+    return {
+        "shape": list(array.shape),
+        "data": base64.b64encode(array.tobytes()).decode("ascii"),
+    }
+
+
+def decode_array(payload: Dict[str, Any]) -> np.ndarray:
+    """Inverse of ``encode_array``."""
+    data = base64.b64decode(payload["data"])
+    return np.frombuffer(data, dtype=np.float32).reshape(payload["shape"])
+
+
+class StoreServiceError(RuntimeError):
+    """The store service rejected a request or could not be reached."""
+
+
+class _StoreConnection:
+    """Keep-alive HTTP connection to the store service."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        self._client = httpx.Client(base_url=self.base_url, timeout=settings.store_service_timeout)
+
+    def call(self, method: str, path: str, **kwargs) -> Any:
+        """Send a request and return the decoded JSON response."""
+        try:
+            response = self._client.request(method, path, **kwargs)
+        except httpx.HTTPError as e:
+            raise StoreServiceError(f"Store service unreachable at {self.base_url}: {e}") from e
+        if response.status_code >= 400:
+            try:
+                detail = response.json().get("detail", response.text)
+            except ValueError:
+                detail = response.text
+            raise StoreServiceError(f"Store service error ({response.status_code}): {detail}")
+        return response.json()
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class RemoteVectorDB:
+    """
+    VectorDB-compatible proxy for the store service.
+
+    The store service is the only process that opens the vector store, so
+    any number of API workers can share one index safely.
+
+    The store state from ``/info`` is cached for ``store_info_ttl``
+    seconds. Every write and query response carries the store generation,
+    and a new generation drops the cache, so this worker's own changes
+    are seen at once and other workers' changes within the TTL.
+    """
+
+    def __init__(self, base_url: str = settings.store_service_url):
+        """Connect to the store service."""
+        self._conn = _StoreConnection(base_url)
+        self._cached_info: Optional[Dict[str, Any]] = None
+        self._cached_at = 0.0
+        self._info_lock = threading.Lock()
+        logger.info(f"🔗 Using store service at {self._conn.base_url}")
+
+    def _info(self) -> Dict[str, Any]:
+        with self._info_lock:
+            now = time.monotonic()
+            if self._cached_info is None or now - self._cached_at > settings.store_info_ttl:
+                self._cached_info = self._conn.call("GET", "/info")
+                self._cached_at = now
+            return self._cached_info
+
+    def _call(self, method: str, path: str, **kwargs) -> Dict[str, Any]:
+        """Call the store service, dropping the cached state on a new generation."""
+        result = self._conn.call(method, path, **kwargs)
+        with self._info_lock:
+            if self._cached_info is not None and result.get("generation") != self._cached_info["generation"]:
+                self._cached_info = None
+        return result
+
+    @property
+    def space(self) -> str:
+        return self._info()["space"]
+
+    @property
+    def has_documents(self) -> bool:
+        return self._info()["has_documents"]
+
+    @property
+    def generation(self) -> int:
+        """Counter bumped on every change to the store's documents."""
+        return self._info()["generation"]
+
+    @property
+    def dim(self) -> Optional[int]:
+        """Dimension of the stored vectors (None while the store is empty)."""
+        return self._info()["dim"]
+
+    @property
+    def projection_fingerprint(self) -> Optional[str]:
+        """Fingerprint of the embedding projection the store service applies."""
+        return self._info()["projection"]
+
+    def add_documents(
+        self,
+        ids: List[str],
+        documents: List[str],
+        embeddings: np.ndarray,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """Add documents through the store service."""
+        try:
+            self._call(
+                "POST",
+                "/add",
+                json={
+                    "ids": ids,
+                    "documents": documents,
+                    "embeddings": encode_array(embeddings),
+                    "metadatas": metadatas,
+                },
+            )
+        except Exception as e:
+            logger.error(f"❌ Failed to add documents: {e}")
+            raise
+
+    def query(
+        self,
+        query_embeddings: np.ndarray,
+        n_results: int = 3,
+        where: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Query the store for similar documents."""
+        try:
+            return self._call(
+                "POST",
+                "/query",
+                json={
+                    "query_embeddings": encode_array(query_embeddings),
+                    "n_results": n_results,
+                    "where": where,
+                },
+            )
+        except Exception as e:
+            logger.error(f"❌ Failed to query collection: {e}")
+            raise
+
+    def get_all_documents(self) -> Dict[str, Any]:
+        """Get all documents with their metadata."""
+        return self._conn.call("GET", "/documents")
+
+    def get_ids_by_filename(self, filename: str) -> List[str]:
+        """Get the IDs of all chunks of a file."""
+        return self._conn.call("GET", "/ids", params={"filename": filename})["ids"]
+
+    def delete_documents(self, ids: List[str]) -> None:
+        """Delete documents by ID."""
+        self._call("POST", "/delete", json={"ids": ids})
+
+    def delete_by_filename(self, filename: str) -> int:
+        """Delete all chunks of a file; returns the number deleted."""
+        return self._call("POST", "/delete-by-filename", json={"filename": filename})["deleted"]
+
+    def count(self) -> int:
+        """Count total documents in the store."""
+        return self._info()["count"]
+
+    def reset(self) -> None:
+        """Delete all documents."""
+        self._call("POST", "/reset")
+
+    def migrate_space(self, space: str) -> int:
+        """Rebuild the (Chroma) collection in another distance space."""
+        return self._call("POST", "/migrate-space", json={"space": space})["total_chunks"]
+
+    def compact(self) -> Dict[str, Any]:
+        """Compact the store; returns the size and open time report."""
+        return self._call("POST", "/compact")
+
+    def snapshot(self, path: str) -> Dict[str, Any]:
+        """Write a snapshot of the store to ``path`` on the store service host."""
+        return self._conn.call("POST", "/snapshot", json={"path": path})
+
+
+class RemoteEmbeddingModel:
+    """
+    EmbeddingModel-compatible proxy for the store service.
+
+    Only the tokenizer is loaded locally (for token-based chunking); the
+    model weights stay in the store service process.
+    """
+
+    def __init__(self, base_url: str = settings.store_service_url):
+        """Connect to the store service and read the model's dimensions."""
+        self._conn = _StoreConnection(base_url)
+        info = self._conn.call("GET", "/info")
+        self.embedding_dim = info["embedding_dim"]
+        self._max_document_tokens = info["max_document_tokens"]
+        self._tokenizer = None
+        self._tokenizer_lock = threading.Lock()
+
+    def _encode(self, kind: str, texts: List[str]) -> np.ndarray:
+        try:
+            return decode_array(self._conn.call("POST", "/encode", json={"kind": kind, "texts": texts}))
+        except Exception as e:
+            logger.error(f"❌ Failed to encode {kind}: {e}")
+            raise
+
+    def encode_query(self, query: str) -> np.ndarray:
+        """Encode a single query text."""
+        return self.encode_queries([query])[0]
+
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        """Encode query texts in one model call."""
+        return self._encode("queries", queries)
+
+    def encode_documents(self, documents: List[str]) -> np.ndarray:
+        """Encode documents for indexing."""
+        return self._encode("documents", documents)
+
+    @property
+    def tokenizer(self):
+        """The embedding model's tokenizer, loaded on first use."""
+        with self._tokenizer_lock:
+            if self._tokenizer is None:
+                from transformers import AutoTokenizer
+
+                self._tokenizer = AutoTokenizer.from_pretrained(settings.embedding_model)
+            return self._tokenizer
+
+    def max_document_tokens(self) -> int:
+        """Maximum chunk length in tokens that the model reads without truncation."""
+        return self._max_document_tokens
+
+    def close(self) -> None:
+        """Close the connection to the store service."""
+        self._conn.close()
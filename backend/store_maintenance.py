@@ -0,0 +1,267 @@
+"""Vector store maintenance: on-disk size, cold open time, snapshots and restore."""
+
+import json
+import logging
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable
+
+from config import settings
+from projection import PROJECTION_FILE, projection_path
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "snapshot.json"
+GENERATION_FILE = "generation"
+
+
+def store_dir() -> str:
+    """Directory of the active vector store."""
+    path = settings.local_vector_dir if settings.vector_backend == "local" else settings.chroma_persist_dir
+    return os.path.abspath(path)
+
+
+def directory_size(path: str) -> int:
+    """Total size in bytes of the files under ``path``."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except FileNotFoundError:
+                pass
+    return total
+
+
+def _store_env(path: str, backend: str) -> Dict[str, str]:
+    """Environment for a child process that opens the store at ``path``."""
+    return {
+        **os.environ,
+        "VECTOR_BACKEND": backend,
+        "STORE_SERVICE_URL": "",
+        "CHROMA_PERSIST_DIR" if backend == "chroma" else "LOCAL_VECTOR_DIR": path,
+    }
+
+
+def measure_open_time(path: str, backend: str = "") -> Dict[str, float]:
+    """
+    Cold-open a store directory in a fresh process.
+
+    The child opens the store the way the server does at startup and runs
+    one query, so index loading that happens on first use is included.
+
+    Args:
+        path: Store directory
+        backend: "chroma" or "local" (default: the configured backend)
+
+    Returns:
+        Open and first-query time in seconds
+    """
+    backend = backend or settings.vector_backend
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__)],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=_store_env(path, backend),
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def write_store(path: str, backend: str, chunks: Iterable[Dict[str, Any]], space: str) -> int:
+    """
+    Write chunks with their embeddings into a new store in a fresh process.
+
+    The child opens the new store like the server would, adds the batches
+    it reads from its stdin and exits, which closes every file of the new
+    store without touching the clients of this process.
+
+    Args:
+        path: Directory of the new store
+        backend: "chroma" or "local"
+        chunks: Batches with ids, documents, embeddings and metadatas
+        space: Distance space of the new store
+
+    Returns:
+        Number of chunks in the new store
+    """
+    writer = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "write", space],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        env=_store_env(path, backend),
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    try:
+        for chunk in chunks:
+            pickle.dump(chunk, writer.stdin, protocol=pickle.HIGHEST_PROTOCOL)
+        writer.stdin.close()
+    except BrokenPipeError:
+        pass  # the child failed; its exit status is reported below
+    except BaseException:
+        writer.kill()
+        raise
+    finally:
+        output = writer.stdout.read().decode()
+        writer.wait()
+    if writer.returncode != 0:
+        raise RuntimeError(f"Writing the store at {path} failed (exit status {writer.returncode})")
+    return json.loads(output.strip().splitlines()[-1])["chunks"]
+
+
+def store_report(path: str, backend: str = "") -> Dict[str, Any]:
+    """Size and cold open time of a store directory."""
+    return {"bytes": directory_size(path), **measure_open_time(path, backend)}
+
+
+def new_snapshot_path() -> str:
+    """Timestamped directory under ``snapshot_dir`` for a new snapshot."""
+    name = f"{settings.vector_backend}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    return os.path.join(os.path.abspath(settings.snapshot_dir), name)
+
+
+def finish_snapshot(path: str, backend: str, count: int, generation: int) -> Dict[str, Any]:
+    """
+    Complete a snapshot directory written by a store's ``snapshot``.
+
+    Copies the embedding projection (if any) and writes the manifest that
+    ``restore_snapshot`` checks.
+
+    Returns:
+        Snapshot report (path, chunks, size, cold open time)
+    """
+    if os.path.exists(projection_path()):
+        shutil.copy2(projection_path(), os.path.join(path, PROJECTION_FILE))
+
+    manifest = {
+        "backend": backend,
+        "chunks": count,
+        "generation": generation,
+        "embedding_model": settings.embedding_model,
+        "created": datetime.now().isoformat(timespec="seconds"),
+    }
+    with open(os.path.join(path, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    report = {"path": path, "chunks": count, **store_report(path, backend)}
+    logger.info(
+        f"📸 Snapshot written to {path} ({count} chunks, {report['bytes'] / 1e6:.1f} MB)"
+    )
+    return report
+
+
+def restore_snapshot(snapshot: str) -> Dict[str, Any]:
+    """
+    Replace the active store with a snapshot (server must be stopped).
+
+    The snapshot is copied next to the store and swapped in, so an
+    interrupted copy leaves the current store intact. The generation
+    counter keeps increasing across the swap, which invalidates caches
+    built from the replaced store.
+
+    Args:
+        snapshot: Directory written by a store's ``snapshot``
+
+    Returns:
+        Restore report (chunks, size, cold open time)
+
+    Raises:
+        ValueError: If the snapshot is missing its manifest or was taken
+            from another backend or embedding model
+    """
+    manifest_path = os.path.join(snapshot, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        raise ValueError(f"{snapshot} is not a snapshot (no {MANIFEST_FILE})")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest["backend"] != settings.vector_backend:
+        raise ValueError(
+            f"Snapshot is for the {manifest['backend']} backend, "
+            f"VECTOR_BACKEND is {settings.vector_backend}"
+        )
+    if manifest["embedding_model"] != settings.embedding_model:
+        raise ValueError(
+            f"Snapshot was embedded with {manifest['embedding_model']}, "
+            f"EMBEDDING_MODEL is {settings.embedding_model}"
+        )
+
+    target = store_dir()
+    generation = manifest["generation"]
+    try:
+        with open(os.path.join(target, GENERATION_FILE)) as f:
+            generation = max(generation, int(f.read().strip() or 0))
+    except FileNotFoundError:
+        pass
+
+    restore_path = f"{target}.restore"
+    old_path = f"{target}.old"
+    shutil.rmtree(restore_path, ignore_errors=True)
+    shutil.copytree(snapshot, restore_path)
+    with open(os.path.join(restore_path, GENERATION_FILE), "w") as f:
+        f.write(str(generation + 1))
+
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(target):
+        os.rename(target, old_path)
+    os.rename(restore_path, target)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+    # A projection outside the store directory is not carried by the copy
+    restored_projection = os.path.join(target, PROJECTION_FILE)
+    if projection_path() != restored_projection:
+        if os.path.exists(restored_projection):
+            os.replace(restored_projection, projection_path())
+        elif os.path.exists(projection_path()):
+            os.remove(projection_path())
+
+    logger.info(f"✅ Restored {manifest['chunks']} chunks from {snapshot}")
+    return {"path": target, "chunks": manifest["chunks"], **store_report(target)}
+
+
+def _write(space: str) -> None:
+    """Child process of ``write_store``: add the batches read from stdin."""
+    logging.disable(logging.CRITICAL)
+    from vectordb import vector_db
+
+    if vector_db.space != space:
+        vector_db.migrate_space(space)
+    while True:
+        try:
+            chunk = pickle.load(sys.stdin.buffer)
+        except EOFError:
+            break
+        vector_db.add_documents(**chunk)
+    print(json.dumps({"chunks": vector_db.count()}))
+
+
+def _probe() -> None:
+    """Child process of ``measure_open_time``: open the store and query once."""
+    logging.disable(logging.CRITICAL)
+    import numpy  # imports are not part of the open time
+    import chromadb  # noqa: F401
+
+    start = time.perf_counter()
+    from vectordb import vector_db
+
+    opened = time.perf_counter()
+    if vector_db.count():
+        query = numpy.random.default_rng(0).standard_normal((1, vector_db.dim)).astype(numpy.float32)
+        vector_db.query(query_embeddings=query / numpy.linalg.norm(query), n_results=1)
+
+    print(json.dumps({
+        "open_seconds": round(opened - start, 4),
+        "first_query_seconds": round(time.perf_counter() - opened, 4),
+    }))
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["write"]:
+        _write(sys.argv[2])
+    else:
+        _probe()
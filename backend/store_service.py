@@ -0,0 +1,257 @@
+"""Store service: the one process that owns the vector store and embedding model.
+
+In multi-worker mode (``STORE_SERVICE_URL`` set) the API workers do not
+open ChromaDB or load the embedding model themselves; they call this
+service instead, so the index files are written by a single process and
+the model weights are loaded once. Endpoints are plain functions, so
+FastAPI runs them in its threadpool. Write and query responses carry the
+store generation, which lets workers keep their cached ``/info``.
+
+Usage:
+    python store_service.py
+"""
+
+import logging
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional
+
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+from config import settings
+
+# This process is the store; never proxy to another one
+settings.store_service_url = ""
+
+from vectordb import vector_db, VectorDB
+from embeddings import embedding_model
+from store_client import encode_array, decode_array
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="[%(asctime)s] %(levelname)s - %(name)s - %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+logger = logging.getLogger(__name__)
+
+# Embedding model facts for /info, fixed for the life of the process
+model_info: Dict[str, Any] = {}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Read the model's dimensions once (max_document_tokens tokenizes)."""
+    model_info["embedding_dim"] = embedding_model.embedding_dim
+    model_info["max_document_tokens"] = embedding_model.max_document_tokens()
+    projection = embedding_model.projection
+    model_info["projection"] = projection.fingerprint if projection is not None else None
+    yield
+
+
+app = FastAPI(title="EdgeAI Talk Store Service", version="0.1.0", lifespan=lifespan)
+
+
+class ArrayPayload(BaseModel):
+    shape: List[int]
+    data: str
+
+
+class EncodeRequest(BaseModel):
+    kind: str
+    texts: List[str]
+
+
+class AddRequest(BaseModel):
+    ids: List[str]
+    documents: List[str]
+    embeddings: ArrayPayload
+    metadatas: Optional[List[Dict[str, Any]]] = None
+
+
+class QueryRequest(BaseModel):
+    query_embeddings: ArrayPayload
+    n_results: int = 3
+    where: Optional[Dict[str, Any]] = None
+
+
+class DeleteRequest(BaseModel):
+    ids: List[str]
+
+
+class DeleteByFilenameRequest(BaseModel):
+    filename: str
+
+
+class MigrateSpaceRequest(BaseModel):
+    space: str
+
+
+class SnapshotRequest(BaseModel):
+    path: str
+
+
+def _failed(action: str, e: Exception) -> HTTPException:
+    logger.error(f"❌ Failed to {action}: {e}")
+    return HTTPException(status_code=500, detail=f"Failed to {action}: {str(e)}")
+
+
+@app.get("/health")
+def health():
+    """Health check endpoint."""
+    return {"status": "healthy", "documents": vector_db.count()}
+
+
+@app.get("/info")
+def info():
+    """Store state and embedding model dimensions."""
+    try:
+        return {
+            "backend": settings.vector_backend,
+            "space": vector_db.space,
+            "has_documents": vector_db.has_documents,
+            "generation": vector_db.generation,
+            "count": vector_db.count(),
+            "dim": vector_db.dim,
+            **model_info,
+        }
+    except Exception as e:
+        raise _failed("read store info", e)
+
+
+@app.post("/encode")
+def encode(request: EncodeRequest):
+    """Encode query or document texts."""
+    if request.kind not in ("queries", "documents"):
+        raise HTTPException(status_code=400, detail=f"Unsupported kind: {request.kind}")
+    try:
+        if request.kind == "queries":
+            embeddings = embedding_model.encode_queries(request.texts)
+        else:
+            embeddings = embedding_model.encode_documents(request.texts)
+        return encode_array(embeddings)
+    except Exception as e:
+        raise _failed(f"encode {request.kind}", e)
+
+
+@app.post("/add")
+def add(request: AddRequest):
+    """Add documents with precomputed embeddings."""
+    try:
+        vector_db.add_documents(
+            ids=request.ids,
+            documents=request.documents,
+            embeddings=decode_array(request.embeddings.model_dump()),
+            metadatas=request.metadatas,
+        )
+        return {"success": True, "generation": vector_db.generation}
+    except Exception as e:
+        raise _failed("add documents", e)
+
+
+@app.post("/query")
+def query(request: QueryRequest):
+    """Query for similar documents."""
+    try:
+        results = vector_db.query(
+            query_embeddings=decode_array(request.query_embeddings.model_dump()),
+            n_results=request.n_results,
+            where=request.where,
+        )
+        response = {key: results[key] for key in ("ids", "documents", "metadatas", "distances")}
+        return {**response, "generation": vector_db.generation}
+    except Exception as e:
+        raise _failed("query collection", e)
+
+
+@app.get("/documents")
+def documents():
+    """Get all documents with their metadata."""
+    try:
+        results = vector_db.get_all_documents()
+        return {key: results[key] for key in ("ids", "documents", "metadatas")}
+    except Exception as e:
+        raise _failed("get documents", e)
+
+
+@app.get("/ids")
+def ids(filename: str):
+    """Get the IDs of all chunks of a file."""
+    try:
+        return {"ids": vector_db.get_ids_by_filename(filename)}
+    except Exception as e:
+        raise _failed("get documents by filename", e)
+
+
+@app.post("/delete")
+def delete(request: DeleteRequest):
+    """Delete documents by ID."""
+    try:
+        vector_db.delete_documents(request.ids)
+        return {"success": True, "generation": vector_db.generation}
+    except Exception as e:
+        raise _failed("delete documents", e)
+
+
+@app.post("/delete-by-filename")
+def delete_by_filename(request: DeleteByFilenameRequest):
+    """Delete all chunks of a file."""
+    try:
+        deleted = vector_db.delete_by_filename(request.filename)
+        return {"deleted": deleted, "generation": vector_db.generation}
+    except Exception as e:
+        raise _failed("delete by filename", e)
+
+
+@app.post("/reset")
+def reset():
+    """Delete all documents."""
+    try:
+        vector_db.reset()
+        return {"success": True, "generation": vector_db.generation}
+    except Exception as e:
+        raise _failed("reset collection", e)
+
+
+@app.post("/migrate-space")
+def migrate_space(request: MigrateSpaceRequest):
+    """Rebuild the Chroma collection in another distance space."""
+    if not isinstance(vector_db, VectorDB):
+        raise HTTPException(
+            status_code=400,
+            detail="Space migration is only supported for the chroma backend"
+        )
+    try:
+        total_chunks = vector_db.migrate_space(request.space)
+        return {"total_chunks": total_chunks, "generation": vector_db.generation}
+    except Exception as e:
+        raise _failed("migrate collection", e)
+
+
+@app.post("/compact")
+def compact():
+    """Compact the store (size and open time report)."""
+    try:
+        return {**vector_db.compact(), "generation": vector_db.generation}
+    except Exception as e:
+        raise _failed("compact store", e)
+
+
+@app.post("/snapshot")
+def snapshot(request: SnapshotRequest):
+    """Write a snapshot of the store."""
+    try:
+        return vector_db.snapshot(request.path)
+    except Exception as e:
+        raise _failed("snapshot store", e)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # A single process by design: it is the only writer of the index
+    uvicorn.run(
+        app,
+        host=settings.store_service_host,
+        port=settings.store_service_port,
+        log_level="info",
+    )
@@ -0,0 +1,72 @@
+"""Stub LM Studio and VOICEVOX servers for the latency test scripts.
+
+The test scripts run the backend against these stubs in-process, so the
+measured latencies come from the backend's own scheduling, not from a
+real model or speech engine.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from typing import Callable
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import Response, StreamingResponse
+
+
+def serve(app: FastAPI, port: int) -> None:
+    """Run an app with uvicorn in a daemon thread."""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+
+def create_stub_app(
+    answer: str,
+    token_interval: float,
+    synthesis_seconds: Callable[[str], float],
+    prefill: float = 0.0,
+) -> FastAPI:
+    """
+    Create an app serving both the LM Studio and the VOICEVOX endpoints.
+
+    Args:
+        answer: Text streamed by /v1/chat/completions, two characters per token
+        token_interval: Seconds per token
+        synthesis_seconds: Delay of /synthesis for a given text
+        prefill: Seconds before the first token (prompt processing)
+
+    Returns:
+        The stub app (serve it on the LLM and the VOICEVOX port)
+    """
+    app = FastAPI()
+
+    @app.post("/v1/chat/completions")
+    async def completions():
+        """Stream the answer two characters at a time."""
+        async def tokens():
+            await asyncio.sleep(prefill)
+            for i in range(0, len(answer), 2):
+                delta = {"choices": [{"delta": {"content": answer[i:i + 2]}}]}
+                yield f"data: {json.dumps(delta, ensure_ascii=False)}\n\n"
+                await asyncio.sleep(token_interval)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(tokens(), media_type="text/event-stream")
+
+    @app.post("/audio_query")
+    async def audio_query(text: str, speaker: int):
+        """Return a minimal audio query."""
+        return {"text": text, "speaker": speaker}
+
+    @app.post("/synthesis")
+    async def synthesis(speaker: int, request: Request):
+        """Return fake WAV bytes after the synthesis delay."""
+        query = await request.json()
+        await asyncio.sleep(synthesis_seconds(query["text"]))
+        return Response(b"RIFF" + query["text"].encode("utf-8"), media_type="audio/wav")
+
+    return app
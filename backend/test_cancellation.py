@@ -0,0 +1,143 @@
+"""Check that closing a chat stream cancels generation upstream.
+
+Starts a stub LM Studio server that streams tokens slowly and records when
+its client connection closes, runs the backend against it, disconnects a
+client mid-answer (and once more before the first token), and verifies
+that the upstream stream was closed right away and that the cancellation
+shows up in /api/chat/stats.
+
+Usage:
+    python test_cancellation.py
+"""
+
+import asyncio
+import json
+import os
+import time
+
+STUB_PORT = 18234
+BACKEND_PORT = 18000
+os.environ["LM_STUDIO_BASE_URL"] = f"http://127.0.0.1:{STUB_PORT}/v1"
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from stub_servers import serve
+
+TOTAL_TOKENS = 100
+TOKEN_INTERVAL = 0.01
+
+stub_app = FastAPI()
+stub_state = {"sent": 0, "closed_at": None, "first_token_delay": 0.0}
+
+
+@stub_app.post("/v1/chat/completions")
+async def stub_completions():
+    """Stream TOTAL_TOKENS tokens, recording when the client goes away."""
+    stub_state.update(sent=0, closed_at=None)
+
+    async def tokens():
+        try:
+            await asyncio.sleep(stub_state["first_token_delay"])
+            for i in range(TOTAL_TOKENS):
+                delta = {"choices": [{"delta": {"content": f"token{i} "}}]}
+                yield f"data: {json.dumps(delta)}\n\n"
+                stub_state["sent"] += 1
+                await asyncio.sleep(TOKEN_INTERVAL)
+            yield "data: [DONE]\n\n"
+        finally:
+            stub_state["closed_at"] = time.perf_counter()
+
+    return StreamingResponse(tokens(), media_type="text/event-stream")
+
+
+def disconnect_after(lines_to_read: int) -> float:
+    """
+    Open a chat stream, read some lines, close it; return the close time.
+
+    Reads the whole stream when ``lines_to_read`` is None.
+    """
+    payload = {
+        "messages": [{"role": "user", "content": "テスト"}],
+        "use_rag": False,
+        "stream": True,
+    }
+    with httpx.Client(timeout=10) as client:
+        with client.stream(
+            "POST", f"http://127.0.0.1:{BACKEND_PORT}/api/chat/completions", json=payload
+        ) as response:
+            read = 0
+            if lines_to_read is None:
+                for _ in response.iter_lines():
+                    pass
+            elif lines_to_read:
+                for line in response.iter_lines():
+                    if line.startswith("data: "):
+                        read += 1
+                        if read >= lines_to_read:
+                            break
+            else:
+                time.sleep(0.3)
+            closed = time.perf_counter()
+    return closed
+
+
+def wait_for_upstream_close(timeout: float = 2.0):
+    """Wait until the stub sees its connection close."""
+    deadline = time.perf_counter() + timeout
+    while stub_state["closed_at"] is None and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    return stub_state["closed_at"]
+
+
+def main():
+    """Run the checks."""
+    from main import app
+
+    serve(stub_app, STUB_PORT)
+    serve(app, BACKEND_PORT)
+
+    print("=" * 60)
+    print("🧪 Upstream cancellation on client disconnect")
+    print("=" * 60)
+
+    # One full answer first, so the stats know how long answers run
+    stub_state["first_token_delay"] = 0.0
+    disconnect_after(None)
+    print(f"ℹ️  full answer: {stub_state['sent']}/{TOTAL_TOKENS} tokens generated")
+
+    failures = 0
+    for label, lines, first_token_delay in [
+        ("mid-answer", 10, 0.0),
+        ("before first token", 0, 2.0),
+    ]:
+        stub_state["first_token_delay"] = first_token_delay
+        client_closed = disconnect_after(lines)
+        upstream_closed = wait_for_upstream_close()
+
+        if upstream_closed is None:
+            print(f"❌ {label}: upstream stream still open")
+            failures += 1
+            continue
+
+        lag = (upstream_closed - client_closed) * 1000
+        ok = stub_state["sent"] < TOTAL_TOKENS and lag < 500
+        failures += not ok
+        print(
+            f"{'✅' if ok else '❌'} {label}: upstream closed {lag:.0f} ms after client, "
+            f"{stub_state['sent']}/{TOTAL_TOKENS} tokens generated"
+        )
+
+    stats = httpx.get(f"http://127.0.0.1:{BACKEND_PORT}/api/chat/stats").json()
+    print(f"\n📊 /api/chat/stats: {stats}")
+    if stats["cancelled_streams"] != 2 or stats["tokens_saved_by_cancellation"] <= 0:
+        print("❌ expected 2 cancelled streams with tokens saved")
+        failures += 1
+
+    print("\n" + ("✅ All checks passed" if not failures else f"❌ {failures} check(s) failed"))
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Tests for the local vector store: failed adds, delete/re-add, filters and rebuilds.
+
+Each test builds a store in a temporary directory from random normalized
+vectors; no embedding model is loaded.
+
+Usage:
+    python test_local_vectordb.py
+    python -m pytest test_local_vectordb.py
+"""
+
+import os
+import tempfile
+import threading
+
+# Keep the module-level store (created on import) out of the real data dirs
+os.environ["VECTOR_BACKEND"] = "local"
+os.environ["LOCAL_VECTOR_DIR"] = tempfile.mkdtemp(prefix="test_local_store_")
+os.environ["STORE_SERVICE_URL"] = ""
+
+import numpy as np
+
+import vectordb  # noqa: F401  (creates the store module first, as the server does)
+from local_vectordb import LocalVectorDB
+
+DIM = 16
+
+
+def make_vectors(n: int, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def new_store() -> LocalVectorDB:
+    return LocalVectorDB(tempfile.mkdtemp(prefix="test_local_store_"))
+
+
+def add(db: LocalVectorDB, ids, vectors, filename: str = "a.md") -> None:
+    db.add_documents(
+        ids=list(ids),
+        documents=[f"doc {i}" for i in ids],
+        embeddings=vectors,
+        metadatas=[{"filename": filename, "chunk_index": n} for n, _ in enumerate(ids)],
+    )
+
+
+def top_id(db: LocalVectorDB, vector: np.ndarray, where=None) -> str:
+    return db.query(query_embeddings=vector[np.newaxis, :], n_results=1, where=where)["ids"][0][0]
+
+
+def test_failed_add_leaves_store_consistent():
+    """Unserializable metadata and duplicate ids in a batch change nothing."""
+    db = new_store()
+    vectors = make_vectors(6)
+    add(db, ["a0", "a1"], vectors[:2])
+
+    try:
+        db.add_documents(
+            ids=["b0"], documents=["b"], embeddings=vectors[2:3],
+            metadatas=[{"filename": "b.md", "size": np.int64(3)}],
+        )
+        raise AssertionError("add with unserializable metadata succeeded")
+    except TypeError:
+        pass
+    try:
+        add(db, ["c0", "c0"], vectors[3:5], "c.md")
+        raise AssertionError("add with duplicate ids succeeded")
+    except ValueError:
+        pass
+
+    # Later adds on the same thread work and land on the right rows
+    add(db, ["d0"], vectors[5:6], "d.md")
+    assert db.count() == 3
+    assert top_id(db, vectors[5]) == "d0"
+    assert top_id(db, vectors[1]) == "a1"
+
+    reopened = LocalVectorDB(db.path)
+    assert reopened.count() == 3
+    assert top_id(reopened, vectors[5]) == "d0"
+
+
+def test_failed_add_after_orphaned_bytes():
+    """Bytes left past the committed rows are overwritten by the next add."""
+    db = new_store()
+    vectors = make_vectors(4)
+    add(db, ["a0"], vectors[:1])
+    with open(os.path.join(db.path, "vectors.bin"), "ab") as f:
+        f.write(make_vectors(1, seed=1).tobytes())
+
+    add(db, ["b0"], vectors[1:2], "b.md")
+    assert top_id(db, vectors[1]) == "b0"
+    assert top_id(LocalVectorDB(db.path), vectors[1]) == "b0"
+
+
+def test_delete_and_re_add():
+    """Deleted ids can be added again; deleted rows are never returned."""
+    db = new_store()
+    vectors = make_vectors(4)
+    add(db, ["a0", "a1"], vectors[:2])
+    add(db, ["b0"], vectors[2:3], "b.md")
+
+    assert db.delete_by_filename("a.md") == 2
+    assert db.count() == 1
+    assert top_id(db, vectors[0]) == "b0"
+
+    add(db, ["a0", "a1"], vectors[2:4])
+    assert db.count() == 3
+    assert top_id(db, vectors[3]) == "a1"
+    assert LocalVectorDB(db.path).count() == 3
+
+
+def test_filtered_query():
+    """Equality filters restrict the search, also on rows added afterwards."""
+    db = new_store()
+    vectors = make_vectors(6)
+    add(db, ["a0", "a1", "a2"], vectors[:3])
+    add(db, ["b0", "b1", "b2"], vectors[3:6], "b.md")
+
+    assert top_id(db, vectors[0], where={"filename": "b.md"}).startswith("b")
+    assert top_id(db, vectors[4], where={"filename": {"$eq": "a.md"}}).startswith("a")
+    assert top_id(db, vectors[2], where={"chunk_index": 2}) in ("a2", "b2")
+
+    # A query on an older snapshot ignores rows committed after it
+    state = db._state
+    add(db, ["c0"], make_vectors(1, seed=2), "c.md")
+    rows = db._allowed_rows(state, {"filename": "c.md"})
+    assert len(rows) == 0
+
+
+def test_queries_during_rebuild():
+    """Queries running while the store is rebuilt return the right chunks."""
+    db = new_store()
+    vectors = make_vectors(200)
+    ids = [f"a{i}" for i in range(200)]
+    add(db, ids, vectors)
+    db.delete_documents(ids[::2])
+
+    errors = []
+    done = threading.Event()
+
+    def search():
+        i = 1
+        while not done.is_set():
+            try:
+                if top_id(db, vectors[i]) != ids[i]:
+                    errors.append(f"{ids[i]} resolved to another chunk")
+            except Exception as e:  # noqa: BLE001 (reported below)
+                errors.append(repr(e))
+            i = (i + 2) % 200
+
+    readers = [threading.Thread(target=search) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for _ in range(5):
+        db._rebuild()
+    done.set()
+    for reader in readers:
+        reader.join()
+
+    assert not errors, errors[:3]
+    assert db.count() == 100
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,110 @@
+"""Tests for the character chunker against the original implementation.
+
+``iter_text_chunks`` must produce exactly the chunks of the original
+list-building chunker wherever that one terminates, and must reject or
+still make progress on the settings where it did not.
+
+Usage:
+    python test_text_processing.py
+    python -m pytest test_text_processing.py
+"""
+
+import random
+
+import pytest
+
+from text_processing import iter_text_chunks, split_text_into_chunks
+
+SETTINGS = [(1000, 200), (300, 50), (100, 0), (100, 79), (10, 3), (1, 0)]
+
+
+def baseline_split_text_into_chunks(text, chunk_size=1000, chunk_overlap=200):
+    """The chunker before it became a generator (kept verbatim as the reference)."""
+    if len(text) <= chunk_size:
+        return [text]
+
+    chunks = []
+    start = 0
+
+    while start < len(text):
+        end = start + chunk_size
+
+        if end < len(text):
+            search_start = int(end - chunk_size * 0.2)
+            sentence_end = max(
+                text.rfind("。", search_start, end),
+                text.rfind(".", search_start, end),
+                text.rfind("!", search_start, end),
+                text.rfind("?", search_start, end),
+                text.rfind("\n", search_start, end),
+            )
+
+            if sentence_end > start:
+                end = sentence_end + 1
+
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+
+        start = end - chunk_overlap if end < len(text) else end
+
+    return chunks
+
+
+def edge_case_texts():
+    """Short, boundary-sized, whitespace-only and boundary-heavy texts."""
+    yield ""
+    yield "   "
+    yield "\n\n\n"
+    yield "a" * 99
+    yield "a" * 100
+    yield "a" * 101
+    yield "a" * 2500
+    yield "。" * 350
+    yield "x" * 79 + "." + "y" * 500
+    yield "x" * 80 + "." + "y" * 500
+    yield ("これは文です。" * 40 + "\n") * 10
+    yield " " * 150 + "a" * 150 + " " * 150
+    yield "a" * 95 + "\n" * 10 + "b" * 95
+
+
+def generated_texts(count=100):
+    """Random mixes of words, sentence boundaries and whitespace."""
+    rng = random.Random(0)
+    pieces = ["EdgeAI Talk", "音声認識", "。", ". ", "!", "?", "\n", "  ", "a" * 50, '{"k": 1}']
+    for _ in range(count):
+        size = rng.choice([10, 99, 100, 101, 999, 1000, 1001, 5000])
+        yield "".join(rng.choice(pieces) for _ in range(size // 5))
+
+
+def test_matches_baseline():
+    for text in list(edge_case_texts()) + list(generated_texts()):
+        for chunk_size, chunk_overlap in SETTINGS:
+            expected = baseline_split_text_into_chunks(text, chunk_size, chunk_overlap)
+            assert list(iter_text_chunks(text, chunk_size, chunk_overlap)) == expected, (
+                text[:40], chunk_size, chunk_overlap
+            )
+            assert split_text_into_chunks(text, chunk_size, chunk_overlap) == expected
+
+
+def test_rejects_overlap_not_below_chunk_size():
+    for chunk_size, chunk_overlap in [(100, 100), (100, 150), (100, -1)]:
+        with pytest.raises(ValueError):
+            iter_text_chunks("a" * 1000, chunk_size, chunk_overlap)
+
+
+def test_high_overlap_keeps_advancing():
+    # Windows end at boundaries 84 characters in, where ``end - overlap``
+    # does not pass the window start; they must not creep one character on
+    text = ("a" * 83 + "。") * 200
+    chunks = list(iter_text_chunks(text, 100, 85))
+    assert len(chunks) < len(text) // 10
+    assert text.endswith(chunks[-1])
+    assert all(len(chunk) <= 100 for chunk in chunks)
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
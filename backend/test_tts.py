@@ -0,0 +1,138 @@
+"""Measure time-to-first-audio of the sentence-pipelined TTS endpoint.
+
+Starts a stub LM Studio server that streams a multi-sentence Japanese
+answer token by token and a stub VOICEVOX engine whose synthesis time grows
+with the text length, runs the backend against both, and compares:
+
+- full text first: wait for the whole answer, then synthesize it
+- /api/tts/chat: synthesize each sentence while the answer is generated
+- /api/tts/chat again: sentences served from the audio cache
+
+Usage:
+    python test_tts.py
+"""
+
+import base64
+import json
+import os
+import tempfile
+import time
+
+LM_PORT = 18244
+VOICEVOX_PORT = 18245
+BACKEND_PORT = 18002
+os.environ["LM_STUDIO_BASE_URL"] = f"http://127.0.0.1:{LM_PORT}/v1"
+os.environ["VOICEVOX_BASE_URL"] = f"http://127.0.0.1:{VOICEVOX_PORT}"
+os.environ["TTS_CACHE_DIR"] = tempfile.mkdtemp(prefix="tts_cache_")
+
+import httpx
+
+from stub_servers import create_stub_app, serve
+
+ANSWER = (
+    "EdgeAI Talkは音声で対話できるアシスタントです。"
+    "ローカルのLLMで回答を生成します！"
+    "資料を登録すると、その内容をもとに答えられます。"
+    "音声合成にはVOICEVOXを使っています。"
+    "何か質問はありますか？"
+)
+TOKEN_INTERVAL = 0.03  # seconds per token (2 characters)
+SYNTH_BASE = 0.08  # seconds per synthesis call
+SYNTH_PER_CHAR = 0.004  # seconds per character
+
+stub_app = create_stub_app(
+    ANSWER, TOKEN_INTERVAL, lambda text: SYNTH_BASE + SYNTH_PER_CHAR * len(text)
+)
+
+
+PAYLOAD = {
+    "messages": [{"role": "user", "content": "EdgeAI Talkについて教えて"}],
+    "use_rag": False,
+}
+
+
+def full_text_first() -> float:
+    """Time to first audio when the whole answer is synthesized at the end."""
+    start = time.perf_counter()
+    text = ""
+    with httpx.Client(timeout=30) as client:
+        with client.stream(
+            "POST", f"http://127.0.0.1:{BACKEND_PORT}/api/chat/completions", json=PAYLOAD
+        ) as response:
+            for line in response.iter_lines():
+                data = line[6:] if line.startswith("data: ") else ""
+                if data and data != "[DONE]":
+                    text += json.loads(data)["choices"][0]["delta"].get("content", "")
+
+        query = client.post(
+            f"http://127.0.0.1:{VOICEVOX_PORT}/audio_query", params={"text": text, "speaker": 1}
+        ).json()
+        client.post(f"http://127.0.0.1:{VOICEVOX_PORT}/synthesis", params={"speaker": 1}, json=query)
+    return time.perf_counter() - start
+
+
+def pipelined():
+    """Time to first audio and the audio events of /api/tts/chat."""
+    start = time.perf_counter()
+    first = None
+    events = []
+    with httpx.Client(timeout=30) as client:
+        with client.stream(
+            "POST", f"http://127.0.0.1:{BACKEND_PORT}/api/tts/chat", json=PAYLOAD
+        ) as response:
+            for line in response.iter_lines():
+                data = line[6:] if line.startswith("data: ") else ""
+                if not data or data == "[DONE]":
+                    continue
+                event = json.loads(data)
+                if first is None and event["type"] == "audio":
+                    first = time.perf_counter() - start
+                events.append(event)
+    return first, time.perf_counter() - start, events
+
+
+def main():
+    """Run the checks."""
+    from main import app
+
+    serve(stub_app, LM_PORT)
+    serve(stub_app, VOICEVOX_PORT)
+    serve(app, BACKEND_PORT)
+
+    print("=" * 60)
+    print("🧪 Sentence-pipelined TTS: time to first audio")
+    print("=" * 60)
+
+    baseline = full_text_first()
+    print(f"full text first:      first audio after {baseline * 1000:.0f} ms")
+
+    failures = 0
+    for label, expect_cached in [("pipelined (cold)", False), ("pipelined (cached)", True)]:
+        first, total, events = pipelined()
+        audio = [e for e in events if e["type"] == "audio"]
+        text = "".join(e["text"] for e in audio)
+        in_order = [e["index"] for e in audio] == list(range(len(audio)))
+        wav_ok = all(base64.b64decode(e["audio"])[4:].decode("utf-8") == e["text"] for e in audio)
+        cached = all(e["cached"] for e in audio) if expect_cached else not any(e["cached"] for e in audio)
+
+        ok = text == ANSWER and in_order and wav_ok and cached and len(audio) == 5
+        failures += not ok
+        print(
+            f"{label:20s}  first audio after {first * 1000:.0f} ms, "
+            f"last after {total * 1000:.0f} ms, {len(audio)} segments  {'✅' if ok else '❌'}"
+        )
+
+    # The chat answer and both TTS answers count as completed streams
+    stats = httpx.get(f"http://127.0.0.1:{BACKEND_PORT}/api/chat/stats").json()
+    counted = stats["completed_streams"] == 3
+    failures += not counted
+    print(f"{'/api/chat/stats':20s}  {stats['completed_streams']} completed streams  {'✅' if counted else '❌'}")
+
+    print("=" * 60)
+    if failures:
+        raise SystemExit(f"❌ {failures} check(s) failed")
+    print("✅ Audio segments complete, in order, and cached on repeat")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Measure first-token and first-audio latency of warm answers.
+
+Starts a stub LM Studio server (first token after a prefill delay, then a
+token every few ms) and a stub VOICEVOX engine, runs the backend against
+both with the warm answer cache enabled, warms a few canonical prompts via
+``POST /api/warm-cache/warm-up``, then compares:
+
+- a question that is not canonical: retrieval + LLM (cold path)
+- a canonical question: served from the warm answer cache
+- the same canonical question through /api/tts/chat: first audio
+
+Usage:
+    python test_warm_cache.py
+"""
+
+import json
+import os
+import tempfile
+import time
+
+LM_PORT = 18246
+VOICEVOX_PORT = 18247
+BACKEND_PORT = 18003
+WORK_DIR = tempfile.mkdtemp(prefix="warm_cache_")
+CANONICAL = [
+    "EdgeAI Talkにはどんな機能がありますか？",
+    "サーバーに必要なメモリはどれくらいですか？",
+]
+os.environ["LM_STUDIO_BASE_URL"] = f"http://127.0.0.1:{LM_PORT}/v1"
+os.environ["VOICEVOX_BASE_URL"] = f"http://127.0.0.1:{VOICEVOX_PORT}"
+os.environ["TTS_CACHE_DIR"] = os.path.join(WORK_DIR, "tts")
+os.environ["WARM_CACHE_ENABLED"] = "true"
+os.environ["WARM_CACHE_PATH"] = os.path.join(WORK_DIR, "warm_answers.sqlite3")
+os.environ["WARM_PROMPTS_PATH"] = os.path.join(WORK_DIR, "warm_prompts.txt")
+with open(os.environ["WARM_PROMPTS_PATH"], "w", encoding="utf-8") as f:
+    f.write("\n".join(CANONICAL) + "\n")
+
+import httpx
+
+from stub_servers import create_stub_app, serve
+
+ANSWER = "EdgeAI Talkは音声で対話できるアシスタントです。資料をもとに答えます！"
+PREFILL = 0.6  # seconds before the first token (prompt processing)
+TOKEN_INTERVAL = 0.03  # seconds per token (2 characters)
+SYNTH_SECONDS = 0.3  # seconds per synthesis call
+
+stub_app = create_stub_app(ANSWER, TOKEN_INTERVAL, lambda text: SYNTH_SECONDS, prefill=PREFILL)
+
+
+def first_event(path: str, question: str, event_type: str = None):
+    """Milliseconds until the first content (or audio) event, and the response headers."""
+    payload = {"messages": [{"role": "user", "content": question}], "use_rag": True}
+    start = time.perf_counter()
+    with httpx.Client(timeout=60) as client:
+        with client.stream("POST", f"http://127.0.0.1:{BACKEND_PORT}{path}", json=payload) as response:
+            for line in response.iter_lines():
+                data = line[6:] if line.startswith("data: ") else ""
+                if not data or data == "[DONE]":
+                    continue
+                event = json.loads(data)
+                if event_type is None or event.get("type") == event_type:
+                    return (time.perf_counter() - start) * 1000, response.headers
+    return None, None
+
+
+def main():
+    """Run the checks."""
+    from main import app
+
+    serve(stub_app, LM_PORT)
+    serve(stub_app, VOICEVOX_PORT)
+    serve(app, BACKEND_PORT)
+    base = f"http://127.0.0.1:{BACKEND_PORT}/api/warm-cache"
+
+    print("=" * 60)
+    print("🧪 Warm answer cache: first token / first audio")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    httpx.post(f"{base}/warm-up", timeout=10).raise_for_status()
+    while (status := httpx.get(base).json())["warm_up"]["running"]:
+        time.sleep(0.1)
+    print(
+        f"warm-up: {status['warm_up']['warmed']} prompts in "
+        f"{time.perf_counter() - start:.1f}s ({status['cache']['fresh_entries']} fresh)"
+    )
+
+    cold, cold_headers = first_event("/api/chat/completions", "展示会の会場はどこですか？")
+    warm, warm_headers = first_event("/api/chat/completions", CANONICAL[0])
+    audio, _ = first_event("/api/tts/chat", CANONICAL[1], "audio")
+
+    print(f"not canonical (LLM):  first token after {cold:.0f} ms")
+    print(
+        f"canonical (warm):     first token after {warm:.0f} ms "
+        f"(similarity {warm_headers.get('x-warm-answer-similarity')})"
+    )
+    print(f"canonical TTS (warm): first audio after {audio:.0f} ms")
+
+    stats = httpx.get(base).json()["cache"]
+    ok = (
+        "x-warm-answer-similarity" not in cold_headers
+        and warm_headers.get("x-warm-answer-similarity") is not None
+        and warm < cold
+        and audio < SYNTH_SECONDS * 1000
+        and stats["hits"] == 2
+    )
+    print("=" * 60)
+    if not ok:
+        raise SystemExit(f"❌ Unexpected result (cache stats: {stats})")
+    print("✅ Canonical questions served from the warm cache with cached audio")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,10 @@
 
 import logging
 import hashlib
-from typing import List, Dict, Any
+import json
+import os
+from bisect import bisect_left
+from typing import List, Dict, Any, Iterable, Iterator, Callable, Tuple
 from datetime import datetime
 import re
 
@@ -10,6 +13,19 @@ from config import settings
 
 logger = logging.getLogger(__name__)
 
+# Characters treated as sentence boundaries when choosing chunk ends
+SENTENCE_BOUNDARIES = ("。", ".", "!", "?", "\n")
+
+
+def find_sentence_end(text: str, start: int, end: int) -> int:
+    """
+    Find the last sentence boundary in text[start:end].
+
+    Returns:
+        Boundary offset, or -1 if there is none in range
+    """
+    return max(text.rfind(boundary, start, end) for boundary in SENTENCE_BOUNDARIES)
+
 
 def create_document_id(filename: str, chunk_index: int) -> str:
     """
@@ -26,13 +42,16 @@ def create_document_id(filename: str, chunk_index: int) -> str:
     return hashlib.md5(content.encode()).hexdigest()
 
 
-def split_text_into_chunks(
+def iter_text_chunks(
     text: str,
     chunk_size: int = None,
     chunk_overlap: int = None,
-) -> List[str]:
+) -> Iterator[str]:
     """
-    Split text into overlapping chunks.
+    Lazily split text into overlapping chunks.
+
+    Each window only searches its last 20% for a sentence boundary and
+    always advances, so the cost is linear in the text length.
 
     Args:
         text: Text to split
@@ -40,48 +59,183 @@ def split_text_into_chunks(
         chunk_overlap: Overlap size in characters
 
     Returns:
-        List of text chunks
+        Iterator over the text chunks
+
+    Raises:
+        ValueError: If the overlap is negative or not smaller than the chunk size
     """
     if chunk_size is None:
         chunk_size = settings.chunk_size
     if chunk_overlap is None:
         chunk_overlap = settings.chunk_overlap
 
-    if len(text) <= chunk_size:
-        return [text]
+    if not 0 <= chunk_overlap < chunk_size:
+        raise ValueError(
+            f"Chunk overlap must be at least 0 and less than the chunk size "
+            f"(got overlap {chunk_overlap}, size {chunk_size})"
+        )
+    return _iter_windows(text, chunk_size, chunk_overlap)
+
+
+def _iter_windows(text: str, chunk_size: int, chunk_overlap: int) -> Iterator[str]:
+    """Yield the chunks of ``iter_text_chunks`` (arguments already checked)."""
+    text_len = len(text)
+    if text_len <= chunk_size:
+        yield text
+        return
 
-    chunks = []
     start = 0
 
-    while start < len(text):
+    while start < text_len:
         end = start + chunk_size
 
         # If not the last chunk, try to break at sentence boundary
-        if end < len(text):
+        if end < text_len:
             # Look for sentence endings in the last 20% of the chunk
             search_start = int(end - chunk_size * 0.2)
-            sentence_end = max(
-                text.rfind("。", search_start, end),
-                text.rfind(".", search_start, end),
-                text.rfind("!", search_start, end),
-                text.rfind("?", search_start, end),
-                text.rfind("\n", search_start, end),
-            )
+            sentence_end = find_sentence_end(text, search_start, end)
 
             if sentence_end > start:
                 end = sentence_end + 1
 
         chunk = text[start:end].strip()
         if chunk:
-            chunks.append(chunk)
+            yield chunk
+
+        # Move to next chunk with overlap. With an overlap above 80% of the
+        # chunk size, a window cut short at a sentence boundary would not
+        # advance; step by the nominal stride instead, which still stays
+        # within the window
+        if end >= text_len:
+            start = end
+        elif end - chunk_overlap > start:
+            start = end - chunk_overlap
+        else:
+            start += chunk_size - chunk_overlap
+
+
+def split_text_into_chunks(
+    text: str,
+    chunk_size: int = None,
+    chunk_overlap: int = None,
+) -> List[str]:
+    """
+    Split text into overlapping chunks.
 
-        # Move to next chunk with overlap
-        start = end - chunk_overlap if end < len(text) else end
+    Args:
+        text: Text to split
+        chunk_size: Maximum chunk size in characters
+        chunk_overlap: Overlap size in characters
+
+    Returns:
+        List of text chunks
+    """
+    chunks = list(iter_text_chunks(text, chunk_size, chunk_overlap))
 
     logger.debug(f"📄 Split text into {len(chunks)} chunks")
     return chunks
 
 
+def split_text_into_token_chunks(
+    text: str,
+    tokenizer,
+    chunk_tokens: int = None,
+    overlap_tokens: int = None,
+) -> List[str]:
+    """
+    Split text into overlapping chunks measured in tokenizer tokens.
+
+    The whole document is tokenized once; windows are taken over the token
+    offsets and snapped back to a sentence boundary in their last 20%, the
+    same rule the character chunker uses.
+
+    Args:
+        text: Text to split
+        tokenizer: Fast (offset-mapping capable) Hugging Face tokenizer
+        chunk_tokens: Maximum chunk size in tokens
+        overlap_tokens: Overlap size in tokens
+
+    Returns:
+        List of text chunks
+    """
+    if chunk_tokens is None:
+        chunk_tokens = settings.chunk_size_tokens
+    if overlap_tokens is None:
+        overlap_tokens = settings.chunk_overlap_tokens
+
+    encoding = tokenizer(
+        text,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        return_attention_mask=False,
+        return_token_type_ids=False,
+    )
+    offsets = encoding["offset_mapping"]
+    token_starts = [start for start, _ in offsets]
+    n_tokens = len(offsets)
+
+    if n_tokens <= chunk_tokens:
+        return [text]
+
+    chunks = []
+    start_tok = 0
+
+    while start_tok < n_tokens:
+        end_tok = min(start_tok + chunk_tokens, n_tokens)
+        start_char = offsets[start_tok][0]
+
+        if end_tok < n_tokens:
+            end_char = offsets[end_tok][0]
+
+            # Look for sentence endings in the last 20% of the window
+            search_start = offsets[end_tok - max(1, int(chunk_tokens * 0.2))][0]
+            sentence_end = find_sentence_end(text, search_start, end_char)
+
+            if sentence_end > start_char:
+                end_char = sentence_end + 1
+                end_tok = max(bisect_left(token_starts, end_char), start_tok + 1)
+        else:
+            end_char = len(text)
+
+        chunk = text[start_char:end_char].strip()
+        if chunk:
+            chunks.append(chunk)
+
+        # Move to next chunk with overlap (always make progress)
+        if end_tok < n_tokens:
+            start_tok = max(end_tok - overlap_tokens, start_tok + 1)
+        else:
+            start_tok = n_tokens
+
+    logger.debug(f"📄 Split text into {len(chunks)} token chunks")
+    return chunks
+
+
+def count_truncated_chunks(chunks: List[str], tokenizer, max_tokens: int) -> int:
+    """
+    Count chunks whose token length exceeds the model's input limit.
+
+    Args:
+        chunks: Chunk texts
+        tokenizer: Hugging Face tokenizer
+        max_tokens: Maximum tokens the model reads per chunk
+
+    Returns:
+        Number of chunks that would be truncated
+    """
+    if not chunks:
+        return 0
+
+    lengths = tokenizer(
+        chunks,
+        add_special_tokens=False,
+        return_attention_mask=False,
+        return_token_type_ids=False,
+        return_length=True,
+    )["length"]
+    return sum(1 for length in lengths if length > max_tokens)
+
+
 def extract_text_from_file(file_content: bytes, file_type: str, filename: str) -> str:
     """
     Extract text from file content based on file type.
@@ -101,7 +255,6 @@ def extract_text_from_file(file_content: bytes, file_type: str, filename: str) -
 
         # JSON files
         elif file_type in ["application/json", ".json"]:
-            import json
             data = json.loads(file_content.decode("utf-8"))
             # Convert JSON to readable text
             return json.dumps(data, indent=2, ensure_ascii=False)
@@ -115,13 +268,13 @@ def extract_text_from_file(file_content: bytes, file_type: str, filename: str) -
                 pdf_file = BytesIO(file_content)
                 reader = PdfReader(pdf_file)
 
-                text_parts = []
-                for page_num, page in enumerate(reader.pages):
-                    text = page.extract_text()
-                    if text.strip():
-                        text_parts.append(f"[Page {page_num + 1}]\n{text}")
+                def iter_pages():
+                    for page_num, page in enumerate(reader.pages):
+                        text = page.extract_text()
+                        if text.strip():
+                            yield f"[Page {page_num + 1}]\n{text}\n\n"
 
-                return "\n\n".join(text_parts)
+                return "".join(iter_clean_text(iter_pages()))
 
             except Exception as e:
                 logger.warning(f"⚠️  Failed to extract PDF text: {e}")
@@ -136,6 +289,199 @@ def extract_text_from_file(file_content: bytes, file_type: str, filename: str) -
         raise
 
 
+_MARKDOWN_HEADING = re.compile(r"^(#{1,6})[ \t]+(.+?)[ \t#]*$")
+_MARKDOWN_FENCE = re.compile(r"^(```|~~~)")
+
+SECTION_SEPARATOR = " > "
+
+
+def split_markdown_sections(text: str) -> List[Tuple[str, str]]:
+    """
+    Split Markdown into sections following the heading hierarchy.
+
+    Each section runs from a heading to the next heading and keeps the
+    heading line itself. Headings with no body of their own (e.g. a chapter
+    heading directly followed by a sub-heading) are carried into the next
+    section. Headings inside fenced code blocks are ignored.
+
+    Args:
+        text: Markdown text
+
+    Returns:
+        List of (section_path, section_text), e.g. ("FAQ > Q1: ...", "### Q1: ...")
+    """
+    sections = []
+    stack: List[Tuple[int, str]] = []
+    current_path = ""
+    current_lines: List[str] = []
+    has_body = False
+    in_fence = False
+
+    for line in text.split("\n"):
+        if _MARKDOWN_FENCE.match(line.lstrip()):
+            in_fence = not in_fence
+
+        match = None if in_fence else _MARKDOWN_HEADING.match(line)
+        if match:
+            if has_body:
+                sections.append((current_path, "\n".join(current_lines).strip()))
+                current_lines = []
+                has_body = False
+
+            level = len(match.group(1))
+            while stack and stack[-1][0] >= level:
+                stack.pop()
+            stack.append((level, match.group(2).strip()))
+            current_path = SECTION_SEPARATOR.join(title for _, title in stack)
+        elif line.strip():
+            has_body = True
+
+        current_lines.append(line)
+
+    section_text = "\n".join(current_lines).strip()
+    if section_text:
+        sections.append((current_path, section_text))
+
+    return sections
+
+
+def split_json_sections(
+    data: Any,
+    max_chars: int = None,
+    path: str = "$",
+) -> List[Tuple[str, str]]:
+    """
+    Split parsed JSON into self-contained fragments following JSON paths.
+
+    Values that fit in ``max_chars`` stay whole; larger objects and arrays
+    are descended into, and consecutive small members are packed together
+    so that no fragment is cut mid-object.
+
+    Args:
+        data: Parsed JSON value
+        max_chars: Maximum fragment size in characters
+        path: JSON path of ``data``
+
+    Returns:
+        List of (json_path, fragment_text)
+    """
+    if max_chars is None:
+        max_chars = settings.chunk_size
+
+    def dump(value):
+        # One member per line without indentation, matching clean_text output
+        return clean_text(json.dumps(value, indent=2, ensure_ascii=False))
+
+    text = dump(data)
+    if len(text) <= max_chars or not isinstance(data, (dict, list)) or not data:
+        return [(path, text)]
+
+    is_dict = isinstance(data, dict)
+    items = data.items() if is_dict else enumerate(data)
+
+    sections = []
+    group_keys: List[Any] = []
+    group_size = 0
+
+    def flush():
+        if not group_keys:
+            return
+        if is_dict:
+            group_path = path if len(group_keys) > 1 else f"{path}.{group_keys[0]}"
+            fragment = {key: data[key] for key in group_keys}
+        else:
+            first, last = group_keys[0], group_keys[-1]
+            group_path = f"{path}[{first}]" if first == last else f"{path}[{first}:{last + 1}]"
+            fragment = [data[i] for i in group_keys]
+        sections.append((group_path, dump(fragment)))
+        group_keys.clear()
+
+    for key, value in items:
+        child_size = len(dump(value))
+
+        if child_size > max_chars:
+            flush()
+            group_size = 0
+            child_path = f"{path}.{key}" if is_dict else f"{path}[{key}]"
+            sections.extend(split_json_sections(value, max_chars, child_path))
+            continue
+
+        if group_keys and group_size + child_size > max_chars:
+            flush()
+            group_size = 0
+
+        group_keys.append(key)
+        group_size += child_size + len(json.dumps(key, ensure_ascii=False)) + 4
+
+    flush()
+    return sections
+
+
+def split_into_sections(
+    text: str,
+    filename: str,
+    file_type: str,
+) -> List[Tuple[str, str]]:
+    """
+    Split a document along its structure (Markdown headings, JSON paths).
+
+    Args:
+        text: Document text
+        filename: Source filename
+        file_type: File type
+
+    Returns:
+        List of (section_path, section_text); a single unnamed section for
+        unstructured documents or when structured chunking is disabled
+    """
+    if not settings.structured_chunking:
+        return [("", text)]
+
+    suffix = os.path.splitext(filename)[1].lower()
+
+    if suffix in (".md", ".markdown") or file_type in ("markdown", "text/markdown"):
+        return split_markdown_sections(text) or [("", text)]
+
+    if suffix == ".json" or file_type in ("application/json", ".json"):
+        try:
+            data = json.loads(text)
+        except ValueError:
+            logger.warning(f"⚠️  Could not parse {filename} as JSON, using plain chunking")
+            return [("", text)]
+        return split_json_sections(data)
+
+    return [("", text)]
+
+
+def _get_chunk_splitter(filename: str, text: str) -> Callable[[str], Iterable[str]]:
+    """Return the chunking function for the configured chunk mode."""
+    if settings.chunk_mode != "tokens":
+        return iter_text_chunks
+
+    from embeddings import embedding_model
+
+    tokenizer = embedding_model.tokenizer
+    max_tokens = embedding_model.max_document_tokens()
+
+    truncated = count_truncated_chunks(
+        split_text_into_chunks(text), tokenizer, max_tokens
+    )
+    if truncated:
+        logger.info(
+            f"✂️  {truncated} chunk(s) of {filename} would have been "
+            f"truncated with character chunking (limit: {max_tokens} tokens)"
+        )
+
+    def split(section_text: str) -> List[str]:
+        return split_text_into_token_chunks(
+            section_text,
+            tokenizer,
+            chunk_tokens=min(settings.chunk_size_tokens, max_tokens),
+        )
+
+    return split
+
+
 def create_chunks_with_metadata(
     text: str,
     filename: str,
@@ -152,7 +498,15 @@ def create_chunks_with_metadata(
     Returns:
         Tuple of (chunk_ids, chunks, metadatas)
     """
-    chunks = split_text_into_chunks(text)
+    split = _get_chunk_splitter(filename, text)
+
+    chunks = []
+    section_paths = []
+    for section_path, section_text in split_into_sections(text, filename, file_type):
+        for chunk in split(section_text):
+            chunks.append(chunk)
+            section_paths.append(section_path)
+
     timestamp = datetime.now().isoformat()
 
     chunk_ids = []
@@ -169,20 +523,51 @@ def create_chunks_with_metadata(
             "total_chunks": len(chunks),
             "upload_timestamp": timestamp,
             "char_count": len(chunk),
+            "section_path": section_paths[i],
         }
         metadatas.append(metadata)
 
     logger.info(
         f"📦 Created {len(chunks)} chunks from {filename} "
-        f"(total chars: {len(text)})"
+        f"(total chars: {len(text)}, sections: {len(set(section_paths))})"
     )
 
     return chunk_ids, chunks, metadatas
 
 
+# Whitespace runs worth rewriting: 2+ characters, or a single character
+# other than a space or newline (those are already normalized)
+_WHITESPACE_PATTERN = re.compile(r"\s{2,}|[^\S \n]")
+
+# Replacements for recently seen runs; inputs repeat the same few runs
+_WHITESPACE_CACHE: Dict[str, str] = {}
+_WHITESPACE_CACHE_SIZE = 256
+
+
+def _normalize_whitespace(match: re.Match) -> str:
+    """Collapse a whitespace run, keeping line and paragraph breaks."""
+    run = match.group()
+    replacement = _WHITESPACE_CACHE.get(run)
+    if replacement is None:
+        newlines = max(run.count("\n"), run.count("\r"))
+        if newlines == 0:
+            replacement = " "
+        else:
+            replacement = "\n\n" if newlines >= 2 else "\n"
+
+        if len(_WHITESPACE_CACHE) < _WHITESPACE_CACHE_SIZE:
+            _WHITESPACE_CACHE[run] = replacement
+
+    return replacement
+
+
 def clean_text(text: str) -> str:
     """
-    Clean and normalize text.
+    Clean and normalize text in a single pass.
+
+    Horizontal whitespace runs collapse to one space, runs containing one
+    line break become a newline, and runs with more become a paragraph
+    break ("\n\n").
 
     Args:
         text: Text to clean
@@ -190,13 +575,36 @@ def clean_text(text: str) -> str:
     Returns:
         Cleaned text
     """
-    # Remove multiple spaces
-    text = re.sub(r"\s+", " ", text)
+    return _WHITESPACE_PATTERN.sub(_normalize_whitespace, text.strip())
 
-    # Remove multiple newlines
-    text = re.sub(r"\n{3,}", "\n\n", text)
 
-    # Strip leading/trailing whitespace
-    text = text.strip()
+def iter_clean_text(pieces: Iterable[str]) -> Iterator[str]:
+    """
+    Clean a stream of text pieces (e.g. PDF pages) incrementally.
 
-    return text
+    Trailing whitespace of each piece is carried into the next one, so runs
+    spanning piece boundaries are normalized exactly as ``clean_text`` would
+    normalize the concatenated text.
+
+    Args:
+        pieces: Iterable of text pieces
+
+    Yields:
+        Cleaned text pieces
+    """
+    pending = ""
+    started = False
+
+    for piece in pieces:
+        piece = pending + piece
+        body = piece.rstrip()
+        pending = piece[len(body):]
+
+        if not started:
+            body = body.lstrip()
+            if not body:
+                continue
+            started = True
+
+        if body:
+            yield _WHITESPACE_PATTERN.sub(_normalize_whitespace, body)
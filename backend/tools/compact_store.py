@@ -0,0 +1,92 @@
+"""Compact the vector store, write snapshots and restore them.
+
+Deletions and resets leave tombstones in the HNSW index (Chroma) or marked
+rows in the vector files (local store), and free pages in SQLite, so the
+store keeps growing and opens slower. Compaction rewrites the local store
+from its live rows without re-embedding; for Chroma it vacuums SQLite. A
+snapshot is a compact, self-contained copy of the store that restores by
+swapping directories, with no embedding model calls; restoring one is how
+a Chroma store also sheds its HNSW tombstones and deleted collections.
+The running server does the same via ``POST /api/documents/compact``.
+
+On-disk size and cold open time (a fresh process opening the store and
+running one query) are reported before and after.
+
+Usage:
+    python tools/compact_store.py
+    python tools/compact_store.py --snapshot                 # compact, then snapshot
+    python tools/compact_store.py --snapshot ../snapshots/base --no-compact
+    python tools/compact_store.py --restore ../snapshots/base  # server stopped
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from config import settings
+from store_maintenance import new_snapshot_path, restore_snapshot, store_dir, store_report
+
+
+def print_report(label: str, report: dict) -> None:
+    """Print one size / open time line."""
+    print(
+        f"  {label:8s} {report['bytes'] / 1e6:9.1f} MB  "
+        f"open: {report['open_seconds'] * 1000:7.0f} ms  "
+        f"first query: {report['first_query_seconds'] * 1000:6.0f} ms"
+    )
+
+
+def main():
+    """Run compaction, snapshot or restore."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--snapshot", nargs="?", const="", default=None, metavar="DIR",
+        help=f"write a snapshot (default: a new directory under {settings.snapshot_dir})",
+    )
+    parser.add_argument("--no-compact", action="store_true", help="only write the snapshot")
+    parser.add_argument("--restore", metavar="DIR", help="replace the store with a snapshot")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    if args.restore:
+        if settings.store_service_url:
+            print("ℹ️  Restore on the machine that owns the store, without STORE_SERVICE_URL")
+            return
+        print(f"📁 Store: {store_dir()} ({settings.vector_backend})")
+        before = store_report(store_dir())
+        report = restore_snapshot(args.restore)
+        if args.json:
+            print(json.dumps({"before": before, "after": report}, indent=2))
+            return
+        print_report("before", before)
+        print_report("restored", report)
+        print(f"✅ Restored {report['chunks']} chunks; start the server (and store service)")
+        return
+
+    from vectordb import vector_db
+
+    reports = {}
+    if not args.no_compact:
+        print(f"🧹 Compacting {vector_db.count()} chunks ({settings.vector_backend})...")
+        reports = vector_db.compact()
+    if args.snapshot is not None:
+        reports["snapshot"] = vector_db.snapshot(args.snapshot or new_snapshot_path())
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+    if "before" in reports:
+        print_report("before", reports["before"])
+        print_report("after", reports["after"])
+        print(f"✅ Compacted {reports['chunks']} chunks in {reports['seconds']:.1f}s")
+    if "snapshot" in reports:
+        print_report("snapshot", reports["snapshot"])
+        print(f"📸 Snapshot: {reports['snapshot']['path']}")
+
+
+if __name__ == "__main__":
+    main()
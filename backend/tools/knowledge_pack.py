@@ -0,0 +1,120 @@
+"""Export the collection to a knowledge pack, or import one without re-embedding.
+
+A knowledge pack holds the chunks, metadata and float16 embeddings of a
+collection plus the model and chunker settings they were made with (see
+knowledge_pack.py). Importing adds the stored vectors in bulk with no
+embedding model calls, so provisioning a device with the sample data or
+company documents takes seconds instead of minutes of CPU embedding.
+
+A running server owns its store, so ``import`` is sent to it
+(``POST /api/documents/import-pack``, the pack must be under
+KNOWLEDGE_PACK_DIR) and ``export`` refuses to run next to it; with the server stopped,
+both open the store directly. With STORE_SERVICE_URL set, the import goes
+through the store service. Files in the pack that are already in the
+store are replaced.
+
+Usage:
+    python tools/knowledge_pack.py export ../packs/company
+    python tools/knowledge_pack.py export ../packs/faq --filename product_faq.md
+    python tools/knowledge_pack.py import ../packs/company
+    python tools/knowledge_pack.py info ../packs/company
+    python tools/knowledge_pack.py import ../packs/company --server http://127.0.0.1:8000
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from config import settings
+from knowledge_pack import export_pack, import_pack, read_manifest, resolve_pack_path
+
+
+def server_running(url: str) -> bool:
+    """Whether a backend server answers at ``url``."""
+    try:
+        return httpx.get(f"{url}/health", timeout=2.0).status_code == 200
+    except httpx.HTTPError:
+        return False
+
+
+def print_import_report(report: dict) -> None:
+    """Print the result of an import."""
+    for warning in report["warnings"]:
+        print(f"⚠️  {warning}")
+    print(
+        f"✅ Imported {report['chunks']} chunks from {report['files']} files in "
+        f"{report['seconds']:.1f}s (replaced {report['replaced_chunks']} existing chunks)"
+    )
+    if report["projection_changed"]:
+        print("🔁 The embedding projection changed; restart the server (and store service)")
+
+
+def main():
+    """Run export, import or info."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["export", "import", "info"])
+    parser.add_argument("path", help="pack directory")
+    parser.add_argument(
+        "--filename", action="append", help="export only these files (repeatable)"
+    )
+    parser.add_argument(
+        "--server", default=f"http://127.0.0.1:{settings.backend_port}",
+        help="backend server that owns the store, if running",
+    )
+    args = parser.parse_args()
+
+    if args.command == "info":
+        manifest = read_manifest(args.path)
+        manifest["files"] = len(manifest["files"])
+        print(json.dumps(manifest, ensure_ascii=False, indent=2))
+        return
+
+    # Only the store service, or the server that opened the store, may write to it
+    delegate = not settings.store_service_url and server_running(args.server)
+
+    if args.command == "export":
+        if settings.store_service_url or delegate:
+            print("ℹ️  Stop the server (and store service) and export on the machine that owns the store")
+            return
+        from vectordb import vector_db
+
+        manifest = export_pack(vector_db, args.path, args.filename)
+        print(
+            f"📦 Exported {manifest['chunks']} chunks from {len(manifest['files'])} files "
+            f"({manifest['embedding_model']}, {manifest['dim']} dims) to {args.path}"
+        )
+        return
+
+    if delegate:
+        try:
+            path = resolve_pack_path(os.path.abspath(args.path))
+        except ValueError as e:
+            print(f"❌ {e}; move the pack there or stop the server")
+            sys.exit(1)
+        print(f"📡 Importing through the running server at {args.server}")
+        response = httpx.post(
+            f"{args.server}/api/documents/import-pack",
+            json={"path": path},
+            timeout=None,
+        )
+        if response.status_code != 200:
+            print(f"❌ {response.json().get('detail', response.text)}")
+            sys.exit(1)
+        print_import_report(response.json())
+        return
+
+    from vectordb import vector_db
+
+    print(f"📁 Importing into {settings.vector_backend} store ({vector_db.count()} chunks)")
+    print_import_report(import_pack(vector_db, args.path))
+
+
+if __name__ == "__main__":
+    main()
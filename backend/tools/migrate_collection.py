@@ -0,0 +1,42 @@
+"""Rebuild the Chroma collection in cosine space without re-embedding.
+
+Collections created before the switch to cosine space use Chroma's default
+"l2" space, which cannot be changed in place. This copies the stored
+embeddings, documents and metadata into a new collection and swaps it in
+under the original name. The running server can do the same online via
+``POST /api/documents/migrate-space``.
+
+Usage:
+    python tools/migrate_collection.py
+    python tools/migrate_collection.py --space ip
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from vectordb import VectorDB, vector_db, COLLECTION_SPACE
+
+
+def main():
+    """Run the migration."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--space", choices=["cosine", "ip", "l2"], default=COLLECTION_SPACE)
+    args = parser.parse_args()
+
+    if not isinstance(vector_db, VectorDB):
+        print("ℹ️  VECTOR_BACKEND is not chroma; nothing to migrate")
+        return
+
+    print(f"📁 Collection space: {vector_db.space} ({vector_db.count()} chunks)")
+    start = time.perf_counter()
+    count = vector_db.migrate_space(args.space)
+    print(f"✅ Now '{vector_db.space}' ({count} chunks) in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
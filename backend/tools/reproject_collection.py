@@ -0,0 +1,96 @@
+"""Fit a PCA projection and rebuild the collection with reduced embeddings.
+
+Fits the projection on a random sample of the stored vectors, rebuilds the
+collection (Chroma or local store) with every vector projected, and saves
+the projection next to the store, where ``EmbeddingModel`` picks it up to
+project new documents and queries the same way. If the collection is
+already projected, the original vectors are recomputed from the stored
+documents first. Run it with the server stopped, then restart the server
+(and the store service) so they load the new projection.
+
+Usage:
+    python tools/reproject_collection.py --dim 256
+    python tools/reproject_collection.py --dim 384 --whiten
+    python tools/reproject_collection.py --remove     # back to full dimensions
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from config import settings
+from embeddings import EmbeddingModel, embedding_model
+from projection import Projection, projection_path
+from vectordb import vector_db
+
+
+def main():
+    """Run the re-projection."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dim", type=int, default=settings.embedding_projection_dim)
+    parser.add_argument("--whiten", action="store_true", help="scale components to unit variance")
+    parser.add_argument("--sample", type=int, default=20000, help="vectors used to fit the projection")
+    parser.add_argument("--remove", action="store_true", help="drop the projection, keep full dimensions")
+    args = parser.parse_args()
+
+    if not isinstance(embedding_model, EmbeddingModel) or not hasattr(vector_db, "reproject"):
+        print("ℹ️  Run this without STORE_SERVICE_URL, on the machine that owns the store")
+        return
+
+    count = vector_db.count()
+    current = embedding_model.projection
+    print(
+        f"📁 {count} chunks, model: {settings.embedding_model} "
+        f"({embedding_model.native_dim} dims, stored: {embedding_model.embedding_dim})"
+    )
+    if not count:
+        print("ℹ️  Collection is empty; fit the projection after uploading documents")
+        return
+
+    def native(documents, embeddings):
+        if current is None:
+            return embeddings
+        # Projected vectors cannot be inverted: encode the documents again
+        return embedding_model.encode_documents(documents, project=False)
+
+    if args.remove:
+        if current is None:
+            print("ℹ️  Collection already uses full dimensions")
+            return
+        projection = None
+        transform = native
+    else:
+        documents, sample = vector_db.sample_embeddings(args.sample)
+        projection = Projection.fit(
+            native(documents, sample), args.dim, settings.embedding_model, whiten=args.whiten
+        )
+        print(
+            f"📐 Fitted {projection.input_dim} -> {projection.output_dim} dims on {len(sample)} "
+            f"vectors ({projection.explained_variance:.1%} of variance kept)"
+        )
+
+        def transform(documents, embeddings):
+            return projection.apply(native(documents, embeddings))
+
+    start = time.perf_counter()
+    count = vector_db.reproject(transform)
+
+    path = projection_path()
+    if projection is not None:
+        projection.save(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+    dim = projection.output_dim if projection is not None else embedding_model.native_dim
+    print(f"✅ Rebuilt {count} chunks with {dim} dims in {time.perf_counter() - start:.1f}s")
+    print("🔁 Restart the server (and store service) to load the new projection")
+    embedding_model.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Precompute answers (and audio) for the canonical prompts.
+
+Runs retrieval, generation and, unless --no-audio, VOICEVOX synthesis for
+every prompt in WARM_PROMPTS_PATH and stores the answers in the warm answer
+cache, which a server with WARM_CACHE_ENABLED=true picks up without a
+restart. Prompts already answered for the current documents are skipped.
+The running server can do the same online via ``POST /api/warm-cache/warm-up``.
+
+Usage:
+    python tools/warm_answers.py
+    python tools/warm_answers.py --prompts ../QUICK_TEST_PROMPTS.md --force
+    python tools/warm_answers.py --no-audio
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+# The cache is filled here even if the server has it disabled for now
+os.environ["WARM_CACHE_ENABLED"] = "true"
+
+from config import settings
+from warm_cache import load_canonical_prompts
+from routes.warm_cache import warm_up
+
+
+def main():
+    """Run the warm-up."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prompts", default=settings.warm_prompts_path)
+    parser.add_argument("--force", action="store_true", help="regenerate fresh answers too")
+    parser.add_argument("--no-audio", action="store_true", help="skip VOICEVOX synthesis")
+    args = parser.parse_args()
+
+    prompts = load_canonical_prompts(args.prompts)
+    print(f"🔥 Warming {len(prompts)} prompts from {args.prompts}")
+    status = asyncio.run(warm_up(prompts, audio=not args.no_audio, force=args.force))
+    print(
+        f"✅ {status['warmed']} warmed, {status['skipped']} already fresh, "
+        f"{status['failed']} failed, {status['pruned']} removed in {status['elapsed_s']}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
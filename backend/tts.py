@@ -0,0 +1,155 @@
+"""VOICEVOX client, sentence splitting and audio cache for streamed TTS."""
+
+import asyncio
+import hashlib
+import logging
+import os
+from typing import List, Optional
+
+import httpx
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Sentence-ending punctuation, and closing brackets that belong to the sentence
+SENTENCE_ENDINGS = "。！？"
+CLOSING_BRACKETS = "」』）)】"
+
+
+class SentenceSplitter:
+    """Split streamed text into sentences as soon as each one is complete."""
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        """
+        Add streamed text.
+
+        Args:
+            text: Next piece of the response
+
+        Returns:
+            Sentences completed by this piece
+        """
+        self._buffer += text
+        sentences = []
+        start = 0
+        i = 0
+        while i < len(self._buffer):
+            if self._buffer[i] in SENTENCE_ENDINGS:
+                # Keep runs like "！？" and a closing bracket with the sentence
+                end = i + 1
+                while end < len(self._buffer) and (
+                    self._buffer[end] in SENTENCE_ENDINGS or self._buffer[end] in CLOSING_BRACKETS
+                ):
+                    end += 1
+                if end == len(self._buffer):
+                    # More punctuation may still follow
+                    break
+                sentence = self._buffer[start:end].strip()
+                if sentence:
+                    sentences.append(sentence)
+                start = i = end
+                continue
+            i += 1
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        """Return the remaining text once the stream has ended."""
+        sentence, self._buffer = self._buffer.strip(), ""
+        return sentence or None
+
+
+class AudioCache:
+    """
+    Content-addressed WAV cache on disk.
+
+    Files are named by a hash of the speaker and text, so a repeated
+    sentence is read back instead of synthesized again.
+    """
+
+    def __init__(self, cache_dir: str = settings.tts_cache_dir):
+        """Initialize the cache directory."""
+        self.cache_dir = os.path.abspath(cache_dir)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, text: str, speaker: int) -> str:
+        key = hashlib.sha256(f"{speaker}\0{text}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f"{key}.wav")
+
+    def get(self, text: str, speaker: int) -> Optional[bytes]:
+        """Cached audio for a sentence, or None."""
+        try:
+            with open(self._path(text, speaker), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, text: str, speaker: int, audio: bytes) -> None:
+        """Store audio for a sentence."""
+        path = self._path(text, speaker)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, path)
+
+
+class VoicevoxClient:
+    """Client for the VOICEVOX engine with a disk cache and bounded concurrency."""
+
+    def __init__(self, cache: Optional[AudioCache] = None):
+        """Initialize the client."""
+        self.base_url = settings.voicevox_base_url.rstrip("/")
+        self.timeout = httpx.Timeout(60.0, connect=5.0)
+        self.cache = cache or AudioCache()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def synthesize(self, text: str, speaker: int) -> tuple[bytes, bool]:
+        """
+        Synthesize one sentence (audio_query, then synthesis).
+
+        Args:
+            text: Sentence to read out
+            speaker: VOICEVOX speaker (style) ID
+
+        Returns:
+            WAV bytes and whether they came from the cache
+        """
+        audio = await asyncio.to_thread(self.cache.get, text, speaker)
+        if audio is not None:
+            return audio, True
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.tts_max_concurrency)
+
+        try:
+            async with self._semaphore:
+                async with httpx.AsyncClient(timeout=self.timeout) as client:
+                    response = await client.post(
+                        f"{self.base_url}/audio_query",
+                        params={"text": text, "speaker": speaker},
+                    )
+                    response.raise_for_status()
+
+                    response = await client.post(
+                        f"{self.base_url}/synthesis",
+                        params={"speaker": speaker},
+                        json=response.json(),
+                    )
+                    response.raise_for_status()
+                    audio = response.content
+
+            await asyncio.to_thread(self.cache.put, text, speaker, audio)
+            return audio, False
+
+        except httpx.HTTPError as e:
+            logger.error(f"❌ VOICEVOX API error: {e}")
+            raise
+
+
+# Global VOICEVOX client instance
+voicevox_client = VoicevoxClient()
@@ -2,14 +2,117 @@
 
 import logging
 import os
-from typing import List, Dict, Any, Optional
+import sqlite3
+import threading
+import time
+from typing import Callable, Iterator, List, Dict, Any, Optional, Tuple, Union
+import numpy as np
 import chromadb
 from chromadb.config import Settings as ChromaSettings
 
 from config import settings
+from exact_search import ExactSearchIndex, supports_where
 
 logger = logging.getLogger(__name__)
 
+EmbeddingArray = Union[np.ndarray, List[List[float]]]
+# Maps a page of (documents, stored embeddings) to replacement embeddings
+EmbeddingTransform = Callable[[List[str], np.ndarray], np.ndarray]
+
+# Distance space for new collections. Collections created before this used
+# Chroma's default ("l2") and keep working until migrated.
+COLLECTION_SPACE = "cosine"
+COLLECTION_METADATA = {
+    "description": "EdgeAI Talk documents collection",
+    "hnsw:space": COLLECTION_SPACE,
+}
+
+
+def as_float32_matrix(embeddings: EmbeddingArray) -> np.ndarray:
+    """
+    Convert embeddings to a contiguous 2-D float32 array.
+
+    Float16 embeddings are upcast here, at the storage boundary, since the
+    index operates on float32.
+    """
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[np.newaxis, :]
+    return np.ascontiguousarray(matrix)
+
+
+def scores_to_distances(scores: np.ndarray, space: str) -> np.ndarray:
+    """Convert cosine scores of normalized vectors to distances in ``space``."""
+    if space == "l2":
+        # Squared L2 distance, as Chroma reports for "l2"
+        return np.maximum(2.0 - 2.0 * scores, 0.0)
+    return 1.0 - scores
+
+
+def distances_to_scores(distances: np.ndarray, space: str) -> np.ndarray:
+    """Convert distances in ``space`` back to cosine scores."""
+    if space == "l2":
+        return 1.0 - distances / 2.0
+    return 1.0 - distances
+
+
+def select_context(
+    results: Dict[str, Any],
+    space: str,
+    top_ks: List[int],
+    thresholds: List[float],
+) -> List[List[Dict[str, Any]]]:
+    """
+    Score and threshold query results.
+
+    Args:
+        results: Query results with ids, documents, metadatas, and distances
+        space: Distance space the results were computed in
+        top_ks: Maximum number of items to keep, per query
+        thresholds: Minimum similarity score, per query
+
+    Returns:
+        Per query, context items (content, metadata, score) best first
+    """
+    selected = []
+    for qi, (top_k, threshold) in enumerate(zip(top_ks, thresholds)):
+        distances = np.asarray(results["distances"][qi][:top_k], dtype=np.float32)
+        scores = distances_to_scores(distances, space)
+        documents = results["documents"][qi]
+        metadatas = results["metadatas"][qi]
+        selected.append([
+            {"content": documents[i], "metadata": metadatas[i], "score": float(scores[i])}
+            for i in np.flatnonzero(scores >= threshold)
+        ])
+    return selected
+
+
+class GenerationCounter:
+    """
+    Write counter persisted next to the data it versions.
+
+    Bumped on every change to the stored documents, so caches derived from
+    search results can tell when they are stale, across restarts too.
+    """
+
+    def __init__(self, path: str):
+        """Load the counter from ``path`` (0 if missing)."""
+        self.path = path
+        try:
+            with open(path) as f:
+                self.value = int(f.read().strip() or 0)
+        except FileNotFoundError:
+            self.value = 0
+
+    def bump(self) -> int:
+        """Increment and persist the counter."""
+        self.value += 1
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(str(self.value))
+        os.replace(tmp_path, self.path)
+        return self.value
+
 
 class VectorDB:
     """ChromaDB vector database wrapper."""
@@ -18,6 +121,13 @@ class VectorDB:
         """Initialize ChromaDB client."""
         self.client = None
         self.collection = None
+        self.exact_index: Optional[ExactSearchIndex] = None
+        self.space = COLLECTION_SPACE
+        # Cached emptiness flag so queries skip a count() round trip
+        self.has_documents = False
+        self._generation: Optional[GenerationCounter] = None
+        # Serializes writes, and holds them off while a rebuild swaps collections
+        self._write_lock = threading.RLock()
         self._initialize()
 
     def _initialize(self):
@@ -28,6 +138,7 @@ class VectorDB:
             os.makedirs(persist_dir, exist_ok=True)
 
             logger.info(f"📁 Initializing ChromaDB at: {persist_dir}")
+            self._generation = GenerationCounter(os.path.join(persist_dir, "generation"))
 
             # Initialize ChromaDB client
             self.client = chromadb.PersistentClient(
@@ -41,20 +152,66 @@ class VectorDB:
             # Get or create collection
             self.collection = self.client.get_or_create_collection(
                 name=settings.chroma_collection_name,
-                metadata={"description": "EdgeAI Talk documents collection"},
+                metadata=COLLECTION_METADATA,
+            )
+            self.space = (self.collection.metadata or {}).get("hnsw:space", "l2")
+
+            logger.info(
+                f"✅ ChromaDB initialized: collection '{settings.chroma_collection_name}' "
+                f"({self.space})"
             )
+            if self.space != COLLECTION_SPACE:
+                logger.warning(
+                    f"⚠️  Collection uses '{self.space}' space; "
+                    f"run tools/migrate_collection.py to rebuild it with '{COLLECTION_SPACE}'"
+                )
 
-            logger.info(f"✅ ChromaDB initialized: collection '{settings.chroma_collection_name}'")
+            self._sync_exact_index()
 
         except Exception as e:
             logger.error(f"❌ Failed to initialize ChromaDB: {e}")
             raise
 
+    def _sync_exact_index(self) -> None:
+        """
+        Mirror the collection into the exact search index when it is small.
+
+        Collections above ``exact_search_max_chunks`` are searched with
+        Chroma's HNSW index instead. Called after every write, so it also
+        refreshes ``has_documents``.
+        """
+        limit = settings.exact_search_max_chunks
+        count = self.collection.count()
+        self.has_documents = count > 0
+
+        if limit <= 0 or count > limit:
+            if self.exact_index is not None:
+                logger.info(f"ℹ️  {count} chunks exceed exact search limit, using HNSW")
+            self.exact_index = None
+            return
+
+        if self.exact_index is not None:
+            return
+
+        index = ExactSearchIndex()
+        page_size = self.client.get_max_batch_size()
+        for offset in range(0, count, page_size):
+            page = self.collection.get(
+                include=["embeddings", "documents", "metadatas"],
+                limit=page_size,
+                offset=offset,
+            )
+            if page["ids"]:
+                index.add(page["ids"], page["documents"], page["embeddings"], page["metadatas"])
+
+        self.exact_index = index
+        logger.info(f"✅ Exact search index ready ({len(index)} chunks)")
+
     def add_documents(
         self,
         ids: List[str],
         documents: List[str],
-        embeddings: List[List[float]],
+        embeddings: EmbeddingArray,
         metadatas: Optional[List[Dict[str, Any]]] = None,
     ) -> None:
         """
@@ -63,16 +220,29 @@ class VectorDB:
         Args:
             ids: List of unique document IDs
             documents: List of document texts
-            embeddings: List of embedding vectors
+            embeddings: Embedding matrix of shape (len(ids), dim)
             metadatas: Optional list of metadata dictionaries
         """
         try:
-            self.collection.add(
-                ids=ids,
-                documents=documents,
-                embeddings=embeddings,
-                metadatas=metadatas,
-            )
+            embeddings = as_float32_matrix(embeddings)
+
+            with self._write_lock:
+                # Stay under Chroma's per-call limit for large ingests
+                batch_size = self.client.get_max_batch_size()
+                for start in range(0, len(ids), batch_size):
+                    end = start + batch_size
+                    self.collection.add(
+                        ids=ids[start:end],
+                        documents=documents[start:end],
+                        embeddings=embeddings[start:end],
+                        metadatas=metadatas[start:end] if metadatas else None,
+                    )
+
+                if self.exact_index is not None:
+                    self.exact_index.add(ids, documents, embeddings, metadatas)
+                self._sync_exact_index()
+                self._generation.bump()
+
             logger.info(f"➕ Added {len(ids)} documents to collection")
 
         except Exception as e:
@@ -81,7 +251,7 @@ class VectorDB:
 
     def query(
         self,
-        query_embeddings: List[List[float]],
+        query_embeddings: EmbeddingArray,
         n_results: int = 3,
         where: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
@@ -89,7 +259,7 @@ class VectorDB:
         Query the collection for similar documents.
 
         Args:
-            query_embeddings: Query embedding vectors
+            query_embeddings: Query embedding matrix (or list of vectors)
             n_results: Number of results to return
             where: Optional metadata filter
 
@@ -97,11 +267,16 @@ class VectorDB:
             Query results with ids, documents, metadatas, and distances
         """
         try:
-            results = self.collection.query(
-                query_embeddings=query_embeddings,
-                n_results=n_results,
-                where=where,
-            )
+            exact_index = self.exact_index
+            # Other filter operators ($and, $in, $ne, ...) are left to Chroma
+            if exact_index is not None and supports_where(where):
+                results = self._query_exact(exact_index, query_embeddings, n_results, where)
+            else:
+                results = self.collection.query(
+                    query_embeddings=as_float32_matrix(query_embeddings),
+                    n_results=n_results,
+                    where=where,
+                )
             logger.info(f"🔍 Query returned {len(results['ids'][0])} results")
             return results
 
@@ -109,6 +284,25 @@ class VectorDB:
             logger.error(f"❌ Failed to query collection: {e}")
             raise
 
+    def _query_exact(
+        self,
+        exact_index: ExactSearchIndex,
+        query_embeddings: EmbeddingArray,
+        n_results: int,
+        where: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Answer a query from the exact index in Chroma's result format."""
+        snapshot, hits = exact_index.search(as_float32_matrix(query_embeddings), n_results, where)
+
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for rows, scores in hits:
+            distances = scores_to_distances(scores, self.space)
+            results["ids"].append([snapshot.ids[r] for r in rows])
+            results["documents"].append([snapshot.documents[r] for r in rows])
+            results["metadatas"].append([snapshot.metadatas[r] for r in rows])
+            results["distances"].append(distances.tolist())
+        return results
+
     def get_all_documents(self) -> Dict[str, Any]:
         """
         Get all documents from the collection.
@@ -125,6 +319,23 @@ class VectorDB:
             logger.error(f"❌ Failed to get documents: {e}")
             raise
 
+    def get_ids_by_filename(self, filename: str) -> List[str]:
+        """
+        Get the IDs of all chunks of a file.
+
+        Args:
+            filename: Source filename
+
+        Returns:
+            Chunk IDs
+        """
+        try:
+            return self.collection.get(where={"filename": filename}, include=[])["ids"]
+
+        except Exception as e:
+            logger.error(f"❌ Failed to get documents by filename: {e}")
+            raise
+
     def delete_documents(self, ids: List[str]) -> None:
         """
         Delete documents from the collection.
@@ -133,7 +344,12 @@ class VectorDB:
             ids: List of document IDs to delete
         """
         try:
-            self.collection.delete(ids=ids)
+            with self._write_lock:
+                self.collection.delete(ids=ids)
+                if self.exact_index is not None:
+                    self.exact_index.delete(ids)
+                self._sync_exact_index()
+                self._generation.bump()
             logger.info(f"🗑️  Deleted {len(ids)} documents from collection")
 
         except Exception as e:
@@ -151,24 +367,40 @@ class VectorDB:
             Number of documents deleted
         """
         try:
-            # Get all documents with this filename
-            results = self.collection.get(
-                where={"filename": filename}
-            )
-
-            if results['ids']:
-                self.collection.delete(ids=results['ids'])
-                count = len(results['ids'])
-                logger.info(f"🗑️  Deleted {count} chunks for file: {filename}")
-                return count
-            else:
-                logger.info(f"ℹ️  No documents found for file: {filename}")
-                return 0
+            with self._write_lock:
+                # Get all documents with this filename
+                results = self.collection.get(
+                    where={"filename": filename}
+                )
+
+                if results['ids']:
+                    self.collection.delete(ids=results['ids'])
+                    if self.exact_index is not None:
+                        self.exact_index.delete(results['ids'])
+                    self._sync_exact_index()
+                    self._generation.bump()
+                    count = len(results['ids'])
+                    logger.info(f"🗑️  Deleted {count} chunks for file: {filename}")
+                    return count
+                else:
+                    logger.info(f"ℹ️  No documents found for file: {filename}")
+                    return 0
 
         except Exception as e:
             logger.error(f"❌ Failed to delete by filename: {e}")
             raise
 
+    @property
+    def generation(self) -> int:
+        """Counter bumped on every change to the collection's documents."""
+        return self._generation.value
+
+    @property
+    def dim(self) -> Optional[int]:
+        """Dimension of the stored vectors (None while the collection is empty)."""
+        page = self.collection.get(limit=1, include=["embeddings"])
+        return len(page["embeddings"][0]) if page["ids"] else None
+
     def count(self) -> int:
         """
         Count total documents in the collection.
@@ -185,17 +417,310 @@ class VectorDB:
     def reset(self) -> None:
         """Reset the collection (delete all documents)."""
         try:
-            self.client.delete_collection(name=settings.chroma_collection_name)
-            self.collection = self.client.create_collection(
-                name=settings.chroma_collection_name,
-                metadata={"description": "EdgeAI Talk documents collection"},
-            )
+            with self._write_lock:
+                self.client.delete_collection(name=settings.chroma_collection_name)
+                self.collection = self.client.create_collection(
+                    name=settings.chroma_collection_name,
+                    metadata=COLLECTION_METADATA,
+                )
+                self.space = COLLECTION_SPACE
+                self.exact_index = None
+                self._sync_exact_index()
+                self._generation.bump()
             logger.info(f"🔄 Reset collection: '{settings.chroma_collection_name}'")
 
         except Exception as e:
             logger.error(f"❌ Failed to reset collection: {e}")
             raise
 
+    def migrate_space(self, space: str = COLLECTION_SPACE) -> int:
+        """
+        Rebuild the collection in another distance space without re-embedding.
+
+        Stored embeddings, documents and metadata are copied into a new
+        collection while the current one keeps serving queries. Writes made
+        during the copy are reconciled, and further writes wait, before the
+        new collection takes over the original name.
+
+        Args:
+            space: Target distance space ("cosine", "ip" or "l2")
+
+        Returns:
+            Number of chunks in the rebuilt collection
+        """
+        try:
+            if self.space == space:
+                logger.info(f"ℹ️  Collection already uses '{space}' space")
+                return self.collection.count()
+
+            return self._rebuild(space)
+
+        except Exception as e:
+            logger.error(f"❌ Failed to migrate collection: {e}")
+            raise
+
+    def sample_embeddings(self, limit: int) -> Tuple[List[str], np.ndarray]:
+        """
+        Random stored documents with their embeddings (to fit a projection).
+
+        Args:
+            limit: Maximum number of documents
+
+        Returns:
+            Documents and their embedding matrix
+        """
+        ids = self.collection.get(include=[])["ids"]
+        if len(ids) > limit:
+            rng = np.random.default_rng(0)
+            ids = [ids[i] for i in np.sort(rng.choice(len(ids), limit, replace=False))]
+
+        documents, embeddings = [], []
+        page_size = self.client.get_max_batch_size()
+        for start in range(0, len(ids), page_size):
+            page = self.collection.get(
+                ids=ids[start:start + page_size], include=["embeddings", "documents"]
+            )
+            documents.extend(page["documents"])
+            embeddings.append(as_float32_matrix(page["embeddings"]))
+        return documents, np.concatenate(embeddings) if embeddings else np.empty((0, 0), np.float32)
+
+    def iter_chunks(self, batch_size: int = 5000) -> Iterator[Dict[str, Any]]:
+        """
+        Stored chunks with their embeddings, one batch at a time.
+
+        The ids are listed up front, so chunks added later are not included
+        and chunks deleted meanwhile are skipped.
+
+        Args:
+            batch_size: Chunks per batch (capped at Chroma's per-call limit)
+
+        Yields:
+            Dicts with ids, documents, embeddings (float32) and metadatas
+        """
+        ids = self.collection.get(include=[])["ids"]
+        batch_size = min(batch_size, self.client.get_max_batch_size())
+        for start in range(0, len(ids), batch_size):
+            page = self.collection.get(
+                ids=ids[start:start + batch_size],
+                include=["embeddings", "documents", "metadatas"],
+            )
+            if page["ids"]:
+                yield {
+                    "ids": page["ids"],
+                    "documents": page["documents"],
+                    "embeddings": as_float32_matrix(page["embeddings"]),
+                    "metadatas": page["metadatas"],
+                }
+
+    def reproject(self, transform: EmbeddingTransform) -> int:
+        """
+        Rebuild the collection with transformed (e.g. projected) embeddings.
+
+        Works like ``migrate_space``: the current collection keeps serving
+        until the rebuilt one takes over its name.
+
+        Args:
+            transform: Maps each page's documents and stored embeddings to
+                the new embeddings
+
+        Returns:
+            Number of chunks in the rebuilt collection
+        """
+        try:
+            return self._rebuild(self.space, transform)
+
+        except Exception as e:
+            logger.error(f"❌ Failed to reproject collection: {e}")
+            raise
+
+    def compact(self) -> Dict[str, Any]:
+        """
+        Return the space freed by deletions to the file system.
+
+        SQLite keeps the pages of deleted chunks allocated; they are released
+        by a VACUUM. The HNSW index (deleted elements stay as tombstones) and
+        the rows Chroma keeps for collections deleted by a reset or rebuild
+        cannot be dropped in place through Chroma's API: ``snapshot``
+        writes a fresh store without them, and restoring it (server
+        stopped) compacts those as well.
+
+        Returns:
+            Report with on-disk size and cold open time before and after
+        """
+        from store_maintenance import store_report
+
+        try:
+            persist_dir = os.path.abspath(settings.chroma_persist_dir)
+            before = store_report(persist_dir, "chroma")
+            start = time.perf_counter()
+
+            self._vacuum(persist_dir)
+
+            report = {
+                "chunks": self.collection.count(),
+                "seconds": round(time.perf_counter() - start, 2),
+                "before": before,
+                "after": store_report(persist_dir, "chroma"),
+            }
+            logger.info(
+                f"🧹 Compacted '{settings.chroma_collection_name}': "
+                f"{before['bytes'] / 1e6:.1f} MB -> {report['after']['bytes'] / 1e6:.1f} MB"
+            )
+            return report
+
+        except Exception as e:
+            logger.error(f"❌ Failed to compact collection: {e}")
+            raise
+
+    def snapshot(self, path: str) -> Dict[str, Any]:
+        """
+        Write a compact, self-contained copy of the collection to ``path``.
+
+        The chunks are streamed with their stored embeddings to a separate
+        process that creates a new Chroma store at ``path`` and exits, so
+        its files are closed without reaching into this process's client.
+        The snapshot opens as a regular ``CHROMA_PERSIST_DIR`` and is
+        restored with tools/compact_store.py.
+
+        Args:
+            path: New directory for the snapshot
+
+        Returns:
+            Snapshot report (path, chunks, size, cold open time)
+        """
+        from store_maintenance import finish_snapshot, write_store
+
+        try:
+            path = os.path.abspath(path)
+            if os.path.exists(path):
+                raise ValueError(f"Snapshot directory already exists: {path}")
+
+            generation = self.generation
+            count = write_store(path, "chroma", self.iter_chunks(), self.space)
+            self._vacuum(path)
+
+            return finish_snapshot(path, "chroma", count, generation)
+
+        except Exception as e:
+            logger.error(f"❌ Failed to snapshot collection: {e}")
+            raise
+
+    @staticmethod
+    def _vacuum(persist_dir: str) -> None:
+        """Return SQLite's free pages to the file system."""
+        conn = sqlite3.connect(os.path.join(persist_dir, "chroma.sqlite3"), timeout=60)
+        try:
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+
+    def _rebuild(self, space: str, transform: Optional[EmbeddingTransform] = None) -> int:
+        """Copy the collection into a new one and swap it in under the same name."""
+        name = settings.chroma_collection_name
+        target_name = f"{name}_{space}_rebuild"
+        if target_name in [c.name for c in self.client.list_collections()]:
+            self.client.delete_collection(name=target_name)
+
+        logger.info(f"🔄 Rebuilding '{name}': {self.space} -> {space}")
+        target = self.client.create_collection(
+            name=target_name,
+            metadata={**COLLECTION_METADATA, "hnsw:space": space},
+        )
+
+        self._copy_collection(self.collection, target, transform)
+
+        with self._write_lock:
+            # Writes since the copy's reconciliation; later ones wait for the swap
+            self._reconcile(self.collection, target, transform)
+
+            self.collection = target
+            self.space = space
+            self.client.delete_collection(name=name)
+            target.modify(name=name)
+
+            if transform is not None:
+                # New vectors: re-mirror the exact index and invalidate caches
+                self.exact_index = None
+                self._sync_exact_index()
+                self._generation.bump()
+
+        count = target.count()
+        logger.info(f"✅ Rebuilt '{name}' in '{space}' space ({count} chunks)")
+        return count
+
+    def _copy_collection(
+        self,
+        source,
+        target,
+        transform: Optional[EmbeddingTransform] = None,
+    ) -> None:
+        """Copy every chunk of ``source`` into ``target`` while ``source`` stays writable."""
+        page_size = self.client.get_max_batch_size()
+        for offset in range(0, source.count(), page_size):
+            page = source.get(
+                include=["embeddings", "documents", "metadatas"],
+                limit=page_size,
+                offset=offset,
+            )
+            self._copy_page(target, page, transform)
+
+        # Reconcile uploads and deletions that happened during the copy
+        self._reconcile(source, target, transform)
+
+    def _reconcile(
+        self,
+        source,
+        target,
+        transform: Optional[EmbeddingTransform] = None,
+    ) -> None:
+        """Copy chunks missing from ``target`` and drop those gone from ``source``."""
+        page_size = self.client.get_max_batch_size()
+        source_ids = set(source.get(include=[])["ids"])
+        target_ids = set(target.get(include=[])["ids"])
+        missing = list(source_ids - target_ids)
+        for start in range(0, len(missing), page_size):
+            page = source.get(
+                ids=missing[start:start + page_size],
+                include=["embeddings", "documents", "metadatas"],
+            )
+            self._copy_page(target, page, transform)
+        stale = list(target_ids - source_ids)
+        if stale:
+            target.delete(ids=stale)
+
+    @staticmethod
+    def _copy_page(
+        target,
+        page: Dict[str, Any],
+        transform: Optional[EmbeddingTransform] = None,
+    ) -> None:
+        """Add one page of ``collection.get`` output to ``target``."""
+        if page["ids"]:
+            embeddings = as_float32_matrix(page["embeddings"])
+            if transform is not None:
+                embeddings = as_float32_matrix(transform(page["documents"], embeddings))
+            target.add(
+                ids=page["ids"],
+                documents=page["documents"],
+                embeddings=embeddings,
+                metadatas=page["metadatas"],
+            )
+
+
+def create_vector_db():
+    """Create the vector store for the configured backend."""
+    if settings.store_service_url:
+        from store_client import RemoteVectorDB
+
+        return RemoteVectorDB(settings.store_service_url)
+
+    if settings.vector_backend == "local":
+        from local_vectordb import LocalVectorDB
+
+        return LocalVectorDB()
+
+    return VectorDB()
+
 
 # Global VectorDB instance
-vector_db = VectorDB()
+vector_db = create_vector_db()
@@ -0,0 +1,231 @@
+"""Warm answer cache: canonical prompts answered ahead of time."""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+FENCED_BLOCK = re.compile(r"```[^\n]*\n(.*?)\n```", re.S)
+
+
+def load_canonical_prompts(path: str = settings.warm_prompts_path) -> List[str]:
+    """
+    Read the canonical prompts to warm.
+
+    Args:
+        path: A .json list of strings, a .md file whose fenced code blocks
+            are the prompts (like QUICK_TEST_PROMPTS.md), or a text file with
+            one prompt per line (lines starting with # are comments)
+
+    Returns:
+        Distinct prompts in file order
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+
+        if path.endswith(".json"):
+            prompts = json.loads(text)
+        elif path.endswith(".md"):
+            prompts = FENCED_BLOCK.findall(text)
+        else:
+            prompts = [line for line in text.splitlines() if not line.startswith("#")]
+
+        prompts = [p.strip() for p in prompts if p.strip()]
+        return list(dict.fromkeys(prompts))
+
+    except Exception as e:
+        logger.error(f"❌ Failed to load canonical prompts from {path}: {e}")
+        raise
+
+
+class WarmAnswer:
+    """A precomputed answer matched to a request."""
+
+    def __init__(self, prompt: str, chunks: List[str], similarity: float):
+        self.prompt = prompt
+        self.chunks = chunks
+        self.similarity = similarity
+
+
+class WarmCache:
+    """
+    Answers to canonical prompts, matched by query embedding.
+
+    Each entry keeps the prompt's query embedding, the SSE data chunks of
+    its answer and the vector store generation it was produced at. Entries
+    from another generation are never served; re-running the warm-up
+    replaces them. The embeddings are held in memory as one matrix, so a
+    lookup is a single matrix-vector product; the matrix is reloaded when
+    another process (the warm-up tool, another worker) changes the store.
+    """
+
+    def __init__(self, path: str = settings.warm_cache_path):
+        """Open (or create) the store and load it into memory."""
+        self.path = os.path.abspath(path)
+        self._lock = threading.Lock()
+        self._prompts: List[str] = []
+        self._chunks: List[List[str]] = []
+        self._generations = np.zeros(0, dtype=np.int64)
+        self._embeddings: Optional[np.ndarray] = None
+        self._data_version: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self._initialize()
+
+    def _initialize(self):
+        """Create the SQLite store and load the entries."""
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(
+                """
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS warm_answers (
+                    prompt TEXT PRIMARY KEY,
+                    embedding BLOB NOT NULL,
+                    generation INTEGER NOT NULL,
+                    chunks TEXT NOT NULL,
+                    audio INTEGER NOT NULL,
+                    created REAL NOT NULL
+                );
+                """
+            )
+            self._load()
+            logger.info(f"✅ Warm answer cache ready at {self.path} ({len(self._prompts)} entries)")
+
+        except Exception as e:
+            logger.error(f"❌ Failed to initialize warm answer cache: {e}")
+            raise
+
+    def _load(self) -> None:
+        """Read all entries into memory."""
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        rows = self._conn.execute(
+            "SELECT prompt, embedding, generation, chunks FROM warm_answers ORDER BY prompt"
+        ).fetchall()
+        self._prompts = [row[0] for row in rows]
+        self._chunks = [json.loads(row[3]) for row in rows]
+        self._generations = np.array([row[2] for row in rows], dtype=np.int64)
+        self._embeddings = (
+            np.stack([np.frombuffer(row[1], dtype=np.float32) for row in rows]) if rows else None
+        )
+
+    def match(self, embedding: np.ndarray, generation: int) -> Optional[WarmAnswer]:
+        """
+        Find the canonical prompt closest to a query.
+
+        Args:
+            embedding: Normalized query embedding
+            generation: Current vector store generation
+
+        Returns:
+            The answer of the most similar fresh entry, if its cosine
+            similarity reaches ``warm_cache_similarity``; otherwise None
+        """
+        with self._lock:
+            # data_version changes when another connection commits
+            if self._conn.execute("PRAGMA data_version").fetchone()[0] != self._data_version:
+                self._load()
+
+            if self._embeddings is None or self._embeddings.shape[1] != embedding.shape[-1]:
+                self.misses += 1
+                return None
+
+            scores = self._embeddings @ embedding.astype(np.float32)
+            scores[self._generations != generation] = -np.inf
+            best = int(np.argmax(scores))
+            if scores[best] < settings.warm_cache_similarity:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return WarmAnswer(self._prompts[best], self._chunks[best], float(scores[best]))
+
+    def is_fresh(self, prompt: str, generation: int, audio: bool) -> bool:
+        """Whether a prompt already has an answer for this generation."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT generation, audio FROM warm_answers WHERE prompt = ?", (prompt,)
+            ).fetchone()
+        return row is not None and row[0] == generation and (bool(row[1]) or not audio)
+
+    def put(
+        self,
+        prompt: str,
+        embedding: np.ndarray,
+        generation: int,
+        chunks: List[str],
+        audio: bool,
+    ) -> None:
+        """
+        Store the answer to a canonical prompt.
+
+        Args:
+            prompt: Canonical prompt
+            embedding: Its normalized query embedding
+            generation: Vector store generation the answer was produced at
+            chunks: SSE data chunks of the answer
+            audio: Whether the answer's sentences were synthesized
+        """
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO warm_answers "
+                    "(prompt, embedding, generation, chunks, audio, created) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        prompt,
+                        embedding.astype(np.float32).tobytes(),
+                        generation,
+                        json.dumps(chunks, ensure_ascii=False),
+                        int(audio),
+                        time.time(),
+                    ),
+                )
+                self._conn.commit()
+                self._load()
+
+        except Exception as e:
+            logger.error(f"❌ Failed to store warm answer: {e}")
+            raise
+
+    def prune(self, prompts: List[str]) -> int:
+        """
+        Drop entries for prompts no longer in the canonical list.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            placeholders = ",".join("?" * len(prompts))
+            removed = self._conn.execute(
+                f"DELETE FROM warm_answers WHERE prompt NOT IN ({placeholders})", prompts
+            ).rowcount
+            self._conn.commit()
+            self._load()
+        return removed
+
+    def stats(self, generation: int) -> dict:
+        """Hit/miss counters and entry counts."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._prompts),
+                "fresh_entries": int((self._generations == generation).sum()),
+            }
+
+
+# Global warm answer cache instance (None unless enabled)
+warm_cache = WarmCache() if settings.warm_cache_enabled else None